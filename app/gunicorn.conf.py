@@ -0,0 +1,54 @@
+"""
+Gunicorn configuration, picked up automatically from the working directory.
+
+Worker counts and the worker class are passed on the command line by
+startup.sh.  This file handles preloading: unless GUNICORN_PRELOAD is 'false',
+the app is loaded and warmed up (see lucos_eolas/metadata/warmup.py) once in
+the master, before it forks the workers, which then share that memory
+copy-on-write.
+"""
+
+import gc
+import os
+import time
+
+from lucos_eolas.metadata.warmup import StartupTimer
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true') != 'false'
+
+# This file is read before the app is loaded, in the master
+_timer = StartupTimer()
+_loading_since = time.perf_counter()
+
+
+def _warm_up(log):
+	from lucos_eolas.metadata.warmup import warm_up
+	_timer.record('app load', time.perf_counter() - _loading_since)
+	warm_up(_timer)
+	log.info(_timer.report())
+
+
+def when_ready(server):
+	if not preload_app:
+		return
+	from django.db import connections
+	_warm_up(server.log)
+	# Don't let workers inherit any database connections made by the master
+	connections.close_all()
+	# Everything so far lives for the life of the process.  Freezing it keeps
+	# the garbage collector from touching (and so copying) those pages in workers.
+	gc.freeze()
+
+
+def post_fork(server, worker):
+	global _loading_since
+	if not preload_app:
+		_loading_since = time.perf_counter()
+
+
+def post_worker_init(worker):
+	from django.apps import apps
+	if not preload_app:
+		_warm_up(worker.log)
+	apps.get_app_config('metadata').start_check_refresh_thread()
+	apps.get_app_config('metadata').start_sparql_graph_build()
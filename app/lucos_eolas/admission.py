@@ -0,0 +1,336 @@
+"""
+Cost-aware admission control for expensive views.
+
+Each gunicorn worker only has a handful of threads (see startup.sh), so a few
+concurrent full-dataset exports can starve cheap traffic (admin, batch_names)
+and trip the worker timeout.  Views declare a cost class with @cost_class; any
+class configured in settings.EOLAS_ADMISSION gets its own per-process pool:
+
+  concurrency  — how many requests of this class may run at once
+  queue        — how many more may wait for a slot; beyond that → 429
+  wait         — seconds a queued request waits for a slot before → 503
+  retry_after  — value of the Retry-After header on 429/503 responses
+
+Classes without configuration are admitted unconditionally.
+
+Optionally, identical in-flight requests can be coalesced: when `coalesce` is
+given, it maps a request to a key, and concurrent requests with the same key
+share the response computed by the first one rather than each occupying a slot.
+A key of None means the request isn't coalesced, for responses which couldn't be
+shared anyway, such as streamed ones.
+Requests waiting on another's response still hold a thread, so they count
+against the queue.
+"""
+
+import asyncio
+import logging
+import threading
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+
+from django.conf import settings
+from django.http import HttpResponse
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionPool:
+	"""A bounded pool of execution slots with a bounded wait queue."""
+
+	def __init__(self, name, concurrency, queue, wait, retry_after):
+		self.name = name
+		self.queue = queue
+		self.wait = wait
+		self.retry_after = retry_after
+		self._slots = threading.BoundedSemaphore(concurrency)
+		self._lock = threading.Lock()
+		self._waiting = 0
+		self.admitted = 0
+		self.rejected = 0
+		self.timed_out = 0
+		self.coalesced = 0
+
+	def acquire(self):
+		"""Take a slot, returning None on success or the HTTP status to reject with."""
+		if not self._slots.acquire(blocking=False):
+			if not self.enter_queue():
+				return 429
+			try:
+				acquired = self._slots.acquire(timeout=self.wait)
+			finally:
+				self.leave_queue()
+			if not acquired:
+				self.note_timed_out()
+				return 503
+		with self._lock:
+			self.admitted += 1
+		return None
+
+	def enter_queue(self):
+		"""Count a request as waiting, returning False (and counting it rejected) if the queue is full."""
+		with self._lock:
+			if self._waiting >= self.queue:
+				self.rejected += 1
+				return False
+			self._waiting += 1
+			return True
+
+	def leave_queue(self):
+		with self._lock:
+			self._waiting -= 1
+
+	def note_timed_out(self):
+		with self._lock:
+			self.timed_out += 1
+
+	def note_coalesced(self):
+		with self._lock:
+			self.coalesced += 1
+
+	def release(self):
+		self._slots.release()
+
+	def reject(self, status):
+		response = HttpResponse(status=status)
+		response['Retry-After'] = str(self.retry_after)
+		return response
+
+	def stats(self):
+		with self._lock:
+			return {
+				'waiting': self._waiting,
+				'admitted': self.admitted,
+				'rejected': self.rejected,
+				'timed_out': self.timed_out,
+				'coalesced': self.coalesced,
+			}
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(cost):
+	"""Return the pool for a cost class, or None if the class is unlimited."""
+	with _pools_lock:
+		if cost not in _pools:
+			config = getattr(settings, 'EOLAS_ADMISSION', {}).get(cost)
+			_pools[cost] = AdmissionPool(cost, **config) if config else None
+		return _pools[cost]
+
+
+def admission_stats():
+	"""Return {cost class: stats dict} for every pool used so far in this process."""
+	with _pools_lock:
+		pools = [pool for pool in _pools.values() if pool]
+	return {pool.name: pool.stats() for pool in pools}
+
+
+class _Flight:
+	"""One in-progress computation that other identical requests can wait on."""
+
+	def __init__(self):
+		self.done = threading.Event()
+		self.snapshot = None
+
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+def _snapshot(response):
+	# Take a copy before the response is handed back up the middleware stack,
+	# which mutates headers on the leader's response object.
+	return response.content, response.status_code, dict(response.headers)
+
+
+def _from_snapshot(snapshot):
+	content, status, headers = snapshot
+	return HttpResponse(content, status=status, headers=headers)
+
+
+def cost_class(cost, coalesce=None):
+	"""Decorator declaring the cost class of a view.
+
+	Apply it inside @api_auth, so unauthenticated requests never take a slot:
+
+	  @api_auth(required_scope='eolas:read')
+	  @cost_class('export', coalesce=lambda request: pick_best_rdf_format(request))
+	  def all_rdf(request): ...
+
+	Async views share the same per-process pools; any blocking wait for a slot
+	or for a coalesced flight happens in a worker thread, off the event loop.
+	"""
+	def decorator(view):
+		if iscoroutinefunction(view):
+			return _async_cost_class(view, cost, coalesce)
+
+		def admitted(pool, request, *args, **kwargs):
+			if pool is None:
+				return view(request, *args, **kwargs)
+			status = pool.acquire()
+			if status:
+				logger.warning("Rejecting %s with %d: '%s' admission pool is full", request.path, status, cost)
+				return pool.reject(status)
+			try:
+				response = view(request, *args, **kwargs)
+			except BaseException:
+				pool.release()
+				raise
+			return _release_when_done(response, pool)
+
+		@wraps(view)
+		def _decorator(request, *args, **kwargs):
+			pool = get_pool(cost)
+			key = coalesce(request, *args, **kwargs) if coalesce else None
+			if key is None:
+				return admitted(pool, request, *args, **kwargs)
+
+			key = (view.__module__, view.__qualname__, key)
+			flight, leader = _join_flight(key)
+			if not leader:
+				status = _follow(pool, flight)
+				if status:
+					logger.warning("Rejecting %s with %d: '%s' admission queue is full", request.path, status, cost)
+					return pool.reject(status)
+				if flight.snapshot:
+					if pool:
+						pool.note_coalesced()
+					return _from_snapshot(flight.snapshot)
+				# The leader didn't produce a shareable response, so compute our own
+				return admitted(pool, request, *args, **kwargs)
+			try:
+				response = admitted(pool, request, *args, **kwargs)
+				_land_flight(flight, response)
+				return response
+			finally:
+				_end_flight(key, flight)
+		_decorator.cost_class = cost
+		return _decorator
+	return decorator
+
+
+def _async_cost_class(view, cost, coalesce):
+
+	async def admitted(pool, request, *args, **kwargs):
+		if pool is None:
+			return await view(request, *args, **kwargs)
+		status = await asyncio.to_thread(pool.acquire)
+		if status:
+			logger.warning("Rejecting %s with %d: '%s' admission pool is full", request.path, status, cost)
+			return pool.reject(status)
+		try:
+			response = await view(request, *args, **kwargs)
+		except BaseException:
+			pool.release()
+			raise
+		return _release_when_done(response, pool)
+
+	@wraps(view)
+	async def _decorator(request, *args, **kwargs):
+		pool = get_pool(cost)
+		key = coalesce(request, *args, **kwargs) if coalesce else None
+		if key is None:
+			return await admitted(pool, request, *args, **kwargs)
+
+		key = (view.__module__, view.__qualname__, key)
+		flight, leader = _join_flight(key)
+		if not leader:
+			status = await asyncio.to_thread(_follow, pool, flight)
+			if status:
+				logger.warning("Rejecting %s with %d: '%s' admission queue is full", request.path, status, cost)
+				return pool.reject(status)
+			if flight.snapshot:
+				if pool:
+					pool.note_coalesced()
+				return _from_snapshot(flight.snapshot)
+			return await admitted(pool, request, *args, **kwargs)
+		try:
+			response = await admitted(pool, request, *args, **kwargs)
+			_land_flight(flight, response)
+			return response
+		finally:
+			_end_flight(key, flight)
+	_decorator.cost_class = cost
+	return _decorator
+
+
+def _release_when_done(response, pool):
+	"""Release the slot taken for response, or arrange for it to be released later.
+
+	A streaming body is produced after the view returns, so the slot is held
+	until the response is closed, which the WSGI server or ASGI handler does
+	once the stream is exhausted or the client has gone away.
+	"""
+	if response.streaming:
+		held = _AsyncHeldSlot if response.is_async else _HeldSlot
+		response.streaming_content = held(response.streaming_content, pool)
+	else:
+		pool.release()
+	return response
+
+
+class _HeldSlot:
+	"""Streaming content which releases a pool slot when closed."""
+
+	def __init__(self, content, pool):
+		self._content = content
+		self._pool = pool
+		self._released = False
+
+	def __iter__(self):
+		return iter(self._content)
+
+	def close(self):
+		if not self._released:
+			self._released = True
+			self._pool.release()
+
+
+class _AsyncHeldSlot(_HeldSlot):
+	"""Async streaming content which releases a pool slot when closed."""
+
+	def __aiter__(self):
+		return aiter(self._content)
+
+
+def _join_flight(key):
+	"""Return (flight, is_leader) for the in-flight computation of key."""
+	with _flights_lock:
+		flight = _flights.get(key)
+		if flight is not None:
+			return flight, False
+		flight = _flights[key] = _Flight()
+		return flight, True
+
+
+def _follow(pool, flight):
+	"""Wait for the leader of flight to finish, returning None once it has or the
+	HTTP status to reject with.  Followers hold a thread while they wait, so they
+	count against the pool's queue just as requests waiting for a slot do."""
+	if pool is None:
+		flight.done.wait()
+		return None
+	if not pool.enter_queue():
+		return 503
+	try:
+		finished = flight.done.wait(timeout=pool.wait)
+	finally:
+		pool.leave_queue()
+	if not finished:
+		pool.note_timed_out()
+		return 503
+	return None
+
+
+def _land_flight(flight, response):
+	# Streaming responses can only be consumed once, so they're never shared.
+	if response.status_code == 200 and not response.streaming:
+		flight.snapshot = _snapshot(response)
+
+
+def _end_flight(key, flight):
+	with _flights_lock:
+		del _flights[key]
+	flight.done.set()
@@ -0,0 +1,40 @@
+from django.apps import AppConfig
+from django.utils.translation import gettext_lazy as _
+
+
+class DerivedConfig(AppConfig):
+    """Tables derived from the metadata models, to answer questions the models
+    themselves can't answer cheaply.  They're never edited directly: signal
+    receivers keep them up to date as the metadata changes, and each has a
+    management command to rebuild it from scratch."""
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'lucos_eolas.derived'
+    verbose_name = _('Derived data')
+
+    def ready(self):
+        from django.apps import apps
+        from django.db.models.signals import pre_save, post_save, post_delete, m2m_changed
+        from lucos_eolas.metadata.models import Calendar, Festival, FestivalPeriod, Month
+        from lucos_eolas.metadata.signals import bulk_loaded
+        from .signals import refresh_festival, refresh_festival_of_period, refresh_all_festivals, refresh_after_bulk_load
+        from .signals import refresh_triples, remove_triples, refresh_linked_triples, rebuild_triples_after_bulk_load, remember_names, label_dependents
+        from .signals import record_deletion
+
+        for signal in (post_save, post_delete):
+            signal.connect(refresh_festival, sender=Festival, weak=False)
+            signal.connect(refresh_festival_of_period, sender=FestivalPeriod, weak=False)
+            # Changing a month or calendar can change the key of any festival's days
+            signal.connect(refresh_all_festivals, sender=Month, weak=False)
+            signal.connect(refresh_all_festivals, sender=Calendar, weak=False)
+        bulk_loaded.connect(refresh_after_bulk_load, weak=False)
+
+        for model in apps.get_app_config('metadata').get_models():
+            # Renaming some items changes the labels of others, so what they were called is needed
+            if model.name_clash_fields or label_dependents(model):
+                pre_save.connect(remember_names, sender=model, weak=False)
+            post_save.connect(refresh_triples, sender=model, weak=False)
+            post_delete.connect(remove_triples, sender=model, weak=False)
+            post_delete.connect(record_deletion, sender=model, weak=False)
+            for field in model._meta.local_many_to_many:
+                m2m_changed.connect(refresh_linked_triples, sender=field.remote_field.through, weak=False)
+        bulk_loaded.connect(rebuild_triples_after_bulk_load, weak=False)
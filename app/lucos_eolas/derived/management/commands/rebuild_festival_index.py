@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from lucos_eolas.derived.models import FestivalOccurrence
+from lucos_eolas.derived.occurrences import rebuild
+
+
+class Command(BaseCommand):
+	help = "Rebuild the index of the days festivals and festival periods fall on, from scratch."
+
+	def handle(self, *args, **options):
+		rebuild()
+		self.stdout.write(f"Indexed {FestivalOccurrence.objects.count()} festival days")
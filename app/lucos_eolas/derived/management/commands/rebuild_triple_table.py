@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from lucos_eolas.derived import triples
+from lucos_eolas.derived.models import Triple
+
+
+class Command(BaseCommand):
+	help = "Rebuild the table of every triple of eolas's RDF, from scratch."
+
+	def add_arguments(self, parser):
+		parser.add_argument('--if-outdated', action='store_true', help="Only rebuild if this release hasn't already.")
+
+	def handle(self, *args, **options):
+		if options['if_outdated'] and triples.is_current():
+			self.stdout.write("Triple table is up to date")
+			return
+		triples.rebuild()
+		self.stdout.write(f"Stored {Triple.objects.count()} triples")
@@ -0,0 +1,35 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_index(apps, schema_editor):
+    from lucos_eolas.derived.occurrences import rebuild
+    rebuild(apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('metadata', '0056_alter_creativeworktype_category_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FestivalOccurrence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('calendar', models.CharField(db_comment='Temporal calendar ID of the calendar the day is in.', max_length=20)),
+                ('month_code', models.CharField(db_comment='Temporal monthCode of the month the day is in.', max_length=4)),
+                ('day', models.PositiveSmallIntegerField(db_comment='Day of the month; null for the whole month.', null=True)),
+                ('festival', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='metadata.festival')),
+                ('period', models.ForeignKey(db_comment='The period of the festival which falls on this day; null for its defining day.', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='metadata.festivalperiod')),
+            ],
+            options={
+                'db_table_comment': 'Index of the days on which festivals and festival periods fall, rebuilt whenever they change.',
+                'indexes': [models.Index(fields=['calendar', 'month_code', 'day'], name='derived_fes_calenda_6372c4_idx')],
+            },
+        ),
+        migrations.RunPython(build_index, migrations.RunPython.noop),
+    ]
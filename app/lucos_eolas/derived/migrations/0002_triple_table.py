@@ -0,0 +1,40 @@
+# Generated by Django 6.1 on 2026-10-19 18:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('derived', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TableBuild',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('table', models.CharField(db_comment='Name of the derived table.', max_length=50, unique=True)),
+                ('version', models.CharField(blank=True, db_comment='VERSION of the release which rebuilt it.', max_length=100)),
+                ('built_at', models.DateTimeField(db_comment='When it was last rebuilt.')),
+            ],
+            options={
+                'db_table_comment': 'The last full rebuild of each derived table which depends on code as well as data.',
+            },
+        ),
+        migrations.CreateModel(
+            name='Triple',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('graph', models.TextField(db_comment='URI of the item whose RDF the triple is part of, or urn:eolas:ontology.')),
+                ('subject', models.TextField(db_comment='Subject, in N-Triples syntax.')),
+                ('predicate', models.TextField(db_comment='Predicate, in N-Triples syntax.')),
+                ('object', models.TextField(db_comment='Object, in N-Triples syntax.')),
+                ('object_digest', models.CharField(db_comment='MD5 hex digest of object, for indexing.', max_length=32)),
+            ],
+            options={
+                'db_table_comment': "Every triple of eolas's RDF, rewritten item by item as items change.",
+                'indexes': [models.Index(fields=['graph'], name='triple_graph_idx'), models.Index(fields=['subject', 'predicate', 'object_digest'], name='triple_spo_idx'), models.Index(fields=['predicate', 'object_digest', 'subject'], name='triple_pos_idx'), models.Index(fields=['object_digest', 'subject', 'predicate'], name='triple_osp_idx')],
+            },
+        ),
+    ]
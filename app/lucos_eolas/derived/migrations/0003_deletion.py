@@ -0,0 +1,24 @@
+# Generated by Django 6.1 on 2026-10-19 20:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('derived', '0002_triple_table'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Deletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('table', models.CharField(db_comment='Name of the metadata table.', max_length=50, unique=True)),
+                ('deleted_at', models.DateTimeField(db_comment='When an item was last deleted from it.')),
+            ],
+            options={
+                'db_table_comment': 'The last deletion from each metadata table.',
+            },
+        ),
+    ]
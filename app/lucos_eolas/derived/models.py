@@ -0,0 +1,67 @@
+from django.db import models
+
+
+class FestivalOccurrence(models.Model):
+	"""A day on which a festival, or one of its periods, falls (see occurrences.py).
+
+	Days are keyed the way the Temporal API identifies them, so the same key
+	matches every year: the calendar's temporal_id, the month's monthCode and the
+	day of the month.  A null day means the whole of the month.
+	"""
+	calendar = models.CharField(max_length=20, db_comment='Temporal calendar ID of the calendar the day is in.')
+	month_code = models.CharField(max_length=4, db_comment='Temporal monthCode of the month the day is in.')
+	day = models.PositiveSmallIntegerField(null=True, db_comment='Day of the month; null for the whole month.')
+	festival = models.ForeignKey('metadata.Festival', on_delete=models.CASCADE, related_name='+')
+	period = models.ForeignKey('metadata.FestivalPeriod', on_delete=models.CASCADE, null=True, related_name='+', db_comment='The period of the festival which falls on this day; null for its defining day.')
+
+	class Meta:
+		indexes = [models.Index(fields=['calendar', 'month_code', 'day'])]
+		db_table_comment = "Index of the days on which festivals and festival periods fall, rebuilt whenever they change."
+
+
+class Triple(models.Model):
+	"""One triple of the RDF of everything in eolas (see triples.py).
+
+	Terms are stored in N-Triples syntax, so that URIs, literals (with their
+	language or datatype) and blank nodes can share a column.  Objects can be
+	literals too long for a btree index, so their index entries are an MD5
+	digest of them instead.
+	"""
+	graph = models.TextField(db_comment='URI of the item whose RDF the triple is part of, or urn:eolas:ontology.')
+	subject = models.TextField(db_comment='Subject, in N-Triples syntax.')
+	predicate = models.TextField(db_comment='Predicate, in N-Triples syntax.')
+	object = models.TextField(db_comment='Object, in N-Triples syntax.')
+	object_digest = models.CharField(max_length=32, db_comment='MD5 hex digest of object, for indexing.')
+
+	class Meta:
+		indexes = [
+			models.Index(fields=['graph'], name='triple_graph_idx'),
+			models.Index(fields=['subject', 'predicate', 'object_digest'], name='triple_spo_idx'),
+			models.Index(fields=['predicate', 'object_digest', 'subject'], name='triple_pos_idx'),
+			models.Index(fields=['object_digest', 'subject', 'predicate'], name='triple_osp_idx'),
+		]
+		db_table_comment = "Every triple of eolas's RDF, rewritten item by item as items change."
+
+
+class Deletion(models.Model):
+	"""When items were last deleted from a metadata table.
+
+	What's left in a table can't say when something was last taken out of it,
+	so anything which dates a table's contents by its items' modified times
+	(such as the festival feed's Last-Modified) needs this too.
+	"""
+	table = models.CharField(max_length=50, unique=True, db_comment='Name of the metadata table.')
+	deleted_at = models.DateTimeField(db_comment='When an item was last deleted from it.')
+
+	class Meta:
+		db_table_comment = "The last deletion from each metadata table."
+
+
+class TableBuild(models.Model):
+	"""When, and by which release, a derived table was last rebuilt from scratch."""
+	table = models.CharField(max_length=50, unique=True, db_comment='Name of the derived table.')
+	version = models.CharField(max_length=100, blank=True, db_comment='VERSION of the release which rebuilt it.')
+	built_at = models.DateTimeField(db_comment='When it was last rebuilt.')
+
+	class Meta:
+		db_table_comment = "The last full rebuild of each derived table which depends on code as well as data."
@@ -0,0 +1,149 @@
+"""
+Festival occurrence engine: which festivals and festival periods are on when.
+
+Festival.day_of_month/month and FestivalPeriod.start_day/start_month/duration_days
+are rules which recur every year.  expand() turns each festival's rules into the
+individual days they cover, which are stored in the FestivalOccurrence table,
+keyed by Temporal calendar ID, monthCode and day.  Looking up any day, or any
+range of days, is then a single indexed query (see find()).
+
+Spans which run past the end of a month continue into the next month of the
+same calendar (by order_in_calendar, wrapping round at the end of the year).
+The index is the same every year, so a month is taken to be as long as it can
+ever be: a Gregorian February has 29 days, and months of other calendars,
+whose lengths vary year to year, 30 days.  In a year where a month is shorter,
+a span crossing its end is indexed a day or two short at the far end.
+
+The index is refreshed by signal receivers as festivals, periods, months and
+calendars change (see signals.py); rebuild_festival_index rebuilds it outright.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.apps import apps as django_apps
+from django.db import models, transaction
+
+GREGORIAN = 'gregory'
+
+# The longest each month of a calendar can be, by monthCode
+MONTH_LENGTHS = {
+	GREGORIAN: {
+		'M01': 31, 'M02': 29, 'M03': 31, 'M04': 30, 'M05': 31, 'M06': 30,
+		'M07': 31, 'M08': 31, 'M09': 30, 'M10': 31, 'M11': 30, 'M12': 31,
+	},
+}
+DEFAULT_MONTH_LENGTH = 30
+
+# However long a period says it lasts, only index a year of it
+MAX_DURATION = 366
+
+# The longest date range find() can be asked about
+MAX_RANGE = 366
+
+
+def month_code(month):
+	"""The Temporal monthCode of a month, as Month.to_json() gives it."""
+	return month.temporal_month_code or f'M{month.order_in_calendar:02d}'
+
+
+def month_length(calendar, code):
+	return MONTH_LENGTHS.get(calendar, {}).get(code, DEFAULT_MONTH_LENGTH)
+
+
+def _following_months(Month):
+	"""Map each month's pk to the month after it in its calendar."""
+	by_calendar = defaultdict(list)
+	for month in Month.objects.select_related('calendar').order_by('calendar', 'order_in_calendar'):
+		by_calendar[month.calendar_id].append(month)
+	following = {}
+	for months in by_calendar.values():
+		for month, next_month in zip(months, months[1:] + months[:1]):
+			following[month.pk] = next_month
+	return following
+
+
+def _span(month, start_day, duration, following):
+	"""Yield (month, day) for each of `duration` days from start_day of month."""
+	day = start_day
+	for _ in range(min(duration, MAX_DURATION)):
+		if day > month_length(month.calendar.temporal_id, month_code(month)):
+			month = following[month.pk]
+			day = 1
+		yield month, day
+		day += 1
+
+
+def expand(festival, periods, following):
+	"""Return (month, day, period) for every day festival and its periods fall on;
+	day is None for the whole of a month, and period is None for the defining day."""
+	days = []
+	if festival.month is not None:
+		days.append((festival.month, festival.day_of_month, None))
+	for period in periods:
+		if period.start_month is None:
+			continue
+		if period.start_day is None:
+			days.append((period.start_month, None, period))
+		else:
+			days.extend((month, day, period) for month, day in _span(period.start_month, period.start_day, period.duration_days or 1, following))
+	return days
+
+
+def rebuild(festival_ids=None, apps=django_apps):
+	"""Rebuild the index for the given festivals, or for all of them.
+
+	Takes an app registry so that migrations can run it against historical models.
+	"""
+	Festival = apps.get_model('metadata', 'Festival')
+	FestivalPeriod = apps.get_model('metadata', 'FestivalPeriod')
+	Month = apps.get_model('metadata', 'Month')
+	FestivalOccurrence = apps.get_model('derived', 'FestivalOccurrence')
+
+	festivals = Festival.objects.select_related('month__calendar')
+	periods = FestivalPeriod.objects.select_related('start_month__calendar')
+	index = FestivalOccurrence.objects.all()
+	if festival_ids is not None:
+		festivals = festivals.filter(pk__in=festival_ids)
+		periods = periods.filter(festival_id__in=festival_ids)
+		index = index.filter(festival_id__in=festival_ids)
+	periods_by_festival = defaultdict(list)
+	for period in periods:
+		periods_by_festival[period.festival_id].append(period)
+	following = _following_months(Month)
+
+	rows = []
+	for festival in festivals:
+		for month, day, period in expand(festival, periods_by_festival[festival.pk], following):
+			if not month.calendar.temporal_id:
+				# Without a Temporal ID, there's no way to look the day up
+				continue
+			rows.append(FestivalOccurrence(calendar=month.calendar.temporal_id, month_code=month_code(month), day=day, festival=festival, period=period))
+	with transaction.atomic():
+		index.delete()
+		FestivalOccurrence.objects.bulk_create(rows)
+
+
+def gregorian_days(start, end):
+	"""Map (monthCode, day) to the dates from start to end (inclusive) it falls on."""
+	days = defaultdict(list)
+	date = start
+	while date <= end:
+		days[(f'M{date.month:02d}', date.day)].append(date)
+		date += timedelta(days=1)
+	return days
+
+
+def find(calendar, days):
+	"""Return the index entries for any of the given (monthCode, day) keys of a
+	calendar, along with the festival and period of each, in one query."""
+	from .models import FestivalOccurrence
+	days_by_month = defaultdict(set)
+	for code, day in days:
+		days_by_month[code].add(day)
+	lookup = models.Q()
+	for code, month_days in days_by_month.items():
+		lookup |= models.Q(month_code=code, day__in=sorted(month_days)) | models.Q(month_code=code, day__isnull=True)
+	if not lookup:
+		return []
+	return list(FestivalOccurrence.objects.filter(lookup, calendar=calendar).select_related('festival', 'period'))
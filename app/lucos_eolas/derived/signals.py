@@ -0,0 +1,137 @@
+"""Signal receivers keeping the derived tables in step with the metadata.
+
+Rebuilds wait until the change is committed: while a festival is being deleted,
+its periods go first, and rebuilding the festival's days at that point would
+write rows pointing at a festival that's about to disappear.
+"""
+
+from functools import cache
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Value
+from django.db.models.functions import Upper
+from django.utils import timezone
+
+from . import occurrences, triples
+from .models import Deletion
+
+
+def refresh_festival(sender, instance, **kwargs):
+	festival_id = instance.pk
+	transaction.on_commit(lambda: occurrences.rebuild([festival_id]))
+
+
+def refresh_festival_of_period(sender, instance, **kwargs):
+	festival_id = instance.festival_id
+	transaction.on_commit(lambda: occurrences.rebuild([festival_id]))
+
+
+def refresh_all_festivals(sender, **kwargs):
+	transaction.on_commit(occurrences.rebuild)
+
+
+def refresh_after_bulk_load(sender, models, **kwargs):
+	"""Receiver for metadata.signals.bulk_loaded, sent after items are written without their own signals."""
+	if {model._meta.model_name for model in models} & {'festival', 'festivalperiod', 'month', 'calendar'}:
+		transaction.on_commit(occurrences.rebuild)
+
+
+@cache
+def label_dependents(model_class):
+	"""The (type, foreign key) pairs whose items' labels name the item they point at
+	when they share their name with another item (see EolasModel.has_name_clash())."""
+	return [
+		(dependent, field.name)
+		for dependent in apps.get_app_config('metadata').get_models() if dependent.name_clash_fields
+		for field in dependent._meta.concrete_fields if field.many_to_one and field.related_model is model_class
+	]
+
+
+def _label_fields(model_class):
+	return ['name', *[field for field in model_class.name_clash_fields if field != 'name']]
+
+
+def _names(values):
+	return {values['name'], *(values.get('alternate_names') or [])}
+
+
+def remember_names(sender, instance, raw=False, **kwargs):
+	"""Note what an item was called before it's saved, as that can be in other items' labels."""
+	if raw or instance._state.adding:
+		return
+	instance._saved_names = sender.objects.filter(pk=instance.pk).values(*_label_fields(sender)).first()
+
+
+def _sharing_names(model_class, names):
+	"""The URIs of the items of a type which go by any of the given names, so whose labels depend on one another."""
+	if not model_class.name_clash_fields:
+		return set()
+	pks = model_class.objects.annotate(upper_name=Upper('name')).filter(upper_name__in=[Upper(Value(name)) for name in names]).values_list('pk', flat=True)
+	return {model_class(pk=pk).get_absolute_url() for pk in pks}
+
+
+def _touch_naming(instance):
+	"""Mark the items whose labels name instance as modified, as renaming it
+	changes their data without saving them; returns their URIs."""
+	uris = set()
+	now = timezone.now()
+	for dependent, field in label_dependents(type(instance)):
+		queryset = dependent.annotate_name_clashes(dependent.objects.filter(**{field: instance.pk}))
+		pks = list(queryset.filter(_name_clash=True).values_list('pk', flat=True))
+		dependent.objects.filter(pk__in=pks).update(modified=now)
+		uris |= {dependent(pk=pk).get_absolute_url() for pk in pks}
+	return uris
+
+
+def refresh_triples(sender, instance, **kwargs):
+	"""Refresh an item's triples, and those of any item whose label (its str()) it can change.
+
+	Items of types with name_clash_fields are labelled with something extra when
+	they share their name, so gaining or losing a namesake relabels them; and
+	that something extra is another item's name, so renaming that relabels them too.
+	"""
+	uri = instance.get_absolute_url()
+	saved = getattr(instance, '_saved_names', None)
+	current = {field: getattr(instance, field) for field in _label_fields(sender)}
+	names = _names(current) | (_names(saved) if saved else set())
+	renamed = saved is not None and saved['name'] != instance.name
+
+	def refresh():
+		uris = {uri} | _sharing_names(sender, names)
+		if renamed:
+			uris |= _touch_naming(instance)
+		triples.refresh(uris)
+	transaction.on_commit(refresh)
+
+
+def remove_triples(sender, instance, **kwargs):
+	uri = instance.get_absolute_url()
+	names = _names({field: getattr(instance, field) for field in _label_fields(sender)})
+
+	def remove():
+		triples.remove(uri)
+		# Its namesakes may no longer need telling apart from it
+		triples.refresh(_sharing_names(sender, names))
+	transaction.on_commit(remove)
+
+
+def record_deletion(sender, instance, **kwargs):
+	Deletion.objects.update_or_create(table=sender._meta.db_table, defaults={'deleted_at': timezone.now()})
+
+
+def refresh_linked_triples(sender, instance, action, model, pk_set, **kwargs):
+	"""Refresh the triples of the items on both ends of changed many-to-many links."""
+	if not action.startswith('post_'):
+		return
+	uri = instance.get_absolute_url()
+	if pk_set is None:
+		# Cleared: the items which were on the other end are those whose triples still point at this one
+		transaction.on_commit(lambda: triples.refresh({uri} | triples.referencing(uri)))
+		return
+	uris = {uri} | {model(pk=pk).get_absolute_url() for pk in pk_set}
+	transaction.on_commit(lambda: triples.refresh(uris))
+
+
+def rebuild_triples_after_bulk_load(sender, **kwargs):
+	transaction.on_commit(triples.rebuild)
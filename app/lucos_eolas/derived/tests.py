@@ -0,0 +1,369 @@
+from datetime import date
+from io import StringIO
+from urllib.parse import urlencode
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from lucos_eolas.metadata.models import Calendar, Festival, FestivalPeriod, Language, LanguageFamily, Month, Place, PlaceType
+from lucos_eolas.metadata.signals import bulk_loaded
+from . import triples
+from .models import FestivalOccurrence, TableBuild, Triple
+from .occurrences import gregorian_days, rebuild
+
+
+@patch('lucos_eolas.metadata.signals.updateLoganne')
+class FestivalOccurrenceTest(TestCase):
+	"""The festival day index, and /metadata/festival/on which reads it."""
+
+	AUTH = {'HTTP_AUTHORIZATION': 'key key'}
+
+	def setUp(self):
+		self.gregorian = Calendar.objects.create(name='Gregorian', temporal_id='gregory')
+		self.months = {
+			order: Month.objects.create(name=name, calendar=self.gregorian, order_in_calendar=order)
+			for order, name in [(1, 'January'), (2, 'February'), (11, 'November'), (12, 'December')]
+		}
+		self.hebrew = Calendar.objects.create(name='Hebrew', temporal_id='hebrew')
+		self.nisan = Month.objects.create(name='Nisan', calendar=self.hebrew, order_in_calendar=1, temporal_month_code='M07')
+		self.christmas = Festival.objects.create(name='Christmas', day_of_month=25, month=self.months[12])
+		self.twelve_days = FestivalPeriod.objects.create(name='Twelve Days of Christmas', festival=self.christmas, start_day=25, start_month=self.months[12], duration_days=12)
+		self.advent = Festival.objects.create(name='Advent', month=self.months[12])
+		self.passover = Festival.objects.create(name='Passover', day_of_month=15, month=self.nisan)
+		rebuild()
+
+	def _days(self, festival, period=None):
+		return sorted((entry.calendar, entry.month_code, entry.day) for entry in FestivalOccurrence.objects.filter(festival=festival, period=period))
+
+	def _on(self, **params):
+		response = self.client.get('/metadata/festival/on', params, **self.AUTH)
+		self.assertEqual(response.status_code, 200)
+		return [(item['festival']['name'], item['period'] and item['period']['name'], item['dates']) for item in response.json()]
+
+	def test_defining_day_indexed(self, _):
+		self.assertEqual(self._days(self.christmas), [('gregory', 'M12', 25)])
+		self.assertEqual(self._days(self.passover), [('hebrew', 'M07', 15)])
+
+	def test_month_without_day_indexes_whole_month(self, _):
+		self.assertEqual(self._days(self.advent), [('gregory', 'M12', None)])
+
+	def test_period_wraps_into_next_year(self, _):
+		days = self._days(self.christmas, self.twelve_days)
+		self.assertEqual(len(days), 12)
+		self.assertEqual(days[0], ('gregory', 'M01', 1))
+		self.assertEqual(days[-1], ('gregory', 'M12', 31))
+
+	def test_festivals_on_date(self, _):
+		self.assertEqual(self._on(date='2026-12-25'), [
+			('Advent', None, ['2026-12-25']),
+			('Christmas', None, ['2026-12-25']),
+			('Christmas', 'Twelve Days of Christmas', ['2026-12-25']),
+		])
+
+	def test_festivals_on_range(self, _):
+		self.assertEqual(self._on(date='2026-12-30', until='2027-01-02'), [
+			('Advent', None, ['2026-12-30', '2026-12-31']),
+			('Christmas', 'Twelve Days of Christmas', ['2026-12-30', '2026-12-31', '2027-01-01', '2027-01-02']),
+		])
+
+	def test_festivals_on_other_calendar(self, _):
+		self.assertEqual(self._on(calendar='hebrew', month_code='M07', day='15'), [
+			('Passover', None, [{'month_code': 'M07', 'day': 15}]),
+		])
+		self.assertEqual(self._on(calendar='hebrew', month_code='M07', day='16'), [])
+
+	def test_single_query(self, _):
+		with self.assertNumQueries(1):
+			self.client.get('/metadata/festival/on', {'date': '2026-01-01', 'until': '2026-12-31'}, **self.AUTH)
+
+	def test_bad_requests(self, _):
+		for params in [{}, {'date': '25/12/2026'}, {'date': '2026-12-25', 'until': '2026-12-24'}, {'date': '2026-01-01', 'until': '2027-06-01'}, {'calendar': 'hebrew', 'month_code': 'M07', 'day': 'x'}]:
+			response = self.client.get('/metadata/festival/on', params, **self.AUTH)
+			self.assertEqual(response.status_code, 400, params)
+			self.assertIn('error', response.json())
+
+	def test_requires_auth(self, _):
+		self.assertEqual(self.client.get('/metadata/festival/on', {'date': '2026-12-25'}).status_code, 401)
+
+	def test_saving_festival_refreshes_index(self, _):
+		with self.captureOnCommitCallbacks(execute=True):
+			self.christmas.day_of_month = 24
+			self.christmas.save()
+		self.assertEqual(self._days(self.christmas), [('gregory', 'M12', 24)])
+
+	def test_deleting_period_refreshes_index(self, _):
+		with self.captureOnCommitCallbacks(execute=True):
+			self.twelve_days.delete()
+		self.assertEqual(FestivalOccurrence.objects.exclude(period=None).count(), 0)
+		self.assertEqual(self._days(self.christmas), [('gregory', 'M12', 25)])
+
+	def test_deleting_festival_with_periods(self, _):
+		with self.captureOnCommitCallbacks(execute=True):
+			self.christmas.delete()
+		self.assertFalse(FestivalOccurrence.objects.filter(festival_id=self.christmas.pk).exists())
+
+	def test_changing_month_code_refreshes_index(self, _):
+		with self.captureOnCommitCallbacks(execute=True):
+			self.nisan.temporal_month_code = 'M08'
+			self.nisan.save()
+		self.assertEqual(self._days(self.passover), [('hebrew', 'M08', 15)])
+
+	def test_bulk_load_refreshes_index(self, _):
+		Festival.objects.filter(pk=self.passover.pk).update(day_of_month=14)
+		with self.captureOnCommitCallbacks(execute=True):
+			bulk_loaded.send(sender=self.__class__, models=[Festival])
+		self.assertEqual(self._days(self.passover), [('hebrew', 'M07', 14)])
+
+	def test_rebuild_command(self, _):
+		FestivalOccurrence.objects.all().delete()
+		out = StringIO()
+		call_command('rebuild_festival_index', stdout=out)
+		self.assertIn('Indexed 15 festival days', out.getvalue())
+
+
+@patch('lucos_eolas.metadata.signals.updateLoganne')
+class TripleTableTest(TestCase):
+	"""The triple table, and the /fragments interface which reads it."""
+
+	AUTH = {'HTTP_AUTHORIZATION': 'key key', 'HTTP_ACCEPT': 'application/n-triples'}
+	CONTAINED_IN = 'http://localhost/ontology/containedIn'
+	LABEL = 'http://www.w3.org/2000/01/rdf-schema#label'
+	PREF_LABEL = 'http://www.w3.org/2004/02/skos/core#prefLabel'
+
+	def setUp(self):
+		region = PlaceType.objects.create(name='region', plural='regions', category='Terrestrial')
+		self.uk = Place.objects.create(name='United Kingdom', type=region)
+		self.wales = Place.objects.create(name='Wales', type=region)
+		self.wales.contained_in.add(self.uk)
+		self.welsh = Language.objects.create(code='cy', name='Welsh', family=LanguageFamily.objects.create(code='cel', name='Celtic languages'))
+		self.welsh.indigenous_to.add(self.wales)
+		triples.rebuild()
+
+	def _fragment(self, **params):
+		import rdflib
+		response = self.client.get('/fragments', params, **self.AUTH)
+		self.assertEqual(response.status_code, 200, response.content)
+		return rdflib.Graph().parse(data=response.content, format='nt')
+
+	def _total(self, g):
+		import rdflib
+		return int(next(g.objects(None, rdflib.URIRef('http://www.w3.org/ns/hydra/core#totalItems'))))
+
+	def _labels(self, subject):
+		return set(triples.match(f'<{subject.get_absolute_url()}>', f'<{self.LABEL}>').values_list('object', flat=True))
+
+	def test_fragment_by_predicate(self, _):
+		import rdflib
+		g = self._fragment(p=self.CONTAINED_IN)
+		self.assertIn((rdflib.URIRef(self.wales.get_absolute_url()), rdflib.URIRef(self.CONTAINED_IN), rdflib.URIRef(self.uk.get_absolute_url())), g)
+		self.assertEqual(self._total(g), 1)
+
+	def test_fragment_by_literal_object(self, _):
+		import rdflib
+		g = self._fragment(p=self.LABEL, o='"Wales"')
+		self.assertEqual(set(g.subjects(rdflib.URIRef(self.LABEL), rdflib.Literal('Wales'))), {rdflib.URIRef(self.wales.get_absolute_url())})
+		self.assertEqual(self._total(g), 1)
+
+	def test_fragment_by_subject_and_object(self, _):
+		g = self._fragment(s=self.welsh.get_absolute_url(), o=f'<{self.wales.get_absolute_url()}>')
+		self.assertEqual(self._total(g), 1)
+
+	def test_paging(self, _):
+		import rdflib
+		hydra = rdflib.Namespace('http://www.w3.org/ns/hydra/core#')
+		with patch('lucos_eolas.derived.views.PAGE_SIZE', 2):
+			first = self._fragment(p=self.LABEL)
+			second = self._fragment(p=self.LABEL, page=2)
+		self.assertEqual(self._total(first), Triple.objects.filter(predicate=f'<{self.LABEL}>').count())
+		self.assertEqual(len(list(first.subject_objects(rdflib.URIRef(self.LABEL)))), 2)
+		self.assertTrue(str(next(first.objects(None, hydra.next))).endswith(f"?{urlencode({'p': self.LABEL, 'page': 2})}"))
+		self.assertIsNotNone(next(second.objects(None, hydra.previous), None))
+
+	def test_unbound_pattern_is_estimated(self, _):
+		g = self._fragment()
+		self.assertGreater(self._total(g), 0)
+
+	def test_single_index_lookups(self, _):
+		# All the matches fit on one page, so need no counting
+		with self.assertNumQueries(1):
+			self.client.get('/fragments', {'p': self.LABEL}, **self.AUTH)
+		with patch('lucos_eolas.derived.views.PAGE_SIZE', 2), self.assertNumQueries(2):
+			self.client.get('/fragments', {'p': self.LABEL}, **self.AUTH)
+
+	def test_bad_requests(self, _):
+		for params in [{'o': '"unterminated'}, {'page': '0'}, {'page': 'two'}]:
+			with self.subTest(params=params):
+				self.assertEqual(self.client.get('/fragments', params, **self.AUTH).status_code, 400)
+
+	def test_requires_auth(self, _):
+		self.assertEqual(self.client.get('/fragments').status_code, 401)
+
+	def test_saving_refreshes_item(self, _):
+		with self.captureOnCommitCallbacks(execute=True):
+			self.wales.name = 'Cymru'
+			self.wales.save()
+		self.assertEqual(self._labels(self.wales), {'"Cymru"'})
+
+	def _pref_labels(self, subject):
+		return set(triples.match(f'<{subject.get_absolute_url()}>', f'<{self.PREF_LABEL}>').values_list('object', flat=True))
+
+	def test_namesakes_relabelled(self, _):
+		with self.captureOnCommitCallbacks(execute=True):
+			other = Place.objects.create(name='Wales', type=PlaceType.objects.create(name='town', plural='towns'))
+		self.assertEqual(self._pref_labels(self.wales), {'"Wales (Region)"'})
+		with self.captureOnCommitCallbacks(execute=True):
+			other.name = 'Wells'
+			other.save()
+		self.assertEqual(self._pref_labels(self.wales), {'"Wales"'})
+		with self.captureOnCommitCallbacks(execute=True):
+			other.alternate_names = ['Wales']
+			other.save()
+		self.assertEqual(self._pref_labels(self.wales), {'"Wales (Region)"'})
+		with self.captureOnCommitCallbacks(execute=True):
+			other.delete()
+		self.assertEqual(self._pref_labels(self.wales), {'"Wales"'})
+
+	def test_renaming_type_relabels_items_named_after_it(self, _):
+		Place.objects.create(name='Wales', type=PlaceType.objects.create(name='town', plural='towns'))
+		triples.rebuild()
+		with self.captureOnCommitCallbacks(execute=True):
+			self.wales.type.name = 'nation'
+			self.wales.type.save()
+		self.assertEqual(self._pref_labels(self.wales), {'"Wales (Nation)"'})
+		self.assertEqual(self._pref_labels(self.uk), {'"United Kingdom"'})
+
+	def test_linking_refreshes_both_ends(self, _):
+		with self.captureOnCommitCallbacks(execute=True):
+			self.welsh.indigenous_to.add(self.uk)
+		self.assertTrue(triples.match(f'<{self.welsh.get_absolute_url()}>', None, f'<{self.uk.get_absolute_url()}>').exists())
+		with self.captureOnCommitCallbacks(execute=True):
+			self.welsh.indigenous_to.clear()
+		self.assertFalse(triples.match(f'<{self.welsh.get_absolute_url()}>', None, f'<{self.wales.get_absolute_url()}>').exists())
+
+	def test_deleting_removes_triples_pointing_at_item(self, _):
+		wales = f'<{self.wales.get_absolute_url()}>'
+		with self.captureOnCommitCallbacks(execute=True):
+			self.wales.delete()
+		self.assertFalse(Triple.objects.filter(graph=self.wales.get_absolute_url()).exists())
+		self.assertFalse(triples.match(object=wales).exists())
+
+	def test_bulk_load_rebuilds(self, _):
+		Place.objects.filter(pk=self.wales.pk).update(name='Cymru')
+		with self.captureOnCommitCallbacks(execute=True):
+			bulk_loaded.send(sender=self.__class__, models=[Place])
+		self.assertEqual(self._labels(self.wales), {'"Cymru"'})
+
+	def test_rebuild_command_once_per_release(self, _):
+		out = StringIO()
+		with patch.dict('os.environ', {'VERSION': '1.2.3'}):
+			call_command('rebuild_triple_table', '--if-outdated', stdout=out)
+			call_command('rebuild_triple_table', '--if-outdated', stdout=out)
+		self.assertIn('Stored', out.getvalue())
+		self.assertIn('Triple table is up to date', out.getvalue())
+
+
+@patch('lucos_eolas.metadata.signals.updateLoganne')
+class TripleReadPathTest(TestCase):
+	"""Once the triple table is built, the RDF read endpoints serve it instead of calling get_rdf()."""
+
+	AUTH = {'HTTP_AUTHORIZATION': 'key key'}
+
+	def setUp(self):
+		region = PlaceType.objects.create(name='region', plural='regions', category='Terrestrial')
+		self.uk = Place.objects.create(name='United Kingdom', type=region)
+		self.wales = Place.objects.create(name='Wales', type=region)
+		self.wales.contained_in.add(self.uk)
+		self.welsh = Language.objects.create(code='cy', name='Welsh', family=LanguageFamily.objects.create(code='cel', name='Celtic languages'))
+		self.welsh.indigenous_to.add(self.wales)
+
+	def _graph(self, path, accept='application/n-triples'):
+		import rdflib
+		response = self.client.get(path, HTTP_ACCEPT=accept, **self.AUTH)
+		self.assertEqual(response.status_code, 200)
+		content = b''.join(response.streaming_content) if response.streaming else response.content
+		return rdflib.Graph().parse(data=content, format='nt' if accept == 'application/n-triples' else 'turtle')
+
+	def test_all_data_matches_get_rdf(self, _):
+		from rdflib.compare import isomorphic
+		from_models = self._graph('/metadata/all/data/', 'text/turtle')
+		triples.rebuild()
+		self.assertTrue(isomorphic(self._graph('/metadata/all/data/', 'text/turtle'), from_models))
+		self.assertTrue(isomorphic(self._graph('/metadata/all/data/'), from_models))
+
+	def test_all_data_ntriples_streamed_in_one_query(self, _):
+		triples.rebuild()
+		with self.assertNumQueries(2):
+			response = self.client.get('/metadata/all/data/', HTTP_ACCEPT='application/n-triples', **self.AUTH)
+			self.assertTrue(response.streaming)
+			b''.join(response.streaming_content)
+
+	@override_settings(EOLAS_ADMISSION={'export': {'concurrency': 1, 'queue': 0, 'wait': 0, 'retry_after': 7}})
+	def test_all_data_ntriples_hold_export_slot_until_streamed(self, _):
+		from lucos_eolas import admission
+		admission._pools.clear()
+		self.addCleanup(admission._pools.clear)
+		triples.rebuild()
+		response = self.client.get('/metadata/all/data/', HTTP_ACCEPT='application/n-triples', **self.AUTH)
+		self.assertEqual(self.client.get('/metadata/all/data/', HTTP_ACCEPT='application/n-triples', **self.AUTH).status_code, 429)
+		# Reading the whole body closes the response, as the WSGI server does
+		b''.join(response.streaming_content)
+		self.assertEqual(self.client.get('/metadata/all/data/', HTTP_ACCEPT='application/n-triples', **self.AUTH).status_code, 200)
+
+	def test_item_data_includes_get_rdf(self, _):
+		import rdflib
+		from lucos_eolas.metadata.rdf import EOLAS_NS
+		has_category = EOLAS_NS.hasCategory.resolve()
+		for item in (self.wales, self.welsh, self.uk.type):
+			with self.subTest(item=item):
+				path = f'/metadata/{item._meta.model_name}/{item.pk}/data/'
+				from_models = self._graph(path)
+				triples.rebuild()
+				from_table = self._graph(path)
+				# What a class's category is comes from the ontology, rather than from the item
+				missing = {(s, p, o) for s, p, o in set(from_models) - set(from_table) if not (p == has_category and s != rdflib.URIRef(item.get_absolute_url()))}
+				self.assertEqual(missing, set())
+				Triple.objects.all().delete()
+				TableBuild.objects.all().delete()
+
+	def test_item_data_in_one_query(self, _):
+		triples.rebuild()
+		with self.assertNumQueries(2):
+			self.client.get(f'/metadata/place/{self.wales.pk}/data/', **self.AUTH)
+
+	def test_unknown_item(self, _):
+		triples.rebuild()
+		for path in ('/metadata/place/999999/data/', '/metadata/place/wales/data/'):
+			with self.subTest(path=path):
+				self.assertEqual(self.client.get(path, **self.AUTH).status_code, 404)
+
+	def test_until_built_by_this_release(self, _):
+		# Built by an earlier release, so possibly not what get_rdf() gives now
+		with patch.dict('os.environ', {'VERSION': '1.0.0'}):
+			triples.rebuild()
+		Triple.objects.all().delete()
+		with patch.dict('os.environ', {'VERSION': '1.0.1'}):
+			self.assertIn('Wales', str(self.client.get(f'/metadata/place/{self.wales.pk}/data/', **self.AUTH).content))
+
+	async def test_async_views(self, _):
+		from asgiref.sync import sync_to_async
+		from django.test import AsyncRequestFactory
+		from rdflib.compare import isomorphic
+		from lucos_eolas.metadata import views_async
+		import rdflib
+		await sync_to_async(triples.rebuild)()
+		factory = AsyncRequestFactory()
+		headers = {'Authorization': 'key key', 'Accept': 'application/n-triples'}
+		response = await views_async.all_rdf(factory.get('/x', headers=headers))
+		content = b''.join([chunk async for chunk in response])
+		response.close()
+		self.assertTrue(isomorphic(rdflib.Graph().parse(data=content, format='nt'), await sync_to_async(triples.to_graph)(await sync_to_async(list)(triples.all_rows()))))
+		response = await views_async.thing_data(factory.get('/x', headers=headers), type='place', pk=str(self.wales.pk))
+		self.assertIn((rdflib.URIRef(self.wales.get_absolute_url()), rdflib.RDFS.label, rdflib.Literal('Wales')), rdflib.Graph().parse(data=response.content, format='nt'))
+
+
+class GregorianDaysTest(TestCase):
+
+	def test_keys_each_day_by_month_code(self):
+		days = gregorian_days(date(2026, 2, 28), date(2026, 3, 1))
+		self.assertEqual(days, {('M02', 28): [date(2026, 2, 28)], ('M03', 1): [date(2026, 3, 1)]})
@@ -0,0 +1,214 @@
+"""
+The triple table: every triple of eolas's RDF, indexed for triple pattern lookups.
+
+Each item's triples are stored against the item's URI (the "graph" column), as
+get_rdf() produces them, so that when an item changes its triples can be
+swapped for new ones without touching anything else.  The ontology's are
+stored against ONTOLOGY_GRAPH.
+
+Three indexes cover every pattern with at least one term bound: subject first
+(SPO), predicate first (POS) and object first (OSP).  So matching any single
+pattern, and counting its matches, is one index scan, however big the table.
+
+Terms are stored exactly as they're written in N-Triples, so the RDF read
+endpoints can serve N-Triples by writing rows out as they're read, and other
+formats by handing the rows to rdflib's N-Triples parser, without calling
+get_rdf() at all.  They fall back to get_rdf() until the table has been built
+by the running release (see is_current()).
+
+Signal receivers refresh items' triples as they're saved, deleted or relinked
+(see signals.py).  What get_rdf() produces also depends on code, so each
+release rebuilds the table from scratch when it first starts (see
+rebuild_triple_table).
+"""
+
+import hashlib
+import os
+
+from django.apps import apps
+from django.db import connection, transaction
+from django.utils import timezone
+
+from ..metadata.importer import resolve_uri
+from .models import TableBuild, Triple
+
+ONTOLOGY_GRAPH = 'urn:eolas:ontology'
+BATCH_SIZE = 1000
+
+
+# Rows fetched at a time when reading the whole table
+CHUNK_SIZE = 2000
+
+RDF_TYPE = '<http://www.w3.org/1999/02/22-rdf-syntax-ns#type>'
+RDFS_SUBCLASS_OF = '<http://www.w3.org/2000/01/rdf-schema#subClassOf>'
+
+
+def nt(term):
+	"""An rdflib term in N-Triples syntax."""
+	import rdflib
+	from rdflib.plugins.serializers.nt import _quoteLiteral
+	return _quoteLiteral(term) if isinstance(term, rdflib.Literal) else term.n3()
+
+
+def digest(term):
+	"""The index key for an object, given in N-Triples syntax."""
+	return hashlib.md5(term.encode('utf-8')).hexdigest()
+
+
+def _rows(graph, g):
+	rows = []
+	for s, p, o in g:
+		object = nt(o)
+		rows.append(Triple(graph=graph, subject=nt(s), predicate=nt(p), object=object, object_digest=digest(object)))
+	return rows
+
+
+def _item_rows(objs):
+	rows = []
+	for obj in objs:
+		# Type labels come from the ontology, as in /metadata/all/data/
+		rows += _rows(obj.get_absolute_url(), obj.get_rdf(include_type_label=False))
+	return rows
+
+
+def rebuild():
+	"""Rebuild the whole table, and record that this release built it."""
+	from ..metadata.views import ontology_graph
+	with transaction.atomic():
+		Triple.objects.all().delete()
+		Triple.objects.bulk_create(_rows(ONTOLOGY_GRAPH, ontology_graph()), batch_size=BATCH_SIZE)
+		for model_class in apps.get_app_config('metadata').get_models():
+			objs = list(model_class.objects.all())
+			model_class.preload(objs)
+			Triple.objects.bulk_create(_item_rows(objs), batch_size=BATCH_SIZE)
+		TableBuild.objects.update_or_create(table=Triple._meta.db_table, defaults={'version': os.environ.get('VERSION', ''), 'built_at': timezone.now()})
+
+
+def is_current():
+	"""Whether the table was last rebuilt by this release, and so is what get_rdf() would give."""
+	return TableBuild.objects.filter(table=Triple._meta.db_table, version=os.environ.get('VERSION', '')).exists()
+
+
+def refresh(uris):
+	"""Rewrite the triples of the items with the given URIs from their current RDF.
+
+	Items which no longer exist are left with none.  A query per type of item,
+	plus what EolasModel.preload() needs.
+	"""
+	pks_by_model = {}
+	for uri in uris:
+		resolved = resolve_uri(uri)
+		if resolved:
+			model_class, pk = resolved
+			pks_by_model.setdefault(model_class, set()).add(pk)
+	rows = []
+	for model_class, pks in pks_by_model.items():
+		objs = list(model_class.objects.filter(pk__in=pks))
+		model_class.preload(objs)
+		rows += _item_rows(objs)
+	with transaction.atomic():
+		Triple.objects.filter(graph__in=list(uris)).delete()
+		Triple.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+
+
+def remove(uri):
+	"""Remove a deleted item's triples, and every triple pointing at it.
+
+	Links to a deleted item vanish from the database without any signal for the
+	items on the other end (cascaded many-to-many rows, SET_NULL foreign keys),
+	so triples elsewhere with it as their object are removed here.
+	"""
+	term = f'<{uri}>'
+	with transaction.atomic():
+		Triple.objects.filter(graph=uri).delete()
+		Triple.objects.filter(object_digest=digest(term), object=term).delete()
+
+
+def referencing(uri):
+	"""The URIs of the items with a triple whose object is the given URI."""
+	term = f'<{uri}>'
+	return set(Triple.objects.filter(object_digest=digest(term), object=term).exclude(graph=ONTOLOGY_GRAPH).values_list('graph', flat=True).distinct())
+
+
+def estimated_count():
+	"""The planner's estimate of the number of triples, without counting them; None if there isn't one yet."""
+	with connection.cursor() as cursor:
+		cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [Triple._meta.db_table])
+		row = cursor.fetchone()
+	return row[0] if row and row[0] >= 0 else None
+
+
+def match(subject=None, predicate=None, object=None):
+	"""The triples matching a pattern, each of whose terms is given in N-Triples
+	syntax, or None for a variable.  Ordered the way the index serving the
+	pattern is, so a page of them is read straight off the index."""
+	matches = Triple.objects.all()
+	if subject is not None:
+		matches = matches.filter(subject=subject)
+	if predicate is not None:
+		matches = matches.filter(predicate=predicate)
+	if object is not None:
+		matches = matches.filter(object_digest=digest(object), object=object)
+	if subject is not None and (predicate is not None or object is None):
+		order = ['subject', 'predicate', 'object_digest']
+	elif predicate is not None:
+		order = ['predicate', 'object_digest', 'subject']
+	elif object is not None:
+		order = ['object_digest', 'subject', 'predicate']
+	else:
+		order = []
+	return matches.order_by(*order, 'pk')
+
+
+def ntriples_text(rows):
+	"""(subject, predicate, object) rows as N-Triples."""
+	return ''.join(f"{s} {p} {o} .\n" for s, p, o in rows)
+
+
+def to_graph(rows):
+	"""An rdflib graph of (subject, predicate, object) rows."""
+	import rdflib
+	return rdflib.Graph().parse(data=ntriples_text(rows), format='nt')
+
+
+# Everything an item is typed as, the classes those are subclasses of, and their
+# categories; then the item's own triples, and those describing all of them
+ITEM_SQL = f"""
+	WITH RECURSIVE described(node) AS (
+		SELECT %(subject)s::text
+		UNION
+		SELECT t.object FROM {Triple._meta.db_table} AS t JOIN described ON t.subject = described.node
+		WHERE t.predicate = ANY(%(type_predicates)s)
+	)
+	SELECT subject, predicate, object FROM {Triple._meta.db_table} WHERE graph = %(graph)s
+	UNION
+	SELECT t.subject, t.predicate, t.object FROM {Triple._meta.db_table} AS t JOIN described ON t.subject = described.node
+"""
+
+
+def item_rows(uri):
+	"""The triples get_rdf(include_type_label=True) would give for an item, in one
+	query: its own, and those labelling what it's typed as (with some more about
+	those types, from the ontology)."""
+	from ..metadata.rdf import EOLAS_NS
+	type_predicates = [RDF_TYPE, RDFS_SUBCLASS_OF, f'<{EOLAS_NS.hasCategory.resolve()}>']
+	with connection.cursor() as cursor:
+		cursor.execute(ITEM_SQL, {'subject': f'<{uri}>', 'graph': uri, 'type_predicates': type_predicates})
+		return cursor.fetchall()
+
+
+def all_rows():
+	"""Every triple, as (subject, predicate, object), in the order they were written: item by item."""
+	return Triple.objects.order_by('pk').values_list('subject', 'predicate', 'object')
+
+
+def ntriples():
+	"""Yield the whole table as N-Triples, a chunk of rows at a time."""
+	chunk = []
+	for row in all_rows().iterator(chunk_size=CHUNK_SIZE):
+		chunk.append(row)
+		if len(chunk) >= CHUNK_SIZE:
+			yield ntriples_text(chunk)
+			chunk = []
+	if chunk:
+		yield ntriples_text(chunk)
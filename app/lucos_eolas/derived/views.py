@@ -0,0 +1,186 @@
+import re
+from collections import defaultdict
+from datetime import date as Date, timedelta
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+
+from ..lucosauth.decorators import api_auth
+from ..metadata.models import BASE_URL
+from ..metadata.utils_conneg import pick_best_rdf_format
+from ..querybudget import query_budget
+from . import occurrences, triples
+
+# Triples per page of a fragment
+PAGE_SIZE = 100
+
+# A literal in Hydra's explicit representation: "text", "text"@lang or "text"^^datatype
+LITERAL = re.compile(r'^"(.*)"(?:@([a-zA-Z0-9-]+)|\^\^<?([^<>]+)>?)?$', re.DOTALL)
+
+
+def _item(obj):
+	return {'id': obj.pk, 'uri': obj.get_absolute_url(), 'name': obj.name}
+
+
+@api_auth(required_scope='eolas:read')
+@query_budget(1)
+def festivals_on(request):
+	"""GET /metadata/festival/on — the festivals (and festival periods) which fall on a day, or range of days.
+
+	Either:
+	  ?date=YYYY-MM-DD[&until=YYYY-MM-DD]  a Gregorian date, or an inclusive range of up to a year
+	  ?calendar=<Temporal ID>&month_code=<monthCode>[&day=<day>]  a day (or whole month) of any calendar
+	Response: a JSON array, ordered by festival name, of
+	{"festival": {...}, "period": {...} or null, "dates": [...]} — one entry for each
+	festival and period which is on, with the days asked about that it falls on.
+	Dates are given as YYYY-MM-DD for Gregorian queries, and as {"month_code", "day"} otherwise.
+
+	Answered from the FestivalOccurrence index in a single query; see occurrences.py.
+	"""
+	if 'date' in request.GET:
+		try:
+			start = Date.fromisoformat(request.GET['date'])
+			end = Date.fromisoformat(request.GET['until']) if 'until' in request.GET else start
+		except ValueError:
+			return JsonResponse({'error': 'dates must be YYYY-MM-DD'}, status=400)
+		if end < start:
+			return JsonResponse({'error': 'until is before date'}, status=400)
+		if end - start >= timedelta(days=occurrences.MAX_RANGE):
+			return JsonResponse({'error': f'range is longer than {occurrences.MAX_RANGE} days'}, status=400)
+		calendar = occurrences.GREGORIAN
+		days = occurrences.gregorian_days(start, end)
+		dates_of = lambda entry: days[(entry.month_code, entry.day)] if entry.day else [date for (code, _), dates in days.items() if code == entry.month_code for date in dates]
+		format_date = Date.isoformat
+	elif 'calendar' in request.GET and 'month_code' in request.GET:
+		calendar = request.GET['calendar']
+		month_code = request.GET['month_code']
+		if 'day' in request.GET:
+			try:
+				day_numbers = [int(request.GET['day'])]
+			except ValueError:
+				return JsonResponse({'error': 'day must be a number'}, status=400)
+		else:
+			day_numbers = range(1, occurrences.month_length(calendar, month_code) + 1)
+		days = {(month_code, day): [(month_code, day)] for day in day_numbers}
+		dates_of = lambda entry: [(entry.month_code, entry.day)] if entry.day else list(days)
+		format_date = lambda key: {'month_code': key[0], 'day': key[1]}
+	else:
+		return JsonResponse({'error': 'give either date, or calendar and month_code'}, status=400)
+
+	on = defaultdict(set)
+	found = {}
+	for entry in occurrences.find(calendar, days.keys()):
+		key = (entry.festival_id, entry.period_id)
+		found[key] = entry
+		on[key].update(dates_of(entry))
+	results = [
+		{
+			'festival': _item(entry.festival),
+			'period': _item(entry.period) if entry.period else None,
+			'dates': [format_date(date) for date in sorted(on[key])],
+		}
+		for key, entry in found.items()
+	]
+	results.sort(key=lambda result: (result['festival']['name'], result['period'] is not None, result['period'] and result['period']['name']))
+	return JsonResponse(results, safe=False)
+
+
+def _pattern_term(value):
+	"""Return a term of a triple pattern, given in Hydra's explicit representation
+	(IRIs as they are, literals quoted), in N-Triples syntax; or None for a variable.
+	Raises ValueError for malformed literals."""
+	import rdflib
+	if not value or value.startswith('?'):
+		return None
+	literal = LITERAL.match(value)
+	if literal:
+		text, lang, datatype = literal.groups()
+		return triples.nt(rdflib.Literal(text, lang=lang, datatype=rdflib.URIRef(datatype) if datatype else None))
+	if value.startswith('"'):
+		raise ValueError(f"Malformed literal {value}")
+	if value.startswith('<') and value.endswith('>'):
+		value = value[1:-1]
+	return triples.nt(rdflib.URIRef(value))
+
+
+def _fragment_url(params, page=1):
+	query = {name: value for name, value in params.items() if value}
+	if page > 1:
+		query['page'] = page
+	return f"{BASE_URL}/fragments" + (f"?{urlencode(query)}" if query else '')
+
+
+def _hydra_controls(g, params, page, total, has_next):
+	"""Add the Triple Pattern Fragments metadata and controls for a page of a fragment to g."""
+	import rdflib
+	from rdflib.namespace import RDF, VOID, XSD
+	hydra = rdflib.Namespace('http://www.w3.org/ns/hydra/core#')
+	g.bind('hydra', hydra)
+	g.bind('void', VOID)
+	dataset = rdflib.URIRef(f"{BASE_URL}/fragments#dataset")
+	fragment = rdflib.URIRef(_fragment_url(params, page))
+	g.add((dataset, RDF.type, VOID.Dataset))
+	g.add((dataset, RDF.type, hydra.Collection))
+	g.add((dataset, VOID.subset, fragment))
+	search = rdflib.BNode()
+	g.add((dataset, hydra.search, search))
+	g.add((search, hydra.template, rdflib.Literal(f"{BASE_URL}/fragments{{?s,p,o}}")))
+	g.add((search, hydra.variableRepresentation, hydra.ExplicitRepresentation))
+	for variable, property in (('s', RDF.subject), ('p', RDF.predicate), ('o', RDF.object)):
+		mapping = rdflib.BNode()
+		g.add((search, hydra.mapping, mapping))
+		g.add((mapping, hydra.variable, rdflib.Literal(variable)))
+		g.add((mapping, hydra.property, property))
+	g.add((fragment, RDF.type, hydra.PartialCollectionView))
+	g.add((fragment, VOID.triples, rdflib.Literal(total, datatype=XSD.integer)))
+	g.add((fragment, hydra.totalItems, rdflib.Literal(total, datatype=XSD.integer)))
+	g.add((fragment, hydra.itemsPerPage, rdflib.Literal(PAGE_SIZE, datatype=XSD.integer)))
+	g.add((fragment, hydra.first, rdflib.URIRef(_fragment_url(params))))
+	if page > 1:
+		g.add((fragment, hydra.previous, rdflib.URIRef(_fragment_url(params, page - 1))))
+	if has_next:
+		g.add((fragment, hydra.next, rdflib.URIRef(_fragment_url(params, page + 1))))
+
+
+# A page of matches and a count of them, each read from one index; see triples.py
+@api_auth(required_scope='eolas:read')
+@query_budget(2)
+def fragments(request):
+	"""GET /fragments — a Triple Pattern Fragments interface to everything in eolas.
+
+	?s=&p=&o= give the pattern's subject, predicate and object, in Hydra's
+	explicit representation: IRIs as they are, literals quoted, as in
+	"Wales"@en or "true"^^http://www.w3.org/2001/XMLSchema#boolean.  Any left
+	out (or given as ?name) are variables.  ?page= picks a page of PAGE_SIZE
+	matches.  The response is the page's triples plus Hydra metadata: the
+	number of matches (estimated, for the pattern matching everything), links
+	to neighbouring pages, and the search form for other patterns.
+	"""
+	from ..metadata.views import bind_namespaces
+	params = {name: request.GET.get(name, '') for name in ('s', 'p', 'o')}
+	try:
+		pattern = [_pattern_term(params[name]) for name in ('s', 'p', 'o')]
+		page = int(request.GET.get('page', 1))
+		if page < 1:
+			raise ValueError("page must be at least 1")
+	except ValueError as error:
+		return HttpResponse(str(error), status=400, content_type='text/plain; charset=utf-8')
+	matches = triples.match(*pattern)
+	offset = (page - 1) * PAGE_SIZE
+	# One more than a page, to tell whether there's another
+	rows = list(matches[offset:offset + PAGE_SIZE + 1])
+	has_next = len(rows) > PAGE_SIZE
+	rows = rows[:PAGE_SIZE]
+	if not has_next and (rows or page == 1):
+		total = offset + len(rows)
+	elif pattern == [None, None, None]:
+		total = max(triples.estimated_count() or 0, offset + len(rows) + has_next)
+	else:
+		total = matches.count()
+
+	format, content_type = pick_best_rdf_format(request)
+	g = triples.to_graph((row.subject, row.predicate, row.object) for row in rows)
+	bind_namespaces(g)
+	_hydra_controls(g, params, page, total, has_next)
+	return HttpResponse(g.serialize(format=format), content_type=f'{content_type}; charset={settings.DEFAULT_CHARSET}')
@@ -1,6 +1,8 @@
 from functools import wraps
 import logging
 
+from asgiref.sync import iscoroutinefunction
+
 from django.http import HttpResponse
 from django.utils.html import escape
 from django.views.decorators.csrf import csrf_exempt
@@ -11,6 +13,40 @@ from .aithne import aithne_login_redirect
 logger = logging.getLogger(__name__)
 
 
+def machine_route(view):
+	"""Mark a view as machine-to-machine, so browser-only middleware skips it.
+
+	See lucos_eolas.middleware.  Views marked this way get no session, no
+	request.user from cookies/JWTs, no flash messages and no UI language
+	negotiation.  @api_auth applies this automatically.
+	"""
+	view.machine_route = True
+	return view
+
+
+def _check_api_key(request, required_scope):
+	"""Authenticate request by API key.
+
+	Returns None (having set request.user) if the request may proceed, or the
+	error response to send otherwise.
+	"""
+	if 'HTTP_AUTHORIZATION' not in request.META:
+		return HttpResponse(status=401)
+	try:
+		authmeth, auth = request.META['HTTP_AUTHORIZATION'].split(' ', 1)
+	except ValueError:
+		return HttpResponse(status=400)
+	if authmeth.lower() in ('key', 'bearer'):
+		user = getUserByKey(apikey=auth)
+		if user:
+			request.user = user
+			if required_scope and not user.has_scope(required_scope):
+				return HttpResponse(status=403)
+		else:
+			return HttpResponse(status=403)
+	return None
+
+
 def api_auth(func=None, *, required_scope=None):
 	"""Decorator that enforces Bearer/key authentication on a view.
 
@@ -21,27 +57,24 @@ def api_auth(func=None, *, required_scope=None):
 	When required_scope is set, an authenticated key that lacks that scope
 	receives a 403.  A key with no scopes is always fail-closed for scoped
 	endpoints.
+
+	Works on both sync and async views.  Key lookup is an in-memory dict read,
+	so the async variant never needs to leave the event loop.
 	"""
 	def decorator(f):
-		@csrf_exempt
-		@wraps(f)
-		def _decorator(request, *args, **kwargs):
-			if 'HTTP_AUTHORIZATION' not in request.META:
-				return HttpResponse(status=401)
-			try:
-				authmeth, auth = request.META['HTTP_AUTHORIZATION'].split(' ', 1)
-			except ValueError:
-				return HttpResponse(status=400)
-			if authmeth.lower() in ('key', 'bearer'):
-				user = getUserByKey(apikey=auth)
-				if user:
-					request.user = user
-					if required_scope and not user.has_scope(required_scope):
-						return HttpResponse(status=403)
-				else:
-					return HttpResponse(status=403)
-			return f(request, *args, **kwargs)
-		return _decorator
+		if iscoroutinefunction(f):
+			async def _decorator(request, *args, **kwargs):
+				denied = _check_api_key(request, required_scope)
+				if denied:
+					return denied
+				return await f(request, *args, **kwargs)
+		else:
+			def _decorator(request, *args, **kwargs):
+				denied = _check_api_key(request, required_scope)
+				if denied:
+					return denied
+				return f(request, *args, **kwargs)
+		return machine_route(csrf_exempt(wraps(f)(_decorator)))
 	# Support both @api_auth and @api_auth(required_scope='...')
 	if func is not None:
 		return decorator(func)
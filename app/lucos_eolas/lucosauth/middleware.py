@@ -49,6 +49,11 @@ class AithneAuthMiddleware:
         self.get_response = get_response
 
     def __call__(self, request):
+        self.populate(request)
+        return self.get_response(request)
+
+    def populate(self, request):
+        """Set request.aithne_scopes (and request.user, if a JWT is present)."""
         request.aithne_scopes = []
 
         token, source = self._extract_token(request)
@@ -73,8 +78,6 @@ class AithneAuthMiddleware:
             logger.debug("No aithne token on %s — proceeding as anonymous", request.path)
         # No JWT: leave request.user as set by AuthenticationMiddleware (session auth).
 
-        return self.get_response(request)
-
     @staticmethod
     def _extract_token(request):
         """Return (token, source) where source names where the token came from.
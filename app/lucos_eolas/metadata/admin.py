@@ -1,6 +1,9 @@
+import hashlib
 import logging
 
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList, ORDER_VAR, PAGE_VAR
+from .caching import versioned_cache
 from .models import *
 from .signals import metadata_post_delete
 from .utils_case import smart_lower, smart_title
@@ -143,11 +146,49 @@ def merge_entities(modeladmin, request, queryset):
 merge_entities.short_description = _('Merge selected entities')
 
 
+class EolasChangeList(ChangeList):
+	"""Changelist which renders in a fixed number of queries, however many rows it shows.
+
+	Row labels come from str(), which for some models depends on whether the
+	name is shared with another item (see EolasModel.has_name_clash).  That's
+	worked out in the same query as the rows themselves; models whose label
+	also includes a related item select it with list_select_related.
+
+	Facet counts are cached until the model next changes.
+	"""
+
+	def get_results(self, request):
+		self.queryset = self.model.annotate_name_clashes(self.queryset)
+		super().get_results(request)
+
+	def get_filters(self, request):
+		filter_specs, *rest = super().get_filters(request)
+		# Related filters list the items of another model, and look up a count for
+		# each of them, so the counts must change when those items do
+		models = [self.model, *{spec.field.related_model for spec in filter_specs if getattr(getattr(spec, 'field', None), 'related_model', None)}]
+		for spec in filter_specs:
+			if hasattr(spec, 'get_facet_queryset'):
+				spec.get_facet_queryset = self._cached_facets(spec, models)
+		return (filter_specs, *rest)
+
+	def _cached_facets(self, spec, models):
+		get_facet_queryset = spec.get_facet_queryset
+		# Counts depend on every other filter and the search term, but not on paging or ordering
+		params = sorted((key, value) for key, value in self.params.items() if key not in (ORDER_VAR, PAGE_VAR))
+		# Hashed, as parameters and search terms can hold anything, and cache keys can't
+		digest = hashlib.sha256(repr((spec.expected_parameters(), params)).encode('utf-8')).hexdigest()
+		name = f"admin-facets:{self.model._meta.label_lower}:{type(spec).__name__}:{digest}"
+		return lambda changelist: versioned_cache(name, models, lambda: get_facet_queryset(changelist))
+
+
 class EolasModelAdmin(admin.ModelAdmin):
 	actions = ['merge_entities']
 	merge_entities = staticmethod(merge_entities)
 	search_fields = ['name']
 
+	def get_changelist(self, request, **kwargs):
+		return EolasChangeList
+
 	def get_urls(self):
 		custom_urls = [
 			path(
@@ -324,6 +365,7 @@ class PlaceAdmin(EolasModelAdmin):
 	search_fields = ['name','alternate_names']
 	autocomplete_fields =  ['contained_in', 'partially_contained_in', 'territory_of', 'bounds']
 	list_filter = ['type','fictional']
+	list_select_related = ['type']
 	show_facets = admin.ShowFacets.ALWAYS
 
 	def contained_places(self, obj):
@@ -386,6 +428,7 @@ eolasadmin.register(PlaceType, PlaceTypeAdmin)
 
 class MonthAdmin(EolasModelAdmin):
 	list_filter = ['calendar']
+	list_select_related = ['calendar']
 	show_facets = admin.ShowFacets.ALWAYS
 eolasadmin.register(Month, MonthAdmin)
 
@@ -432,6 +475,7 @@ eolasadmin.register(TransportMode, TransportModeAdmin)
 class VehicleAdmin(EolasModelAdmin):
 	search_fields = ['name', 'alternate_names']
 	list_filter = ['type', 'fictional']
+	list_select_related = ['type']
 	show_facets = admin.ShowFacets.ALWAYS
 eolasadmin.register(Vehicle, VehicleAdmin)
 
@@ -14,25 +14,49 @@ class MetadataConfig(AppConfig):
     verbose_name = _('Metadata')
 
     def ready(self):
-        from django.db.models.signals import post_save, post_delete
-        from .signals import metadata_post_save, metadata_post_delete
+        from django.db.models.signals import post_save, post_delete, m2m_changed
+        from .caching import bump_model_version, bump_m2m_versions
+        from .signals import metadata_post_save, metadata_post_delete, touch_after_m2m_change
 
         for model in self.get_models():
             post_save.connect(metadata_post_save, sender=model, weak=False)
             post_delete.connect(metadata_post_delete, sender=model, weak=False)
-
-        self._start_check_refresh_thread()
-
-    def _start_check_refresh_thread(self):
-        """Start a daemon thread that recomputes info checks every 5 minutes."""
+            post_save.connect(bump_model_version, sender=model, weak=False)
+            post_delete.connect(bump_model_version, sender=model, weak=False)
+            for field in model._meta.local_many_to_many:
+                m2m_changed.connect(touch_after_m2m_change, sender=field.remote_field.through, weak=False)
+                m2m_changed.connect(bump_m2m_versions, sender=field.remote_field.through, weak=False)
+
+    def start_check_refresh_thread(self):
+        """Start a daemon thread that recomputes info checks every 5 minutes.
+
+        Called by gunicorn.conf.py in each worker process, rather than from
+        ready(), so that it neither runs in a preloading master (threads don't
+        survive fork()) nor in management commands and test runs.
+        """
         def _loop():
+            from django.db import connections
             from .checks import refresh_check_cache
             while True:
                 try:
                     refresh_check_cache()
                 except Exception:
                     logger.exception("Background check refresh failed")
+                finally:
+                    # Hand the connection back (to the pool, if there is one)
+                    # rather than holding it while idle
+                    connections.close_all()
                 time.sleep(300)  # 5 minutes
 
         thread = threading.Thread(target=_loop, daemon=True, name='eolas-check-refresh')
-        thread.start()
\ No newline at end of file
+        thread.start()
+
+    def start_sparql_graph_build(self):
+        """Build this worker's SPARQL graph (see sparql.py) in the background, so
+        that the first query doesn't have to wait for it.
+
+        Called by gunicorn.conf.py in each worker process: the graph is built
+        from the database, so is never built in a preloading master.
+        """
+        from .sparql import live_graph
+        live_graph.refresh_in_background()
@@ -0,0 +1,66 @@
+"""
+Caching of values derived from the metadata tables, invalidated when they change.
+
+Each model has a version, replaced whenever one of its items is saved or
+deleted, or has its many-to-many relations changed (see bump_model_version,
+connected in apps.py).  versioned_cache() keys a value on the versions of the
+models it was derived from, so the first read after any of them changes misses
+and recomputes it.
+
+Versions are random tokens rather than counters, so losing one to eviction
+can't bring an old entry back to life.  Like everything else in the default
+cache, they're local to a process: a change made through one gunicorn worker
+invalidates that worker's entries straight away, and other workers' entries
+when they expire.  Hence the short timeouts.
+"""
+
+import uuid
+
+from django.core.cache import cache
+
+DEFAULT_TIMEOUT = 60
+
+_MISSING = object()
+
+
+def _version_key(model_class):
+	return f'model-version:{model_class._meta.label_lower}'
+
+
+def bump_version(model_class):
+	cache.set(_version_key(model_class), uuid.uuid4().hex, timeout=None)
+
+
+def model_versions(model_classes):
+	"""Return the current version of each model, in the same order."""
+	keys = [_version_key(model_class) for model_class in model_classes]
+	versions = cache.get_many(keys)
+	for key in keys:
+		if key not in versions:
+			versions[key] = uuid.uuid4().hex
+			# Another thread may have got there first, in which case use theirs
+			if not cache.add(key, versions[key], timeout=None):
+				versions[key] = cache.get(key, versions[key])
+	return [versions[key] for key in keys]
+
+
+def versioned_cache(name, model_classes, compute, timeout=DEFAULT_TIMEOUT):
+	"""Return compute(), cached under name until any of model_classes changes."""
+	key = f"{name}:{':'.join(model_versions(model_classes))}"
+	value = cache.get(key, _MISSING)
+	if value is _MISSING:
+		value = compute()
+		cache.set(key, value, timeout)
+	return value
+
+
+def bump_model_version(sender, **kwargs):
+	"""Signal receiver for post_save and post_delete."""
+	bump_version(sender)
+
+
+def bump_m2m_versions(sender, instance, action, model, **kwargs):
+	"""Signal receiver for m2m_changed: both ends of the relation have changed."""
+	if action.startswith('post_'):
+		bump_version(type(instance))
+		bump_version(model)
@@ -0,0 +1,127 @@
+"""
+Precompressed dumps of everything (/metadata/all/data/), served by nginx.
+
+When EOLAS_DUMP_DIR is set, each RDF format of the dump is written there once
+per version of the data, along with gzip and brotli copies of it, and
+/metadata/all/data/ answers with an X-Accel-Redirect to the file rather than
+with the dump itself.  The app still authenticates the request and negotiates
+the format and encoding, but nginx sends the bytes: with sendfile, Range and
+an ETag of its own, and without holding a gunicorn thread while a slow client
+downloads several megabytes (see web/routing.conf).
+
+A version of the data is identified by the release and by the state of the
+triple table (see derived/triples.py): its rows are rewritten, with new ids,
+whenever an item changes, so the highest id and the number of rows between
+them change with any write.  Dumps are only made once the running release has
+built the table.  Each file is written under a temporary name and renamed
+into place, uncompressed copy last, so nginx never sees a partial file.
+Versions other than the current one are deleted once they're KEEP_FOR seconds
+old, leaving time for requests already redirected to them.
+"""
+
+import gzip
+import os
+import shutil
+import time
+import uuid
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.http import HttpResponse
+
+from ..derived import triples
+from ..derived.models import Triple
+
+try:
+	import brotli
+except ImportError:
+	# Dumps are still served, with gzip as the only compression
+	brotli = None
+
+# File extensions for each rdflib format
+EXTENSIONS = {'turtle': 'ttl', 'json-ld': 'jsonld', 'xml': 'rdf', 'nt': 'nt'}
+# Where nginx serves EOLAS_DUMP_DIR from, to internal redirects only
+ACCEL_PREFIX = '/_dumps/'
+# Seconds an old version of the dump is kept after it was written
+KEEP_FOR = 10 * 60
+
+
+def enabled():
+	return bool(settings.EOLAS_DUMP_DIR) and triples.is_current()
+
+
+def data_version():
+	"""A key which changes whenever anything in the triple table does."""
+	stats = Triple.objects.aggregate(last=Max('pk'), count=Count('pk'))
+	return f"{os.environ.get('VERSION') or 'dev'}-{stats['last'] or 0}-{stats['count']}"
+
+
+def accepts_brotli(request):
+	return brotli is not None and any(coding == 'br' and q > 0 for coding, q in _accept_encoding(request))
+
+
+def _accept_encoding(request):
+	codings = []
+	for part in request.headers.get('Accept-Encoding', '').split(','):
+		coding, _, params = part.partition(';')
+		q = 1.0
+		if params.strip().startswith('q='):
+			try:
+				q = float(params.strip()[2:])
+			except ValueError:
+				pass
+		codings.append((coding.strip(), q))
+	return codings
+
+
+def _write(path, data):
+	temporary = f'{path}.{uuid.uuid4().hex}.tmp'
+	with open(temporary, 'wb') as file:
+		file.write(data)
+	os.replace(temporary, path)
+
+
+def _body(format):
+	if format == 'nt':
+		# Already N-Triples in the table, so no graph is needed
+		return ''.join(triples.ntriples()).encode('utf-8')
+	from .views import all_graph
+	return all_graph().serialize(format=format, encoding='utf-8')
+
+
+def ensure(version, format):
+	"""Write the dump of the given version in the given format, and its
+	compressed copies, unless it's already there.  Returns its name relative
+	to EOLAS_DUMP_DIR."""
+	name = f'{version}/all.{EXTENSIONS[format]}'
+	path = os.path.join(settings.EOLAS_DUMP_DIR, name)
+	if not os.path.exists(path):
+		os.makedirs(os.path.dirname(path), exist_ok=True)
+		body = _body(format)
+		_write(f'{path}.gz', gzip.compress(body, compresslevel=9))
+		if brotli is not None:
+			_write(f'{path}.br', brotli.compress(body))
+		_write(path, body)
+		prune(version)
+	return name
+
+
+def prune(current):
+	"""Delete versions other than current which are more than KEEP_FOR seconds old."""
+	cutoff = time.time() - KEEP_FOR
+	for entry in os.scandir(settings.EOLAS_DUMP_DIR):
+		if entry.name != current and entry.is_dir() and entry.stat().st_mtime < cutoff:
+			shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def accel_redirect(request, format, content_type):
+	"""Return a response handing the current dump in the given format over to nginx,
+	having written it first if need be."""
+	name = ensure(data_version(), format)
+	# nginx uses the .gz copy itself, for clients which accept gzip (gzip_static)
+	if accepts_brotli(request):
+		name += '.br'
+	response = HttpResponse(content_type=content_type)
+	response['X-Accel-Redirect'] = ACCEL_PREFIX + name
+	response['Vary'] = 'Accept, Accept-Encoding'
+	return response
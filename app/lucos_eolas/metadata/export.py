@@ -0,0 +1,91 @@
+"""
+Flat exports of a type's items, one row each, produced by Postgres itself.
+
+The rows are read with `COPY (SELECT ...) TO STDOUT`, which has Postgres
+format the CSV and hand it over in blocks, so there's no model instance,
+to_json() or RDF in the loop: an export runs at close to the speed the
+table can be read.
+
+Columns are the model's fields, in declaration order, after a leading `uri`:
+
+  * foreign keys hold the URI of the related item (see
+    EolasModel.uri_expression)
+  * many-to-many relations and array fields hold their values in order,
+    joined with LIST_SEPARATOR
+  * everything else is as Postgres writes it in CSV (so booleans are t/f)
+"""
+
+import codecs
+
+from django.contrib.postgres.fields import ArrayField
+from django.db import connection
+from django.db.models import F, Func, OuterRef, StringAgg, Subquery, TextField, Value
+
+LIST_SEPARATOR = '|'
+
+# format → (delimiter, content type)
+EXPORT_FORMATS = {
+	'csv': (',', 'text/csv'),
+	'tsv': ('\t', 'text/tab-separated-values'),
+}
+
+
+def export_columns(model_class):
+	"""Return (column name, expression) for each column in the export of model_class."""
+	columns = [('uri', model_class.uri_expression())]
+	for field in model_class._meta.concrete_fields:
+		if field.many_to_one:
+			expression = field.related_model.uri_expression(field.attname)
+		elif isinstance(field, ArrayField):
+			expression = Func(F(field.attname), Value(LIST_SEPARATOR), function='array_to_string', output_field=TextField())
+		else:
+			expression = F(field.attname)
+		columns.append((field.name, expression))
+	for field in model_class._meta.many_to_many:
+		columns.append((field.name, _related_uris(field)))
+	return columns
+
+
+def _related_uris(field):
+	"""A subquery for the URIs of the items an item is related to through field."""
+	through = field.remote_field.through
+	source = field.m2m_field_name()
+	target = through._meta.get_field(field.m2m_reverse_field_name())
+	uris = target.related_model.uri_expression(target.attname)
+	return Subquery(
+		through.objects.filter(**{source: OuterRef('pk')})
+			.values(source)
+			.annotate(uris=StringAgg(uris, Value(LIST_SEPARATOR), order_by=target.attname))
+			.values('uris'),
+		output_field=TextField(),
+	)
+
+
+def copy_sql(model_class, delimiter=','):
+	"""Return the COPY statement exporting model_class, with its parameters inlined
+	(COPY can't take bound parameters)."""
+	columns = export_columns(model_class)
+	queryset = model_class.objects.order_by('pk').values(**{f'column_{index}': expression for index, (_, expression) in enumerate(columns)})
+	sql, params = queryset.query.sql_with_params()
+	quote_name = connection.ops.quote_name
+	select = ', '.join(f'{quote_name(f"column_{index}")} AS {quote_name(name)}' for index, (name, _) in enumerate(columns))
+	return connection.ops.compose_sql(
+		f'COPY (SELECT {select} FROM ({sql}) AS export) TO STDOUT WITH (FORMAT csv, HEADER, DELIMITER %s)',
+		[*params, delimiter],
+	)
+
+
+def copy_rows(model_class, delimiter=','):
+	"""Yield the export of model_class as bytes of UTF-8 CSV, in the blocks Postgres sends them."""
+	with connection.cursor() as cursor:
+		with cursor.copy(copy_sql(model_class, delimiter)) as copy:
+			for block in copy:
+				yield bytes(block)
+
+
+def copy_text(model_class, delimiter=','):
+	"""As copy_rows(), but decoded; a block can end part way through a character."""
+	decoder = codecs.getincrementaldecoder('utf-8')()
+	for block in copy_rows(model_class, delimiter):
+		yield decoder.decode(block)
+	yield decoder.decode(b'', final=True)
@@ -3,21 +3,44 @@ from django.contrib.postgres.fields import ArrayField
 from django import forms
 import re
 import logging
-import rdflib
 from django.utils.translation import gettext_lazy as _
+from .rdf import OWL, TIME, XSD, resolve
 
 logger = logging.getLogger(__name__)
 
 # Characters that are not valid in a URI and would cause RDF serialisation to fail
 INVALID_URI_RE = re.compile(r'[\s<>"{}|\\^`\[\]]')
 
-class RDFCharField(models.CharField):
-	rdf_type = rdflib.OWL.DatatypeProperty
+class LazyRDFPredicates:
+	"""Lets rdf_predicate and rdf_inverse_predicate be declared as LazyTerms (see
+	rdf.py), while always reading back as rdflib terms."""
+	_rdf_predicate = None
+	_rdf_inverse_predicate = None
+
+	@property
+	def rdf_predicate(self):
+		return resolve(self._rdf_predicate)
+
+	@rdf_predicate.setter
+	def rdf_predicate(self, value):
+		self._rdf_predicate = value
+
+	@property
+	def rdf_inverse_predicate(self):
+		return resolve(self._rdf_inverse_predicate)
+
+	@rdf_inverse_predicate.setter
+	def rdf_inverse_predicate(self, value):
+		self._rdf_inverse_predicate = value
+
+class RDFCharField(LazyRDFPredicates, models.CharField):
+	rdf_type = OWL.DatatypeProperty
 	def __init__(self, *args, rdf_predicate=None, rdf_label=None, **kwargs):
 		super().__init__(*args, **kwargs)
 		self.rdf_predicate = rdf_predicate
 		self.rdf_label = rdf_label
 	def get_rdf(self, obj):
+		import rdflib
 		g = rdflib.Graph()
 		value = getattr(obj, self.name)
 		if value and self.rdf_predicate:
@@ -29,7 +52,7 @@ class RDFCharField(models.CharField):
 		return g
 
 class RDFNameField(models.CharField):
-	rdf_type = rdflib.OWL.DatatypeProperty
+	rdf_type = OWL.DatatypeProperty
 	def __init__(self, unique=True, **kwargs):
 		self._unique_override = unique
 		super().__init__(
@@ -52,6 +75,7 @@ class RDFNameField(models.CharField):
 		return name, path, args, kwargs
 
 	def get_rdf(self, obj, value=None):
+		import rdflib
 		g = rdflib.Graph()
 		uri = rdflib.URIRef(obj.get_absolute_url())
 		if value is None:
@@ -60,13 +84,14 @@ class RDFNameField(models.CharField):
 		g.add((uri, rdflib.RDFS.label, rdflib.Literal(value)))
 		return g
 
-class RDFTextField(models.TextField):
-	rdf_type = rdflib.OWL.DatatypeProperty
+class RDFTextField(LazyRDFPredicates, models.TextField):
+	rdf_type = OWL.DatatypeProperty
 	def __init__(self, *args, rdf_predicate=None, rdf_label=None, **kwargs):
 		super().__init__(*args, **kwargs)
 		self.rdf_predicate = rdf_predicate
 		self.rdf_label = rdf_label
 	def get_rdf(self, obj):
+		import rdflib
 		g = rdflib.Graph()
 		value = getattr(obj, self.name)
 		if value and self.rdf_predicate:
@@ -77,14 +102,15 @@ class RDFTextField(models.TextField):
 			))
 		return g
 
-class RDFYearField(models.IntegerField):
-	rdf_type = rdflib.OWL.DatatypeProperty
-	rdf_range = rdflib.TIME.DateTimeDescription
+class RDFYearField(LazyRDFPredicates, models.IntegerField):
+	rdf_type = OWL.DatatypeProperty
+	rdf_range = TIME.DateTimeDescription
 	def __init__(self, *args, rdf_predicate=None, rdf_label=None, **kwargs):
 		super().__init__(*args, **kwargs)
 		self.rdf_predicate = rdf_predicate
 		self.rdf_label = rdf_label
 	def get_rdf(self, obj):
+		import rdflib
 		g = rdflib.Graph()
 		value = getattr(obj, self.name)
 		if value and self.rdf_predicate:
@@ -101,14 +127,15 @@ class RDFYearField(models.IntegerField):
 			))
 		return g
 
-class RDFDecimalField(models.DecimalField):
-	rdf_type = rdflib.OWL.DatatypeProperty
-	rdf_range = rdflib.XSD.decimal
+class RDFDecimalField(LazyRDFPredicates, models.DecimalField):
+	rdf_type = OWL.DatatypeProperty
+	rdf_range = XSD.decimal
 	def __init__(self, *args, rdf_predicate=None, rdf_label=None, **kwargs):
 		super().__init__(*args, **kwargs)
 		self.rdf_predicate = rdf_predicate
 		self.rdf_label = rdf_label
 	def get_rdf(self, obj):
+		import rdflib
 		g = rdflib.Graph()
 		value = getattr(obj, self.name)
 		if value and self.rdf_predicate:
@@ -119,14 +146,15 @@ class RDFDecimalField(models.DecimalField):
 			))
 		return g
 
-class RDFIntegerField(models.IntegerField):
-	rdf_type = rdflib.OWL.DatatypeProperty
-	rdf_range = rdflib.XSD.short
+class RDFIntegerField(LazyRDFPredicates, models.IntegerField):
+	rdf_type = OWL.DatatypeProperty
+	rdf_range = XSD.short
 	def __init__(self, *args, rdf_predicate=None, rdf_label=None, **kwargs):
 		super().__init__(*args, **kwargs)
 		self.rdf_predicate = rdf_predicate
 		self.rdf_label = rdf_label
 	def get_rdf(self, obj):
+		import rdflib
 		g = rdflib.Graph()
 		value = getattr(obj, self.name)
 		if value and self.rdf_predicate:
@@ -137,14 +165,15 @@ class RDFIntegerField(models.IntegerField):
 			))
 		return g
 
-class RDFBooleanField(models.BooleanField):
-	rdf_type = rdflib.OWL.DatatypeProperty
-	rdf_range = rdflib.XSD.boolean
+class RDFBooleanField(LazyRDFPredicates, models.BooleanField):
+	rdf_type = OWL.DatatypeProperty
+	rdf_range = XSD.boolean
 	def __init__(self, *args, rdf_predicate=None, rdf_label=None, **kwargs):
 		super().__init__(*args, **kwargs)
 		self.rdf_predicate = rdf_predicate
 		self.rdf_label = rdf_label
 	def get_rdf(self, obj):
+		import rdflib
 		g = rdflib.Graph()
 		value = getattr(obj, self.name)
 		if value and self.rdf_predicate:
@@ -164,6 +193,7 @@ class WikipediaField(models.CharField):
 			blank=True,
 		)
 	def get_rdf(self, obj):
+		import rdflib
 		g = rdflib.Graph()
 		value = getattr(obj, self.name)
 		if value:
@@ -180,8 +210,8 @@ class WikipediaField(models.CharField):
 			))
 		return g
 
-class RDFForeignKey(models.ForeignKey):
-	rdf_type = rdflib.OWL.ObjectProperty
+class RDFForeignKey(LazyRDFPredicates, models.ForeignKey):
+	rdf_type = OWL.ObjectProperty
 	def __init__(self, *args, rdf_predicate=None, rdf_label=None, rdf_inverse_predicate=None, rdf_inverse_label=None, **kwargs):
 		super().__init__(*args, **kwargs)
 		self.rdf_predicate = rdf_predicate
@@ -189,9 +219,10 @@ class RDFForeignKey(models.ForeignKey):
 		self.rdf_inverse_predicate = rdf_inverse_predicate
 		self.rdf_inverse_label = rdf_inverse_label
 	def get_rdf(self, obj):
+		import rdflib
 		g = rdflib.Graph()
-		value = getattr(obj, self.name)
-		if value and self.rdf_predicate:
+		# Check the predicate first, so that a related item which won't be written out is never loaded
+		if self.rdf_predicate and (value := getattr(obj, self.name)):
 			g.add((
 				rdflib.URIRef(obj.get_absolute_url()),
 				self.rdf_predicate,
@@ -202,8 +233,8 @@ class RDFForeignKey(models.ForeignKey):
 	def rdf_range(self):
 		return self.remote_field.model.rdf_type
 
-class RDFManyToManyField(models.ManyToManyField):
-	rdf_type = rdflib.OWL.ObjectProperty
+class RDFManyToManyField(LazyRDFPredicates, models.ManyToManyField):
+	rdf_type = OWL.ObjectProperty
 	def __init__(self, *args, rdf_predicate=None, rdf_label=None, rdf_inverse_predicate=None, rdf_inverse_label=None, **kwargs):
 		super().__init__(*args, **kwargs)
 		self.rdf_predicate = rdf_predicate
@@ -211,6 +242,7 @@ class RDFManyToManyField(models.ManyToManyField):
 		self.rdf_inverse_predicate = rdf_inverse_predicate
 		self.rdf_inverse_label = rdf_inverse_label
 	def get_rdf(self, obj):
+		import rdflib
 		g = rdflib.Graph()
 		if self.rdf_predicate:
 			for subject in getattr(obj, self.name).all():
@@ -279,12 +311,13 @@ class ArrayWidget(forms.SelectMultiple):
 		}
 
 
-class RDFArrayField(ArrayField):
+class RDFArrayField(LazyRDFPredicates, ArrayField):
 	def __init__(self, *args, rdf_predicate=None, rdf_label=None, **kwargs):
 		super().__init__(*args, **kwargs)
 		self.rdf_predicate = rdf_predicate
 		self.rdf_label = rdf_label
 	def get_rdf(self, obj):
+		import rdflib
 		g = rdflib.Graph()
 		values = getattr(obj, self.name) or []
 		for value in values:
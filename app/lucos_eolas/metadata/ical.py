@@ -0,0 +1,141 @@
+"""
+The festivals as an iCalendar (RFC 5545) feed, for calendar apps to subscribe to.
+
+Each festival's defining day becomes a yearly all-day VEVENT, and so does each
+of its periods.  A month with no day given becomes an event lasting the whole
+month.  Events are anchored in ANCHOR_YEAR (a leap year, so that 29 February
+exists) and repeat yearly from there.
+
+iCalendar dates are Gregorian, and there's no calendar conversion in eolas, so
+festivals in other calendars are left out of the feed.
+
+The feed is rendered once per change to the tables it comes from (see
+caching.py) and served with an ETag and Last-Modified, so a client polling
+for changes gets a 304 without anything being rendered or queried.  Both come
+from the data rather than the time of rendering, so every worker gives the
+same ones for the same feed; Last-Modified counts deletions too (see
+derived.models.Deletion), as they leave no item behind to date them.
+"""
+
+import hashlib
+from calendar import monthrange
+from datetime import date, datetime, timedelta, timezone
+
+from django.db.models import Max
+
+from ..derived.models import Deletion
+from .caching import versioned_cache
+from .models import Calendar, Festival, FestivalPeriod, Month
+
+GREGORIAN = 'gregory'
+ANCHOR_YEAR = 2000
+# The DTSTAMP of a feed made from no festivals at all
+EMPTY_STAMP = datetime(ANCHOR_YEAR, 1, 1, tzinfo=timezone.utc)
+PRODID = '-//lucos//lucos_eolas festivals//EN'
+
+
+def _escape(text):
+	return text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+
+def _fold(line):
+	"""Split a content line into lines of at most 75 octets, as RFC 5545 §3.1 requires."""
+	encoded = line.encode('utf-8')
+	parts = []
+	limit = 75
+	while len(encoded) > limit:
+		cut = limit
+		# Don't split a multi-byte character
+		while encoded[cut] & 0xC0 == 0x80:
+			cut -= 1
+		parts.append(encoded[:cut].decode('utf-8'))
+		encoded = encoded[cut:]
+		limit = 74  # continuation lines start with a space
+	parts.append(encoded.decode('utf-8'))
+	return '\r\n '.join(parts)
+
+
+def _span(month, day, duration):
+	"""Return (first day, day after the last) of an event, or None if it isn't in the Gregorian calendar."""
+	if month is None or month.calendar.temporal_id != GREGORIAN:
+		return None
+	try:
+		if day is None:
+			start = date(ANCHOR_YEAR, month.order_in_calendar, 1)
+			return start, start + timedelta(days=monthrange(ANCHOR_YEAR, month.order_in_calendar)[1])
+		start = date(ANCHOR_YEAR, month.order_in_calendar, day)
+	except ValueError:
+		# No such day, such as 31 November
+		return None
+	return start, start + timedelta(days=duration or 1)
+
+
+def _event(item, summary, span, stamp):
+	start, end = span
+	return [
+		'BEGIN:VEVENT',
+		f'UID:{item.get_absolute_url()}',
+		f'DTSTAMP:{stamp}',
+		f'SUMMARY:{_escape(summary)}',
+		f'URL:{item.get_absolute_url()}',
+		f'DTSTART;VALUE=DATE:{start:%Y%m%d}',
+		f'DTEND;VALUE=DATE:{end:%Y%m%d}',
+		'RRULE:FREQ=YEARLY',
+		'TRANSP:TRANSPARENT',
+		'END:VEVENT',
+	]
+
+
+def _last_modified(festivals, periods):
+	"""When anything the events are made from last changed, or was last deleted."""
+	items = []
+	for festival in festivals:
+		items += [festival, festival.month, festival.month and festival.month.calendar]
+	for period in periods:
+		items += [period, period.festival, period.start_month, period.start_month and period.start_month.calendar]
+	tables = [model._meta.db_table for model in (Festival, FestivalPeriod, Month, Calendar)]
+	deleted = Deletion.objects.filter(table__in=tables).aggregate(Max('deleted_at'))['deleted_at__max']
+	times = [item.modified for item in items if item is not None] + ([deleted] if deleted else [])
+	return max(times, default=EMPTY_STAMP).replace(microsecond=0)
+
+
+def render_festival_calendar():
+	"""Return (the feed as a string, when what's in it last changed), which is every event's DTSTAMP."""
+	festivals = list(Festival.objects.select_related('month__calendar'))
+	periods = list(FestivalPeriod.objects.select_related('festival', 'start_month__calendar'))
+	last_modified = _last_modified(festivals, periods)
+	stamp = f'{last_modified.astimezone(timezone.utc):%Y%m%dT%H%M%SZ}'
+	lines = [
+		'BEGIN:VCALENDAR',
+		'VERSION:2.0',
+		f'PRODID:{PRODID}',
+		'CALSCALE:GREGORIAN',
+		'X-WR-CALNAME:Festivals',
+	]
+	for festival in festivals:
+		span = _span(festival.month, festival.day_of_month, None)
+		if span:
+			lines += _event(festival, festival.name, span, stamp)
+	for period in periods:
+		span = _span(period.start_month, period.start_day, period.duration_days)
+		if span:
+			summary = period.name if period.festival.name in period.name else f'{period.name} ({period.festival.name})'
+			lines += _event(period, summary, span, stamp)
+	lines.append('END:VCALENDAR')
+	return ''.join(_fold(line) + '\r\n' for line in lines), last_modified
+
+
+def _render():
+	body, last_modified = render_festival_calendar()
+	body = body.encode('utf-8')
+	return {
+		'body': body,
+		'etag': hashlib.sha256(body).hexdigest()[:32],
+		'last_modified': last_modified,
+	}
+
+
+def festival_calendar():
+	"""Return {'body', 'etag', 'last_modified'} for the feed, rendering it only if
+	a festival, festival period, month or calendar has changed since it last was."""
+	return versioned_cache('festival-calendar-ics', [Festival, FestivalPeriod, Month, Calendar], _render)
@@ -0,0 +1,273 @@
+"""
+Bulk loading of eolas's own dumps: the per-type tables from export.py, and
+the RDF from /metadata/all/data/ (or any part of it) in any format rdflib reads.
+
+Everything is parsed up front, then written in a single transaction with
+bulk_create (an upsert on the primary key, so a dump can be loaded over
+existing data) and bulk inserts into the many-to-many through tables.  No
+per-item signals fire, so Loganne hears about the import once, from the
+import_dump command, rather than once per row; anything derived from the data
+hears about it once too, through the bulk_loaded signal.
+
+Items are identified by their URIs, as built by get_absolute_url(): only the
+path is looked at, so a dump from one instance can be loaded into another.
+
+The CSV tables hold every field, so restore items exactly.  RDF only carries
+what get_rdf() writes out through the fields themselves, which leaves gaps:
+  * the name and alternate names are all rdfs:labels, so alternate names come
+    back sorted, rather than in their original order
+  * fields with no rdf_predicate, and triples which models add in their own
+    get_rdf() (a Festival's start day, a Place's metonym), aren't read back.
+    Those fields are left alone on existing items, and get their defaults on
+    new ones.
+"""
+
+import csv
+import time
+from collections import defaultdict
+from urllib.parse import urlparse
+
+from django.apps import apps
+from django.contrib.postgres.fields import ArrayField
+from django.core.management.color import no_style
+from django.db import connection, models, transaction
+
+from .caching import bump_version
+from .export import LIST_SEPARATOR
+from .fields import RDFArrayField, RDFNameField, RDFYearField, WikipediaField
+from .models import EolasModel, LanguageFamily
+from .signals import bulk_loaded
+
+BATCH_SIZE = 1000
+
+LOC_ISO639_5 = "http://id.loc.gov/vocabulary/iso639-5/"
+DBPEDIA_RESOURCE = "http://dbpedia.org/resource/"
+
+
+class DumpError(Exception):
+	pass
+
+
+def resolve_uri(uri):
+	"""Return (model class, pk) for the eolas item with the given URI, or None."""
+	if uri.startswith(LOC_ISO639_5):
+		return LanguageFamily, uri[len(LOC_ISO639_5):]
+	parts = urlparse(uri).path.strip('/').split('/')
+	if len(parts) != 3 or parts[0] != 'metadata':
+		return None
+	try:
+		model_class = apps.get_model('metadata', parts[1])
+	except LookupError:
+		return None
+	if not issubclass(model_class, EolasModel):
+		return None
+	return model_class, parts[2]
+
+
+def _pk_of(uri, model_class):
+	resolved = resolve_uri(uri)
+	if resolved is None or resolved[0] is not model_class:
+		raise DumpError(f"{uri} isn't the URI of a {model_class._meta.verbose_name}")
+	return model_class._meta.pk.to_python(resolved[1])
+
+
+class DumpLoader:
+	"""Collects items from any number of dumps, then loads them all with load()."""
+
+	def __init__(self):
+		# model class → {pk: {attname: value}}
+		self.items = defaultdict(dict)
+		# model class → the fields its dumps gave values for
+		self.fields = defaultdict(set)
+		# many-to-many field → {source pk: [target pk, ...]}
+		self.links = defaultdict(dict)
+
+	def _add(self, model_class, pk, values, links):
+		self.items[model_class][pk] = values
+		self.fields[model_class].update(values.keys())
+		for field, targets in links.items():
+			self.links[field][pk] = targets
+
+	def add_csv(self, lines, delimiter=','):
+		"""Add the items in a table written by export.py, given as an iterable of lines."""
+		reader = csv.DictReader(lines, delimiter=delimiter)
+		model_class = None
+		for row in reader:
+			if model_class is None:
+				resolved = resolve_uri(row['uri'])
+				if resolved is None:
+					raise DumpError(f"Can't tell what type of item {row['uri']} is")
+				model_class = resolved[0]
+				concrete = [field for field in model_class._meta.concrete_fields if field.name in row]
+				many_to_many = [field for field in model_class._meta.many_to_many if field.name in row]
+			values = {field.attname: self._csv_value(field, row[field.name]) for field in concrete}
+			links = {field: [_pk_of(uri, field.related_model) for uri in _split(row[field.name])] for field in many_to_many}
+			self._add(model_class, _pk_of(row['uri'], model_class), values, links)
+
+	@staticmethod
+	def _csv_value(field, text):
+		# CSV can't tell NULL from an empty string, so go by what the field allows
+		if text == '' and not isinstance(field, ArrayField):
+			if field.null:
+				return None
+			if isinstance(field, (models.CharField, models.TextField)):
+				return ''
+			return field.get_default()
+		if field.many_to_one:
+			return _pk_of(text, field.related_model)
+		if isinstance(field, ArrayField):
+			return [field.base_field.to_python(value) for value in _split(text)]
+		return field.to_python(text)
+
+	def add_rdf(self, source, format=None):
+		"""Add the items described in an RDF document (a path, file or URL, as
+		rdflib.Graph.parse takes), in the format given or guessed from its name."""
+		import rdflib
+		from rdflib.util import guess_format
+		g = rdflib.Graph()
+		if format is None and isinstance(source, str):
+			format = guess_format(source)
+		g.parse(source, format=format)
+		for subject in set(g.subjects()):
+			if not isinstance(subject, rdflib.URIRef):
+				continue
+			resolved = resolve_uri(str(subject))
+			if resolved is None:
+				continue
+			model_class, pk = resolved
+			if (subject, rdflib.RDFS.label, None) not in g:
+				# Only mentioned, not described, in this graph
+				continue
+			values, links = _rdf_values(g, subject, model_class)
+			self._add(model_class, model_class._meta.pk.to_python(pk), values, links)
+
+	def count(self):
+		return sum(len(items) for items in self.items.values())
+
+	def load(self, progress=None):
+		"""Write everything collected to the database, in one transaction.
+
+		progress, if given, is called as progress(model class, rows done, rows in
+		total, seconds taken) after each batch.  Returns the number of items loaded.
+		"""
+		with transaction.atomic():
+			for model_class, items in self.items.items():
+				self._load_items(model_class, items, progress)
+			for field, links in self.links.items():
+				self._load_links(field, links, progress)
+			self._reset_sequences()
+		for model_class in self.items:
+			bump_version(model_class)
+		for field in self.links:
+			bump_version(field.related_model)
+		bulk_loaded.send(sender=self.__class__, models=[*self.items, *(field.remote_field.through for field in self.links)])
+		return self.count()
+
+	def _load_items(self, model_class, items, progress):
+		pk_name = model_class._meta.pk.attname
+		update_fields = [field.name for field in model_class._meta.concrete_fields if field.attname in self.fields[model_class] and not field.primary_key]
+		if update_fields:
+			# Items updated by the load are modified now, whatever the dump says
+			update_fields += [field.name for field in model_class._meta.concrete_fields if getattr(field, 'auto_now', False) and field.name not in update_fields]
+		objs = [model_class(**{pk_name: pk, **values}) for pk, values in items.items()]
+		started = time.perf_counter()
+		for start in range(0, len(objs), BATCH_SIZE):
+			model_class.objects.bulk_create(
+				objs[start:start + BATCH_SIZE],
+				update_conflicts=bool(update_fields),
+				ignore_conflicts=not update_fields,
+				unique_fields=[pk_name] if update_fields else None,
+				update_fields=update_fields or None,
+			)
+			if progress:
+				progress(model_class, min(start + BATCH_SIZE, len(objs)), len(objs), time.perf_counter() - started)
+
+	def _load_links(self, field, links, progress):
+		"""Replace the links through field of each item in links with the ones in the dump."""
+		through = field.remote_field.through
+		source = through._meta.get_field(field.m2m_field_name()).attname
+		target = through._meta.get_field(field.m2m_reverse_field_name()).attname
+		through.objects.filter(**{f'{source}__in': list(links.keys())}).delete()
+		rows = [through(**{source: source_pk, target: target_pk}) for source_pk, targets in links.items() for target_pk in targets]
+		started = time.perf_counter()
+		for start in range(0, len(rows), BATCH_SIZE):
+			through.objects.bulk_create(rows[start:start + BATCH_SIZE], ignore_conflicts=True)
+			if progress:
+				progress(through, min(start + BATCH_SIZE, len(rows)), len(rows), time.perf_counter() - started)
+
+	def _reset_sequences(self):
+		"""Move autoincrementing primary keys on past any ids that came from the dump."""
+		statements = connection.ops.sequence_reset_sql(no_style(), list(self.items.keys()))
+		with connection.cursor() as cursor:
+			for sql in statements:
+				cursor.execute(sql)
+
+
+def _split(text):
+	return text.split(LIST_SEPARATOR) if text else []
+
+
+def _rdf_values(g, subject, model_class):
+	"""Read back the field values which get_rdf() wrote for subject."""
+	import rdflib
+	values = {}
+	links = {}
+	labels = {str(label) for label in g.objects(subject, rdflib.RDFS.label)}
+	name = _main_label(labels, g.value(subject, rdflib.SKOS.prefLabel))
+	for field in model_class.rdf_fields():
+		if isinstance(field, RDFNameField):
+			values[field.attname] = name
+		elif isinstance(field, RDFArrayField) and isinstance(field.base_field, RDFNameField):
+			values[field.attname] = sorted(labels - {name})
+		elif isinstance(field, WikipediaField):
+			same_as = [str(uri) for uri in g.objects(subject, rdflib.OWL.sameAs) if str(uri).startswith(DBPEDIA_RESOURCE)]
+			values[field.attname] = same_as[0][len(DBPEDIA_RESOURCE):] if same_as else ''
+		elif field.many_to_one and not field.rdf_predicate:
+			# See EolasModel.get_rdf: an item's `type` (which may be another
+			# name for one of its foreign keys) is its rdf:type
+			for uri in g.objects(subject, rdflib.RDF.type):
+				resolved = resolve_uri(str(uri))
+				if resolved and resolved[0] is field.related_model:
+					values[field.attname] = field.related_model._meta.pk.to_python(resolved[1])
+		elif not getattr(field, 'rdf_predicate', None):
+			continue
+		elif field.many_to_many:
+			links[field] = [_pk_of(str(uri), field.related_model) for uri in g.objects(subject, field.rdf_predicate)]
+		elif field.many_to_one:
+			uri = g.value(subject, field.rdf_predicate)
+			values[field.attname] = _pk_of(str(uri), field.related_model) if uri is not None else None
+		elif isinstance(field, RDFYearField):
+			node = g.value(subject, field.rdf_predicate)
+			year = g.value(node, rdflib.TIME.year) if node is not None else None
+			values[field.attname] = year.toPython() if year is not None else None
+		else:
+			literal = g.value(subject, field.rdf_predicate)
+			# get_rdf() leaves out falsy values
+			values[field.attname] = field.to_python(literal.toPython()) if literal is not None else _empty(field)
+	return values, links
+
+
+def _main_label(labels, pref_label):
+	"""Pick out the name from all of an item's rdfs:labels.  Its skos:prefLabel is
+	its str(), which is the name, possibly followed by something to disambiguate it."""
+	pref_label = str(pref_label) if pref_label is not None else ''
+	if pref_label in labels:
+		return pref_label
+	prefixes = [label for label in labels if pref_label.startswith(label)]
+	if prefixes:
+		return max(prefixes, key=len)
+	if not labels:
+		raise DumpError("Item has no rdfs:label")
+	return sorted(labels)[0]
+
+
+def _empty(field):
+	if field.null:
+		return None
+	if isinstance(field, (models.CharField, models.TextField)):
+		return ''
+	if isinstance(field, models.BooleanField):
+		return False
+	if isinstance(field, (models.IntegerField, models.DecimalField)):
+		return 0
+	return field.get_default()
@@ -0,0 +1,27 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from lucos_eolas.metadata.export import EXPORT_FORMATS, copy_rows, copy_text
+
+
+class Command(BaseCommand):
+	help = "Export every item of a type as a CSV or TSV table, straight from Postgres (the same table as /metadata/<type>/export.csv)."
+
+	def add_arguments(self, parser):
+		parser.add_argument('type', help="Model name of the type, as used in URLs (e.g. 'place')")
+		parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='csv')
+		parser.add_argument('--output', '-o', help="File to write to, instead of stdout")
+
+	def handle(self, *args, **options):
+		try:
+			model_class = apps.get_model('metadata', options['type'])
+		except LookupError:
+			raise CommandError(f"Unknown type '{options['type']}'")
+		delimiter, _ = EXPORT_FORMATS[options['format']]
+		if options['output']:
+			with open(options['output'], 'wb') as output:
+				for block in copy_rows(model_class, delimiter):
+					output.write(block)
+		else:
+			for text in copy_text(model_class, delimiter):
+				self.stdout.write(text, ending='')
@@ -0,0 +1,44 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+from loganne import updateLoganne
+
+from lucos_eolas.metadata.export import EXPORT_FORMATS
+from lucos_eolas.metadata.importer import DumpError, DumpLoader
+
+
+class Command(BaseCommand):
+	help = "Bulk load eolas dumps: per-type tables from export_table (.csv/.tsv), or RDF from /metadata/all/data/ in any format rdflib reads."
+
+	def add_arguments(self, parser):
+		parser.add_argument('paths', nargs='+', help="Dump files; the format is worked out from each file's extension")
+		parser.add_argument('--rdf-format', help="rdflib format name for RDF files whose extension doesn't give it away (e.g. 'nt')")
+
+	def handle(self, *args, **options):
+		self.verbosity = options['verbosity']
+		loader = DumpLoader()
+		start = time.perf_counter()
+		try:
+			for path in options['paths']:
+				extension = os.path.splitext(path)[1].lstrip('.').lower()
+				if extension in EXPORT_FORMATS:
+					delimiter, _ = EXPORT_FORMATS[extension]
+					with open(path, newline='', encoding='utf-8') as lines:
+						loader.add_csv(lines, delimiter=delimiter)
+				else:
+					loader.add_rdf(path, format=options['rdf_format'])
+			self.stdout.write(f"Parsed {loader.count()} items in {time.perf_counter() - start:.1f}s")
+			count = loader.load(progress=self._progress)
+		except (DumpError, IntegrityError, OSError) as error:
+			raise CommandError(error)
+		seconds = time.perf_counter() - start
+		self.stdout.write(self.style.SUCCESS(f"Imported {count} items in {seconds:.1f}s ({count / seconds:.0f} items/s)"))
+		names = ', '.join(os.path.basename(path) for path in options['paths'])
+		updateLoganne(type="dumpImported", humanReadable=f'{count} items imported from {names}', level="notable")
+
+	def _progress(self, model_class, done, total, seconds):
+		if self.verbosity >= 2 or (self.verbosity >= 1 and done == total):
+			rate = done / seconds if seconds else 0
+			self.stdout.write(f"{model_class._meta.label}: {done}/{total} rows ({rate:.0f} rows/s)")
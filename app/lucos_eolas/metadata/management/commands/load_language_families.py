@@ -1,62 +1,146 @@
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
 import requests
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
+from django.utils import timezone
+from loganne import updateLoganne
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from lucos_eolas.metadata.caching import bump_version
 from lucos_eolas.metadata.models import Language, LanguageFamily
+from lucos_eolas.metadata.signals import bulk_loaded
 
 HEADERS = {"Accept": "application/ld+json"}
 ROOT_URI = "https://id.loc.gov/vocabulary/iso639-5.jsonld"
+FAMILY_PREFIX = "http://id.loc.gov/vocabulary/iso639-5/"
+SKOS = "http://www.w3.org/2004/02/skos/core#"
+
+
+def make_session(concurrency):
+	"""A session which keeps a connection open per worker, and retries failed requests with backoff."""
+	session = requests.Session()
+	session.headers.update(HEADERS)
+	retry = Retry(total=5, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+	session.mount("https://", HTTPAdapter(pool_maxsize=concurrency, max_retries=retry))
+	session.mount("http://", HTTPAdapter(pool_maxsize=concurrency, max_retries=retry))
+	return session
 
 
 class Command(BaseCommand):
-	help = "Load all ISO 639-5 language families from LoC recursively, including all subfamilies."
+	help = "Load all ISO 639-5 language families from LoC, including all subfamilies."
+
+	def add_arguments(self, parser):
+		parser.add_argument('--concurrency', type=int, default=8, help="How many requests to LoC to have in flight at once")
+		parser.add_argument('--cache-dir', help="Keep each response from LoC here, and reuse any already there, so an interrupted run can be resumed")
+		parser.add_argument('--snapshot', help="Read families from this JSON-LD file instead of from LoC")
+		parser.add_argument('--write-snapshot', help="Write every family fetched to this JSON-LD file, for later use with --snapshot")
 
 	def handle(self, *args, **options):
+		self.cache_dir = options['cache_dir']
+		if self.cache_dir:
+			os.makedirs(self.cache_dir, exist_ok=True)
+		if options['snapshot']:
+			self.fetch = self._snapshot_fetcher(options['snapshot'])
+			concurrency = 1
+		else:
+			concurrency = options['concurrency']
+			self.session = make_session(concurrency)
+			self.fetch = self._fetch
 		self._process_isolates()
 		self._process_special_codes()
-		self.stdout.write("Fetching top-level ISO 639-5 families...")
-		resp = requests.get(ROOT_URI, headers=HEADERS, allow_redirects=True)
-		resp.raise_for_status()
-		root_data = resp.json()  # LoC JSON-LD root is a list
+		self.stdout.write("Fetching ISO 639-5 families...")
+		entries, parents = self._crawl(concurrency)
+		if options['write_snapshot']:
+			with open(options['write_snapshot'], 'w', encoding='utf-8') as snapshot:
+				json.dump(list(entries.values()), snapshot)
+		self._save(entries, parents)
+		self.stdout.write(self.style.SUCCESS(f"✅ Done importing {len(entries)} ISO 639-5 families."))
+		updateLoganne(type="languageFamiliesLoaded", humanReadable=f"{len(entries)} language families loaded from ISO 639-5", level="routine")
 
-		# Recursively import each top-level family
-		with transaction.atomic():
-			for term in root_data:
-				uri = term.get('@id')
-				if uri and uri.startswith("http://id.loc.gov/vocabulary/iso639-5/") :
-					self._process_family(uri, None)
+	def _crawl(self, concurrency):
+		"""Fetch every family reachable from the root, with up to `concurrency` requests
+		in flight.  Returns ({code: JSON-LD entry}, {code: parent code})."""
+		root = self.fetch(ROOT_URI)
+		entries = {}
+		parents = {}
+		seen = set()
+		with ThreadPoolExecutor(max_workers=concurrency) as executor:
+			in_flight = set()
 
-		self.stdout.write(self.style.SUCCESS("✅ Done importing ISO 639-5 families."))
+			def visit(uri):
+				if uri.startswith(FAMILY_PREFIX) and uri not in seen:
+					seen.add(uri)
+					in_flight.add(executor.submit(self._family_entry, uri))
 
-	def _process_family(self, uri, parent):
-		# Fetch JSON-LD for this family
-		resp = requests.get(uri, headers=HEADERS, allow_redirects=True)
-		resp.raise_for_status()
-		data = resp.json()  # flat array of objects
+			for term in root:
+				visit(term.get('@id', ''))
+			while in_flight:
+				done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+				for future in done:
+					uri, entry = future.result()
+					if entry is None:
+						self.stdout.write(self.style.WARNING(f"No matching entry for {uri}"))
+						continue
+					code = _code(uri)
+					entries[code] = entry
+					for child in entry.get(f'{SKOS}narrower', []):
+						child_uri = child.get('@id', '')
+						if child_uri.startswith(FAMILY_PREFIX):
+							parents[_code(child_uri)] = code
+							visit(child_uri)
+		return entries, parents
 
-		# Find the object in the array whose @id matches the URI
-		family_entry = next((item for item in data if item.get('@id') == uri), None)
-		if not family_entry:
-			self.stdout.write(self.style.WARNING(f"No matching entry for {uri}"))
-			return
+	def _family_entry(self, uri):
+		"""Return (uri, the object describing the family in its JSON-LD), or (uri, None)."""
+		data = self.fetch(uri)
+		return uri, next((item for item in data if item.get('@id') == uri), None)
 
-		code = uri.rstrip('/').split('/')[-1]
-		name_list = family_entry.get('http://www.w3.org/2004/02/skos/core#prefLabel', [])
-		name = name_list[0].get('@value', 'Unknown') if name_list else 'Unknown'
+	def _fetch(self, uri):
+		"""GET uri's JSON-LD from LoC, or from the cache directory if it was fetched before."""
+		path = os.path.join(self.cache_dir, uri.rstrip('/').split('/')[-1]) if self.cache_dir else None
+		if path and os.path.exists(path):
+			with open(path, encoding='utf-8') as cached:
+				return json.load(cached)
+		resp = self.session.get(uri, allow_redirects=True, timeout=30)
+		resp.raise_for_status()
+		data = resp.json()  # flat array of objects
+		if path:
+			# Write then rename, so an interrupted run never leaves half a response behind
+			with open(f'{path}.part', 'w', encoding='utf-8') as part:
+				json.dump(data, part)
+			os.replace(f'{path}.part', path)
+		return data
 
-		# Insert/update Django model
-		obj, created = LanguageFamily.objects.update_or_create(
-			code=code,
-			defaults={"name": name, "parent": parent},
-		)
-		action = "Created" if created else "Updated"
-		self.stdout.write(f"{action}: {code} → {name}")
+	def _snapshot_fetcher(self, path):
+		try:
+			with open(path, encoding='utf-8') as snapshot:
+				data = json.load(snapshot)
+		except (OSError, ValueError) as error:
+			raise CommandError(f"Can't read snapshot {path}: {error}")
+		if isinstance(data, dict):
+			data = data.get('@graph', [])
+		# Every entry is in the one document, whichever is asked for
+		return lambda uri: data
 
-		# Recursively process narrower concepts
-		narrower_list = family_entry.get('http://www.w3.org/2004/02/skos/core#narrower', [])
-		for child in narrower_list:
-			child_uri = child.get('@id')
-			if child_uri and child_uri.startswith("http://id.loc.gov/vocabulary/iso639-5/"):
-				self._process_family(child_uri, obj)
+	def _save(self, entries, parents):
+		"""Upsert every family in one pass, then point each at its parent."""
+		# Neither pass runs auto_now on existing rows, so set modified here,
+		# which the per-type data endpoint's ?since= filter relies on
+		now = timezone.now()
+		families = [LanguageFamily(code=code, name=_name(entry), modified=now) for code, entry in entries.items()]
+		with transaction.atomic():
+			LanguageFamily.objects.bulk_create(families, update_conflicts=True, unique_fields=['code'], update_fields=['name', 'modified'])
+			for family in families:
+				parent = parents.get(family.code)
+				family.parent_id = parent if parent in entries else None
+				family.modified = now
+			LanguageFamily.objects.bulk_update(families, ['parent', 'modified'])
+		bump_version(LanguageFamily)
+		bulk_loaded.send(sender=self.__class__, models=[LanguageFamily])
 
 	# Create a pseudo family to hold language isolates
 	# NB: this isn't included in ISO 639-5, so the code here is invented
@@ -85,4 +169,13 @@ class Command(BaseCommand):
 			defaults={"name": "No linguistic content", "family": family},
 		)
 		lang_action = "Created" if lang_created else "Updated"
-		self.stdout.write(f"{lang_action}: zxx → No linguistic content")
\ No newline at end of file
+		self.stdout.write(f"{lang_action}: zxx → No linguistic content")
+
+
+def _code(uri):
+	return uri.rstrip('/').split('/')[-1]
+
+
+def _name(entry):
+	name_list = entry.get(f'{SKOS}prefLabel', [])
+	return name_list[0].get('@value', 'Unknown') if name_list else 'Unknown'
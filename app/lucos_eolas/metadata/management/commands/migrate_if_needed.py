@@ -0,0 +1,21 @@
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+
+
+class Command(BaseCommand):
+	help = "Run migrate only if there are unapplied migrations, so routine restarts skip the post-migrate work."
+
+	def handle(self, *args, **options):
+		start = time.perf_counter()
+		executor = MigrationExecutor(connections[DEFAULT_DB_ALIAS])
+		plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+		if plan:
+			self.stdout.write(f"{len(plan)} migration(s) pending")
+			call_command('migrate', verbosity=options['verbosity'])
+		else:
+			self.stdout.write("No migrations pending")
+		self.stdout.write(f"Migration step took {(time.perf_counter() - start) * 1000:.0f}ms")
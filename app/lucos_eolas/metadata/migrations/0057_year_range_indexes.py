@@ -0,0 +1,24 @@
+# Generated by Django 6.1 on 2026-10-19 18:30
+
+import django.contrib.postgres.fields.ranges
+import django.contrib.postgres.indexes
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('metadata', '0056_alter_creativeworktype_category_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='historicalevent',
+            index=django.contrib.postgres.indexes.GistIndex(models.Func(django.db.models.functions.comparison.Least('start_year', 'end_year'), django.db.models.functions.comparison.Greatest('start_year', 'end_year'), models.Value('[]'), function='int4range', output_field=django.contrib.postgres.fields.ranges.IntegerRangeField()), name='historicalevent_years_gist'),
+        ),
+        migrations.AddIndex(
+            model_name='memory',
+            index=models.Index(fields=['year'], name='memory_year_idx'),
+        ),
+    ]
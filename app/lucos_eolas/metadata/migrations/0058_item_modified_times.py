@@ -0,0 +1,128 @@
+# Generated by Django 6.1 on 2026-10-19 18:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('metadata', '0057_year_range_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='calendar',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='last modified'),
+        ),
+        migrations.AddField(
+            model_name='creativework',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='last modified'),
+        ),
+        migrations.AddField(
+            model_name='creativeworktype',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='last modified'),
+        ),
+        migrations.AddField(
+            model_name='dayofweek',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='last modified'),
+        ),
+        migrations.AddField(
+            model_name='direction',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='last modified'),
+        ),
+        migrations.AddField(
+            model_name='ethnicgroup',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='last modified'),
+        ),
+        migrations.AddField(
+            model_name='festival',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='last modified'),
+        ),
+        migrations.AddField(
+            model_name='festivalperiod',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='last modified'),
+        ),
+        migrations.AddField(
+            model_name='historicalevent',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='last modified'),
+        ),
+        migrations.AddField(
+            model_name='language',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='last modified'),
+        ),
+        migrations.AddField(
+            model_name='languagefamily',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='last modified'),
+        ),
+        migrations.AddField(
+            model_name='memory',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='last modified'),
+        ),
+        migrations.AddField(
+            model_name='month',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='last modified'),
+        ),
+        migrations.AddField(
+            model_name='number',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='last modified'),
+        ),
+        migrations.AddField(
+            model_name='offence',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='last modified'),
+        ),
+        migrations.AddField(
+            model_name='organisation',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='last modified'),
+        ),
+        migrations.AddField(
+            model_name='person',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='last modified'),
+        ),
+        migrations.AddField(
+            model_name='place',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='last modified'),
+        ),
+        migrations.AddField(
+            model_name='placetype',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='last modified'),
+        ),
+        migrations.AddField(
+            model_name='season',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='last modified'),
+        ),
+        migrations.AddField(
+            model_name='transportmode',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='last modified'),
+        ),
+        migrations.AddField(
+            model_name='vehicle',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='last modified'),
+        ),
+        migrations.AddField(
+            model_name='weather',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='last modified'),
+        ),
+    ]
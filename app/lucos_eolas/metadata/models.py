@@ -1,13 +1,19 @@
 import os
+from collections import defaultdict
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GistIndex
+from django.db.models import Case, Exists, Func, OuterRef, Value, When, prefetch_related_objects
+from django.db.models.functions import Cast, Concat, Upper
 from django.db.models.enums import ChoicesType
 from django.utils.translation import gettext_lazy as _
 from django.utils import translation
 from django.conf import settings
 from .fields import *
 from .utils_case import smart_title
-import rdflib
+from .years import year_span
+from .rdf import EOLAS_NS, DBPEDIA_NS, LOC_NS, WDT_NS, DC, FOAF, ORG, SDO, TIME
 
 
 class CategoryChoicesType(ChoicesType):
@@ -39,10 +45,8 @@ class CategoryChoicesType(ChoicesType):
 		return cls
 
 BASE_URL = os.environ.get("APP_ORIGIN")
-EOLAS_NS = rdflib.Namespace(f"{BASE_URL}/ontology/")
-DBPEDIA_NS = rdflib.Namespace("https://dbpedia.org/ontology/")
-LOC_NS = rdflib.Namespace("http://www.loc.gov/mads/rdf/v1#")
-WDT_NS = rdflib.Namespace("http://www.wikidata.org/prop/direct/")
+
+_rdf_field_plans = {}
 
 class EolasModel(models.Model):
 	name = RDFNameField()
@@ -54,15 +58,102 @@ class EolasModel(models.Model):
 		help_text=_("Enter alternate names separated by commas."),
 	)
 	wikipedia_slug = WikipediaField()
+	# When the item, or its links to other items, last changed; for clients
+	# fetching only what's changed (see views.type_data)
+	modified = models.DateTimeField(_('last modified'), auto_now=True, db_index=True)
+	# Models whose __str__ disambiguates items that share a name list the fields
+	# a shared name is looked for in.  See has_name_clash()
+	name_clash_fields = ()
+	# Types placed in time by year name the fields holding the first and last
+	# year they cover, for range queries.  See years.py
+	year_fields = None
 	class Meta:
 		abstract = True
 
 	def __str__(self):
 		return self.name
 
+	def has_name_clash(self):
+		"""Whether another item of this type goes by this item's name.
+
+		Uses the answer worked out by load_name_clashes() or
+		annotate_name_clashes(), if there is one; otherwise it costs a query.
+		"""
+		clash = getattr(self, '_name_clash', None)
+		if clash is not None:
+			return clash
+		lookup = models.Q(name__iexact=self.name)
+		if 'alternate_names' in self.name_clash_fields:
+			lookup |= models.Q(alternate_names__contains=[self.name])
+		return type(self).objects.filter(lookup).count() > 1
+
+	@classmethod
+	def load_name_clashes(cls, objs):
+		"""Work out has_name_clash() for a batch of items of this type in one query."""
+		if not cls.name_clash_fields or not objs:
+			return
+		names = {obj.name for obj in objs}
+		# Upper-cased by the database, as __iexact does: Python's str.upper() differs for some letters, such as ß
+		lookup = models.Q(upper_name__in=[Upper(Value(name)) for name in names])
+		if 'alternate_names' in cls.name_clash_fields:
+			lookup |= models.Q(alternate_names__overlap=list(names))
+		# Compare upper-cased names as the database sees them, so this agrees with __iexact
+		upper_names = {}
+		by_upper_name = defaultdict(set)
+		by_alternate_name = defaultdict(set)
+		for pk, upper_name, alternate_names in cls.objects.annotate(upper_name=Upper('name')).filter(lookup).values_list('pk', 'upper_name', 'alternate_names'):
+			upper_names[pk] = upper_name
+			by_upper_name[upper_name].add(pk)
+			if 'alternate_names' in cls.name_clash_fields:
+				for alternate_name in alternate_names or []:
+					by_alternate_name[alternate_name].add(pk)
+		for obj in objs:
+			matches = by_upper_name[upper_names.get(obj.pk)] | by_alternate_name[obj.name]
+			obj._name_clash = len(matches | {obj.pk}) > 1
+
+	@classmethod
+	def annotate_name_clashes(cls, queryset):
+		"""Have queryset work out has_name_clash() for each item as part of its own query."""
+		if not cls.name_clash_fields:
+			return queryset
+		name = OuterRef('name')
+		lookup = models.Q(name__iexact=name)
+		if 'alternate_names' in cls.name_clash_fields:
+			lookup |= models.Q(alternate_names__contains=Func(name, template='ARRAY[%(expressions)s]', output_field=ArrayField(models.CharField())))
+		return queryset.annotate(_name_clash=Exists(cls.objects.filter(lookup).exclude(pk=OuterRef('pk'))))
+
+	@classmethod
+	def preload(cls, objs):
+		"""Fetch everything get_rdf(), to_json() and str() need for a batch of items
+		of this type, in a fixed number of queries rather than a few per item."""
+		relations = [field for field in cls._meta.get_fields() if not field.auto_created and (field.many_to_one or field.many_to_many)]
+		prefetch_related_objects(objs, *[field.name for field in relations])
+		cls.load_name_clashes(objs)
+		# The str() of a related item can depend on its own relations and name clashes
+		for field in relations:
+			if not field.many_to_one or not getattr(field.related_model, 'name_clash_fields', ()):
+				continue
+			targets = list({target.pk: target for obj in objs if (target := getattr(obj, field.name)) is not None}.values())
+			field.related_model.preload_for_str(targets)
+
+	@classmethod
+	def preload_for_str(cls, objs):
+		"""Fetch what str() needs for a batch of items of this type."""
+		prefetch_related_objects(objs, *[field.name for field in cls._meta.get_fields() if field.concrete and field.many_to_one])
+		cls.load_name_clashes(objs)
+
 	def get_absolute_url(self):
 		return f"{BASE_URL}/metadata/{self._meta.model_name}/{self.pk}/"
 
+	@classmethod
+	def uri_expression(cls, pk_field='pk'):
+		"""Database counterpart of get_absolute_url(): an expression for the URI of the
+		item of this type whose primary key is in pk_field (NULL if pk_field is)."""
+		return Case(
+			When(**{f'{pk_field}__isnull': False}, then=Concat(Value(f"{BASE_URL}/metadata/{cls._meta.model_name}/"), Cast(pk_field, models.TextField()), Value('/'), output_field=models.TextField())),
+			output_field=models.TextField(),
+		)
+
 	def get_webhook_url(self):
 		"""Return the URL to include in loganne webhook events.
 
@@ -101,6 +192,8 @@ class EolasModel(models.Model):
 		return data
 
 	def get_rdf(self, include_type_label):
+		import rdflib
+		eolas = EOLAS_NS.resolve()
 		uri = rdflib.URIRef(self.get_absolute_url())
 		g = rdflib.Graph()
 		if (hasattr(self, 'type')):
@@ -115,15 +208,22 @@ class EolasModel(models.Model):
 					with translation.override(lang):
 						g.add((self.rdf_type, rdflib.SKOS.prefLabel, rdflib.Literal(translation.gettext(self._meta.verbose_name), lang=lang)))
 				if (hasattr(self, 'category')):
-					g.add((self.rdf_type, EOLAS_NS.hasCategory, EOLAS_NS[self.category]))
+					g.add((self.rdf_type, eolas.hasCategory, eolas[self.category]))
 					for lang, _ in settings.LANGUAGES:
 						with translation.override(lang):
-							g.add((EOLAS_NS[self.category], rdflib.SKOS.prefLabel, rdflib.Literal(translation.gettext(self.category), lang=lang)))
-		for field in self._meta.get_fields():
-			if hasattr(field, 'get_rdf'):
-				g += field.get_rdf(self)
+							g.add((eolas[self.category], rdflib.SKOS.prefLabel, rdflib.Literal(translation.gettext(self.category), lang=lang)))
+		for field in self.rdf_fields():
+			g += field.get_rdf(self)
 		return g
 
+	@classmethod
+	def rdf_fields(cls):
+		"""Return the fields which contribute triples to get_rdf(), worked out once per model."""
+		plan = _rdf_field_plans.get(cls)
+		if plan is None:
+			plan = _rdf_field_plans[cls] = tuple(field for field in cls._meta.get_fields() if hasattr(field, 'get_rdf'))
+		return plan
+
 class Category(models.TextChoices, metaclass=CategoryChoicesType):
 	"""Enum of eolas categories.
 
@@ -179,19 +279,21 @@ class PlaceType(EolasModel):
 		return smart_title(self.name)
 
 	def get_rdf(self, include_type_label):
+		import rdflib
+		eolas = EOLAS_NS.resolve()
 		uri = rdflib.URIRef(self.get_absolute_url())
 		g = super().get_rdf(include_type_label)
 		g.add((uri, rdflib.RDFS.subClassOf, rdflib.SDO.Place))
-		g.add((uri, EOLAS_NS.hasCategory, EOLAS_NS[self.category]))
+		g.add((uri, eolas.hasCategory, eolas[self.category]))
 		if include_type_label:
 			for lang, _ in settings.LANGUAGES:
 				with translation.override(lang):
-					g.add((EOLAS_NS[self.category], rdflib.SKOS.prefLabel, rdflib.Literal(translation.gettext(self.category), lang=lang)))
+					g.add((eolas[self.category], rdflib.SKOS.prefLabel, rdflib.Literal(translation.gettext(self.category), lang=lang)))
 					g.add((rdflib.SDO.Place, rdflib.SKOS.prefLabel, rdflib.Literal(translation.gettext("Place"), lang=lang)))
 		return g
 
 class Place(EolasModel):
-	rdf_type = rdflib.SDO.Place # Particular places have their own PlaceType, but all of those inherit from SDO.Place
+	rdf_type = SDO.Place # Particular places have their own PlaceType, but all of those inherit from SDO.Place
 	name = RDFNameField(unique=False)
 	type = RDFForeignKey(
 		PlaceType,
@@ -261,36 +363,37 @@ class Place(EolasModel):
 		ordering = ["name"]
 		db_table_comment = "Entities that have a somewhat fixed, physical extension."
 
+	name_clash_fields = ('name', 'alternate_names')
+
 	def __str__(self):
-		# Build a queryset matching either exact name or element in alternate_names
-		qs = Place.objects.filter(
-			models.Q(name__iexact=self.name) |
-			models.Q(alternate_names__contains=[self.name])
-		)
-		if qs.count() > 1:
+		if self.has_name_clash():
 			return f"{self.name} ({self.type})"
 		return self.name
 
 	def get_rdf(self, include_type_label):
+		import rdflib
+		eolas = EOLAS_NS.resolve()
 		uri = rdflib.URIRef(self.get_absolute_url())
 		g = super().get_rdf(include_type_label)
 		if self.metonym:
 			# The metonym field is actually a label for the thing, so create a bnode for the thing itself
 			metonym_bnode = rdflib.BNode()
-			g.add((uri, EOLAS_NS.metonym, metonym_bnode))
+			g.add((uri, eolas.metonym, metonym_bnode))
 			g.add((metonym_bnode, rdflib.SKOS.prefLabel, rdflib.Literal(self.metonym)))
 		return g
 
 	@classmethod
 	def get_ontology_rdf(cls):
+		import rdflib
+		eolas = EOLAS_NS.resolve()
 		g = rdflib.Graph()
-		g.add((EOLAS_NS.containedIn, rdflib.RDFS.subPropertyOf, rdflib.SDO.containedInPlace))
-		g.add((EOLAS_NS.contains, rdflib.RDFS.subPropertyOf, rdflib.SDO.containsPlace))
-		g.add((EOLAS_NS.containedIn, rdflib.RDF.type, rdflib.OWL.TransitiveProperty))
+		g.add((eolas.containedIn, rdflib.RDFS.subPropertyOf, rdflib.SDO.containedInPlace))
+		g.add((eolas.contains, rdflib.RDFS.subPropertyOf, rdflib.SDO.containsPlace))
+		g.add((eolas.containedIn, rdflib.RDF.type, rdflib.OWL.TransitiveProperty))
 		return g
 
 class DayOfWeek(EolasModel):
-	rdf_type = rdflib.TIME.DayOfWeek
+	rdf_type = TIME.DayOfWeek
 	category = Category.TEMPORAL
 	order = RDFIntegerField(
 		verbose_name=_('order'),
@@ -323,7 +426,7 @@ class Calendar(EolasModel):
 		db_table_comment = "A system for organizing dates."
 
 class Month(EolasModel):
-	rdf_type = rdflib.TIME.MonthOfYear
+	rdf_type = TIME.MonthOfYear
 	category = Category.TEMPORAL
 	name = RDFNameField(unique=False)
 	calendar = RDFForeignKey(
@@ -365,10 +468,10 @@ class Month(EolasModel):
 			data['temporal_month_code'] = f'M{self.order_in_calendar:02d}'
 		return data
 
+	name_clash_fields = ('name',)
+
 	def __str__(self):
-		# Check if this name occurs multiple times (case-insensitive)
-		qs = Month.objects.filter(name__iexact=self.name)
-		if qs.count() > 1:
+		if self.has_name_clash():
 			return f"{self.name} ({self.calendar})"
 		return self.name
 
@@ -393,11 +496,13 @@ class HistoricalEvent(EolasModel):
 		rdf_label="Occured On",
 		db_comment='The approximate point in time an event finished',
 	)
+	year_fields = ('start_year', 'end_year')
 	class Meta:
 		verbose_name = _('Historical Event')
 		verbose_name_plural = _('Historical Events')
 		ordering = ["start_year", "name"]
 		db_table_comment = "A notable thing that happened in the past."
+		indexes = [GistIndex(year_span('start_year', 'end_year'), name='historicalevent_years_gist')]
 
 class Festival(EolasModel):
 	"""A recurring celebration or event.
@@ -459,12 +564,14 @@ class Festival(EolasModel):
 		db_table_comment = "A recurring celebration or event."
 
 	def get_rdf(self, include_type_label):
+		import rdflib
+		eolas = EOLAS_NS.resolve()
 		uri = rdflib.URIRef(self.get_absolute_url())
 		g = super().get_rdf(include_type_label)
 		# Represent startDay as a blank node
 		if self.day_of_month is not None or self.month is not None:
 			start_day_bnode = rdflib.BNode()
-			g.add((uri, EOLAS_NS.festivalStartsOn, start_day_bnode))
+			g.add((uri, eolas.festivalStartsOn, start_day_bnode))
 			if self.day_of_month is not None:
 				g.add((start_day_bnode, rdflib.TIME.day, rdflib.Literal(self.day_of_month)))
 			if self.month is not None:
@@ -586,7 +693,7 @@ class Memory(EolasModel):
 		verbose_name=_('description'),
 		null=False,
 		blank=True,
-		rdf_predicate=rdflib.DC.description,
+		rdf_predicate=DC.description,
 	)
 	year = RDFYearField(
 		verbose_name=_('year'),
@@ -597,11 +704,13 @@ class Memory(EolasModel):
 		rdf_label="Occured On",
 		db_comment='The point in time a memory is recalling.',
 	)
+	year_fields = ('year', 'year')
 	class Meta:
 		verbose_name = _('Memory')
 		verbose_name_plural = _('Memories')
 		ordering = ["year", "name"]
 		db_table_comment = "A remembered event or fact."
+		indexes = [models.Index(fields=['year'], name='memory_year_idx')]
 
 class Number(EolasModel):
 	rdf_type = EOLAS_NS.Number
@@ -641,23 +750,28 @@ class TransportMode(EolasModel):
 		return smart_title(self.name)
 
 	def get_rdf(self, include_type_label):
+		import rdflib
+		eolas = EOLAS_NS.resolve()
+		dbpedia = DBPEDIA_NS.resolve()
 		uri = rdflib.URIRef(self.get_absolute_url())
 		g = super().get_rdf(include_type_label)
-		g.add((uri, rdflib.RDFS.subClassOf, DBPEDIA_NS.MeanOfTransportation))
-		g.add((uri, EOLAS_NS.hasCategory, EOLAS_NS[self.category]))
+		g.add((uri, rdflib.RDFS.subClassOf, dbpedia.MeanOfTransportation))
+		g.add((uri, eolas.hasCategory, eolas[self.category]))
 		if include_type_label:
 			for lang, _ in settings.LANGUAGES:
 				with translation.override(lang):
-					g.add((EOLAS_NS[self.category], rdflib.SKOS.prefLabel, rdflib.Literal(translation.gettext(self.category), lang=lang)))
-					g.add((DBPEDIA_NS.MeanOfTransportation, rdflib.SKOS.prefLabel, rdflib.Literal(translation.gettext("Means of Transport"), lang=lang)))
+					g.add((eolas[self.category], rdflib.SKOS.prefLabel, rdflib.Literal(translation.gettext(self.category), lang=lang)))
+					g.add((dbpedia.MeanOfTransportation, rdflib.SKOS.prefLabel, rdflib.Literal(translation.gettext("Means of Transport"), lang=lang)))
 		return g
 
 	@classmethod
 	def get_ontology_rdf(cls):
+		import rdflib
+		dbpedia = DBPEDIA_NS.resolve()
 		g = rdflib.Graph()
 		for lang, _ in settings.LANGUAGES:
 			with translation.override(lang):
-				g.add((DBPEDIA_NS.MeanOfTransportation, rdflib.SKOS.prefLabel, rdflib.Literal(translation.gettext("Means of Transport"), lang=lang)))
+				g.add((dbpedia.MeanOfTransportation, rdflib.SKOS.prefLabel, rdflib.Literal(translation.gettext("Means of Transport"), lang=lang)))
 		return g
 
 
@@ -680,12 +794,10 @@ class Vehicle(EolasModel):
 		verbose_name_plural = _('Vehicles')
 		ordering = ["name"]
 
+	name_clash_fields = ('name', 'alternate_names')
+
 	def __str__(self):
-		qs = Vehicle.objects.filter(
-			models.Q(name__iexact=self.name) |
-			models.Q(alternate_names__contains=[self.name])
-		)
-		if qs.count() > 1:
+		if self.has_name_clash():
 			return f"{self.name} ({self.type})"
 		return self.name
 
@@ -710,30 +822,43 @@ class LanguageFamily(EolasModel):
 		ordering = ["name"]
 
 	def get_rdf(self, include_type_label):
+		import rdflib
+		eolas = EOLAS_NS.resolve()
+		loc = LOC_NS.resolve()
 		uri = rdflib.URIRef(self.get_absolute_url())
 		g = super().get_rdf(include_type_label)
-		if self.parent:
-			parent_uri = rdflib.URIRef(self.parent.get_absolute_url())
+		if self.parent_id:
+			# Only the parent's URI is needed, and that comes from its code alone
+			parent_uri = rdflib.URIRef(LanguageFamily(code=self.parent_id).get_absolute_url())
 		else:
-			parent_uri = LOC_NS.Language
+			parent_uri = loc.Language
 		g.add((uri, rdflib.RDFS.subClassOf, parent_uri))
-		g.add((uri, EOLAS_NS.hasCategory, EOLAS_NS[self.category]))
+		g.add((uri, eolas.hasCategory, eolas[self.category]))
 		if include_type_label:
 			for lang, _ in settings.LANGUAGES:
 				with translation.override(lang):
-					g.add((EOLAS_NS[self.category], rdflib.SKOS.prefLabel, rdflib.Literal(translation.gettext(self.category), lang=lang)))
+					g.add((eolas[self.category], rdflib.SKOS.prefLabel, rdflib.Literal(translation.gettext(self.category), lang=lang)))
 		return g
 
+	# Synthetic families (qli for language isolates, qsp for ISO 639 special codes) don't
+	# appear in iso639-5 or the library of congress list, so they need local URIs.
+	LOCAL_FAMILY_CODES = {"qli", "qsp"}
+
 	def get_absolute_url(self):
-		# Synthetic families (qli for language isolates, qsp for ISO 639 special codes) don't
-		# appear in iso639-5 or the library of congress list, so they need local URIs.
-		LOCAL_FAMILY_CODES = {"qli", "qsp"}
-		if self.pk in LOCAL_FAMILY_CODES:
+		if self.pk in self.LOCAL_FAMILY_CODES:
 			return f"{BASE_URL}/metadata/{self._meta.model_name}/{self.pk}/"
 		# For other language families, use the library of congress URI
 		else:
 			return f"http://id.loc.gov/vocabulary/iso639-5/{self.pk}"
 
+	@classmethod
+	def uri_expression(cls, pk_field='pk'):
+		return Case(
+			When(**{f'{pk_field}__in': sorted(cls.LOCAL_FAMILY_CODES)}, then=super().uri_expression(pk_field)),
+			When(**{f'{pk_field}__isnull': False}, then=Concat(Value("http://id.loc.gov/vocabulary/iso639-5/"), pk_field, output_field=models.TextField())),
+			output_field=models.TextField(),
+		)
+
 	def get_webhook_url(self):
 		# Always use the eolas-hosted URL for webhooks, regardless of whether the
 		# canonical identifier is the LoC URI. Arachne fetches this URL to retrieve
@@ -788,8 +913,11 @@ class Language(EolasModel):
 	)
 	@classmethod
 	def get_ontology_rdf(cls):
+		import rdflib
+		eolas = EOLAS_NS.resolve()
+		wdt = WDT_NS.resolve()
 		g = rdflib.Graph()
-		g.add((EOLAS_NS.languageIndigenousTo, rdflib.RDFS.subPropertyOf, WDT_NS.P2341))
+		g.add((eolas.languageIndigenousTo, rdflib.RDFS.subPropertyOf, wdt.P2341))
 		return g
 
 class Weather(EolasModel):
@@ -831,8 +959,11 @@ class EthnicGroup(EolasModel):
 	)
 	@classmethod
 	def get_ontology_rdf(cls):
+		import rdflib
+		eolas = EOLAS_NS.resolve()
+		wdt = WDT_NS.resolve()
 		g = rdflib.Graph()
-		g.add((EOLAS_NS.ethnicGroupIndigenousTo, rdflib.RDFS.subPropertyOf, WDT_NS.P2341))
+		g.add((eolas.ethnicGroupIndigenousTo, rdflib.RDFS.subPropertyOf, wdt.P2341))
 		return g
 
 class Direction(EolasModel):
@@ -845,7 +976,7 @@ class Direction(EolasModel):
 		db_table_comment = "The geographic location of a self relative to others"
 
 class Organisation(EolasModel):
-	rdf_type = rdflib.ORG.Organization
+	rdf_type = ORG.Organization
 	category = Category.ANTHROPOLOGICAL
 	class Meta:
 		verbose_name = _('Organisation')
@@ -877,19 +1008,21 @@ class CreativeWorkType(EolasModel):
 		return smart_title(self.name)
 
 	def get_rdf(self, include_type_label):
+		import rdflib
+		eolas = EOLAS_NS.resolve()
 		uri = rdflib.URIRef(self.get_absolute_url())
 		g = super().get_rdf(include_type_label)
 		g.add((uri, rdflib.RDFS.subClassOf, rdflib.SDO.CreativeWork))
-		g.add((uri, EOLAS_NS.hasCategory, EOLAS_NS[self.category]))
+		g.add((uri, eolas.hasCategory, eolas[self.category]))
 		if include_type_label:
 			for lang, _ in settings.LANGUAGES:
 				with translation.override(lang):
-					g.add((EOLAS_NS[self.category], rdflib.SKOS.prefLabel, rdflib.Literal(translation.gettext(self.category), lang=lang)))
+					g.add((eolas[self.category], rdflib.SKOS.prefLabel, rdflib.Literal(translation.gettext(self.category), lang=lang)))
 					g.add((rdflib.SDO.CreativeWork, rdflib.SKOS.prefLabel, rdflib.Literal(translation.gettext("Creative Work"), lang=lang)))
 		return g
 
 class CreativeWork(EolasModel):
-	rdf_type = rdflib.SDO.CreativeWork
+	rdf_type = SDO.CreativeWork
 	name = RDFNameField(unique=False)
 	type = RDFForeignKey(
 		CreativeWorkType,
@@ -903,7 +1036,7 @@ class CreativeWork(EolasModel):
 		ordering = ["name"]
 
 class Person(EolasModel):
-	rdf_type = rdflib.FOAF.Person
+	rdf_type = FOAF.Person
 	category = Category.PEOPLE
 	name = RDFNameField(unique=False)
 	fictional = RDFBooleanField(
@@ -918,12 +1051,10 @@ class Person(EolasModel):
 		ordering = ["name"]
 		db_table_comment = "An individual human being."
 
+	name_clash_fields = ('name', 'alternate_names')
+
 	def __str__(self):
-		qs = Person.objects.filter(
-			models.Q(name__iexact=self.name) |
-			models.Q(alternate_names__contains=[self.name])
-		)
-		if qs.count() > 1:
+		if self.has_name_clash():
 			suffix = 'fictional' if self.fictional else 'real'
 			return f"{self.name} ({suffix})"
 		return self.name
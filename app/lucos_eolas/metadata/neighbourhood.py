@@ -0,0 +1,111 @@
+"""
+The neighbourhood of an item: everything within a few hops of it, as one RDF graph.
+
+A breadth-first search, a level at a time.  Each level's items are fetched a
+type at a time, in one query plus the few EolasModel.preload() needs, so the
+number of queries depends on the depth and on which types are reached, never
+on how many items are.
+
+The hops out of an item are the eolas items its own RDF points at (its type,
+the places it's contained in, a festival's commemorated event, ...).  The hops
+into it are relations declared with an rdf_inverse_predicate (the places it
+contains, a festival's periods, the languages spoken in a place, ...), which
+are added to the graph with that inverse predicate.  Either kind can be limited
+to a set of predicates.
+
+Items are described as get_rdf() describes them, without type labels: the
+ontology (/ontology) has those.
+"""
+
+from collections import defaultdict
+
+from django.apps import apps
+
+from .importer import resolve_uri
+
+MAX_DEPTH = 3
+
+
+def parse_predicates(text):
+	"""Return the set of predicates listed, comma-separated, in text, as full URIs
+	or prefixed names (e.g. eolas:containedIn).  Raises ValueError for an unknown prefix."""
+	import rdflib
+	from .views import bind_namespaces
+	g = rdflib.Graph()
+	bind_namespaces(g)
+	predicates = set()
+	for name in text.split(','):
+		name = name.strip()
+		if '://' in name:
+			predicates.add(rdflib.URIRef(name))
+		elif name:
+			predicates.add(g.namespace_manager.expand_curie(name))
+	return predicates
+
+
+def _inverse_relations(model_class):
+	"""Yield (field, inverse predicate) for the relations from other items to items of model_class
+	which declare an inverse predicate."""
+	for other in apps.get_app_config('metadata').get_models():
+		for field in other._meta.get_fields():
+			if (field.many_to_one or field.many_to_many) and not field.auto_created and field.related_model is model_class and getattr(field, 'rdf_inverse_predicate', None):
+				yield field, field.rdf_inverse_predicate
+
+
+def _inverse_links(field, pks):
+	"""Return (pk of an item of field.related_model, pk of an item linking to it) for
+	every link through field to any of pks, in one query."""
+	if field.many_to_one:
+		return field.model.objects.filter(**{f'{field.attname}__in': pks}).values_list(field.attname, 'pk')
+	through = field.remote_field.through
+	source = through._meta.get_field(field.m2m_field_name()).attname
+	target = through._meta.get_field(field.m2m_reverse_field_name()).attname
+	return through.objects.filter(**{f'{target}__in': pks}).values_list(target, source)
+
+
+def neighbourhood(model_class, pk, depth, predicates=None):
+	"""Return a graph of the item of model_class with the given pk and everything up to
+	depth hops from it, following only the given predicates (or all of them, given None).
+	Returns None if there's no such item."""
+	import rdflib
+	g = rdflib.Graph()
+	seen = {(model_class, pk)}
+	frontier = {model_class: {pk}}
+	for level in range(depth + 1):
+		expand = level < depth
+		next_frontier = defaultdict(set)
+
+		def visit(other_model, other_pk):
+			other_pk = other_model._meta.pk.to_python(other_pk)
+			if (other_model, other_pk) not in seen:
+				seen.add((other_model, other_pk))
+				next_frontier[other_model].add(other_pk)
+
+		for level_model, pks in frontier.items():
+			objs = list(level_model.objects.filter(pk__in=pks))
+			if level == 0 and not objs:
+				return None
+			level_model.preload(objs)
+			uris = {}
+			for obj in objs:
+				item_graph = obj.get_rdf(include_type_label=False)
+				g += item_graph
+				uris[obj.pk] = subject = rdflib.URIRef(obj.get_absolute_url())
+				if not expand:
+					continue
+				for predicate, target in item_graph.predicate_objects(subject):
+					if isinstance(target, rdflib.URIRef) and (predicates is None or predicate in predicates):
+						resolved = resolve_uri(str(target))
+						if resolved:
+							visit(*resolved)
+			if not expand:
+				continue
+			for field, inverse_predicate in _inverse_relations(level_model):
+				if predicates is not None and inverse_predicate not in predicates:
+					continue
+				for target_pk, source_pk in _inverse_links(field, list(uris)):
+					source_uri = rdflib.URIRef(field.model(pk=source_pk).get_absolute_url())
+					g.add((uris[target_pk], inverse_predicate, source_uri))
+					visit(field.model, source_pk)
+		frontier = next_frontier
+	return g
@@ -0,0 +1,86 @@
+"""
+Lazily-resolved RDF terms, so that rdflib is only imported on first RDF use.
+
+Models and fields declare their RDF vocabulary at class-definition time
+(rdf_type, rdf_predicate, ...).  Declaring those with rdflib objects would make
+every process which imports the models (management commands, the test runner,
+collectstatic, and workers which only ever serve /_info, admin pages or JSON)
+pay for importing rdflib.  Instead they're declared as LazyTerms, which turn
+into rdflib.URIRefs when they're first read:
+
+  * as class attributes, LazyTerms are descriptors, so `Model.rdf_type` and
+    `obj.rdf_type` give the URIRef directly.
+  * fields store them as given, and their rdf_predicate/rdf_inverse_predicate
+    properties call resolve().
+
+Code that builds graphs imports rdflib itself, and gets real rdflib namespaces
+from LazyNamespace.resolve().
+"""
+
+import os
+
+BASE_URL = os.environ.get("APP_ORIGIN")
+
+
+class LazyTerm:
+	"""A URI which becomes an rdflib.URIRef the first time it's needed."""
+	__slots__ = ('uri', '_ref')
+
+	def __init__(self, uri):
+		self.uri = uri
+		self._ref = None
+
+	def resolve(self):
+		if self._ref is None:
+			from rdflib import URIRef
+			self._ref = URIRef(self.uri)
+		return self._ref
+
+	def __get__(self, instance, owner=None):
+		return self.resolve()
+
+	def __repr__(self):
+		return f"LazyTerm({self.uri!r})"
+
+
+class LazyNamespace:
+	"""Counterpart of rdflib.Namespace which hands out LazyTerms."""
+
+	def __init__(self, base):
+		self.base = base
+		self._namespace = None
+
+	def __getattr__(self, name):
+		if name.startswith('_'):
+			raise AttributeError(name)
+		return LazyTerm(self.base + name)
+
+	def __getitem__(self, name):
+		return LazyTerm(self.base + name)
+
+	def resolve(self):
+		"""Return the equivalent rdflib.Namespace."""
+		if self._namespace is None:
+			from rdflib import Namespace
+			self._namespace = Namespace(self.base)
+		return self._namespace
+
+
+def resolve(term):
+	"""Return term as an rdflib term, if it's lazy; otherwise return it unchanged."""
+	return term.resolve() if isinstance(term, LazyTerm) else term
+
+
+EOLAS_NS = LazyNamespace(f"{BASE_URL}/ontology/")
+DBPEDIA_NS = LazyNamespace("https://dbpedia.org/ontology/")
+LOC_NS = LazyNamespace("http://www.loc.gov/mads/rdf/v1#")
+WDT_NS = LazyNamespace("http://www.wikidata.org/prop/direct/")
+
+# The vocabularies which rdflib bundles, as used in model and field declarations
+DC = LazyNamespace("http://purl.org/dc/elements/1.1/")
+FOAF = LazyNamespace("http://xmlns.com/foaf/0.1/")
+ORG = LazyNamespace("http://www.w3.org/ns/org#")
+OWL = LazyNamespace("http://www.w3.org/2002/07/owl#")
+SDO = LazyNamespace("https://schema.org/")
+TIME = LazyNamespace("http://www.w3.org/2006/time#")
+XSD = LazyNamespace("http://www.w3.org/2001/XMLSchema#")
@@ -0,0 +1,76 @@
+"""
+Rollups over the places contained in a place, at any depth.
+
+Each rollup finds every place under a given one by walking contained_in
+downwards with a recursive query, and returns the items linked to any of
+them, in that same query.  So "which languages are spoken anywhere in Europe"
+is one query, rather than one per place in Europe.  Results are cached per
+place until places, or the items being rolled up, change (see caching.py);
+changing a place's contained_in, or an item's links to places, changes both.
+
+Only contained_in is followed: a place which is partially contained in
+another isn't counted as under it.
+"""
+
+from django.db.models.expressions import RawSQL
+
+from .caching import versioned_cache
+from .models import EthnicGroup, Language, Place
+
+# A model, and the fields linking its items to places, for each rollup
+ROLLUPS = {
+	'languages': (Language, ['indigenous_to', 'widely_spoken_in']),
+	'ethnicgroups': (EthnicGroup, ['indigenous_to']),
+	'places': (Place, []),
+}
+
+
+def _columns(model_class, field_name):
+	"""The table of a many-to-many field's links, and its columns for either end."""
+	field = model_class._meta.get_field(field_name)
+	through = field.remote_field.through._meta
+	return through.db_table, through.get_field(field.m2m_field_name()).column, through.get_field(field.m2m_reverse_field_name()).column
+
+
+def rollup_sql(model_class, link_fields):
+	"""SQL for the primary keys of the items of model_class linked, through any of
+	link_fields, to a place (the only parameter) or anything in it; or, given no
+	link_fields, for the place and everything in it.
+
+	UNION rather than UNION ALL, so that a loop in the hierarchy can't recurse forever.
+	"""
+	containment, contained_column, container_column = _columns(Place, 'contained_in')
+	if link_fields:
+		selects = []
+		for name in link_fields:
+			table, item_column, place_column = _columns(model_class, name)
+			selects.append(f"SELECT {item_column} FROM {table} WHERE {place_column} IN (SELECT id FROM subtree)")
+		body = " UNION ".join(selects)
+	else:
+		body = "SELECT id FROM subtree"
+	return f"""
+		WITH RECURSIVE subtree(id) AS (
+			SELECT %s::bigint
+			UNION
+			SELECT containment.{contained_column} FROM {containment} AS containment
+			JOIN subtree ON containment.{container_column} = subtree.id
+		)
+		{body}
+	"""
+
+
+def rollup(name, place_pk):
+	"""Return [{id, uri, name}, ...], ordered by name, for the named rollup under
+	the place with the given pk, or None if there's no such place."""
+	model_class, link_fields = ROLLUPS[name]
+
+	def compute():
+		if not Place.objects.filter(pk=place_pk).exists():
+			return None
+		items = model_class.objects.filter(pk__in=RawSQL(rollup_sql(model_class, link_fields), [place_pk])).only('pk', 'name').order_by('name', 'pk')
+		if model_class is Place:
+			items = items.exclude(pk=place_pk)
+		return [{'id': item.pk, 'uri': item.get_absolute_url(), 'name': item.name} for item in items]
+
+	models = [Place] if model_class is Place else [Place, model_class]
+	return versioned_cache(f'place-rollup:{name}:{place_pk}', models, compute)
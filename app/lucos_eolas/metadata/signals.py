@@ -1,8 +1,14 @@
 from django.apps import apps
 from django.db import transaction
 from django.db.models.signals import post_save, post_delete
+from django.dispatch import Signal
+from django.utils import timezone
 from loganne import updateLoganne
 
+# Sent after items are written in bulk, bypassing their post_save signals, with
+# `models`: the model classes written to (including any many-to-many through models)
+bulk_loaded = Signal()
+
 def metadata_post_save(sender, instance, created, **kwargs):
 	item_type = instance._meta.verbose_name.title()
 	event_type = "itemCreated" if created else "itemUpdated"
@@ -19,3 +25,18 @@ def metadata_post_delete(sender, instance, **kwargs):
 	transaction.on_commit(
 		lambda: updateLoganne(type="itemDeleted", humanReadable=human, url=url, level="routine", itemType=item_type)
 	)
+
+def touch_after_m2m_change(sender, instance, action, reverse, model, pk_set, **kwargs):
+	"""Mark items as modified when their links change, as saving them would.
+
+	An item's links are part of its data, but changing them doesn't save it.
+	When the links are changed from the other end, it's the items on that end
+	(pk_set) whose data changed; after a clear from the other end, which they
+	were isn't known any more.
+	"""
+	if not action.startswith('post_'):
+		return
+	now = timezone.now()
+	type(instance).objects.filter(pk=instance.pk).update(modified=now)
+	if reverse and pk_set:
+		model.objects.filter(pk__in=pk_set).update(modified=now)
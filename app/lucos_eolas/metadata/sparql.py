@@ -0,0 +1,223 @@
+"""
+SPARQL over everything in eolas, from a graph each process keeps in memory.
+
+The graph holds what the triple table does (see derived/triples.py), which is
+what /metadata/all/data/ serves.  It's read into memory on first use (or at
+worker startup: see gunicorn.conf.py), and again whenever the table has
+changed since, as dumps.data_version() tells, however it was changed and by
+whichever process.  Requests check the version at most every CHECK_INTERVAL
+seconds, and never wait for a rebuild: it runs in a thread of its own, and
+queries go on reading the graph they have until the new one is swapped in.
+Only the very first query waits for a graph, for as long as its timeout.
+
+A graph is never changed once it's built, so queries read it without any
+lock held.  Results are cached by query text, result format and the data
+version of the graph they were computed from, so every process shares them.
+
+rdflib has no way to interrupt a query, so each runs in a thread of its own,
+which is abandoned if it overruns the timeout.  An abandoned query goes on
+running until it's done, and holds one of QUERY_THREADS until then, so a
+process only ever has that many running at once.  Queries can't reach beyond
+eolas's own data: SERVICE, and FROM clauses which would load graphs from the
+web, are refused.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import connections
+
+from . import dumps
+
+logger = logging.getLogger(__name__)
+
+# Seconds a query may run for
+QUERY_TIMEOUT = 10
+# Queries which can be running at once in each process, counting abandoned ones
+QUERY_THREADS = 2
+# Seconds between checks of whether the data has changed since the graph was built
+CHECK_INTERVAL = 5
+# Seconds results are cached for
+RESULT_TIMEOUT = 300
+
+
+class QueryError(Exception):
+	"""The query can't be run: it's malformed, or does something not allowed here."""
+
+
+class QueryTimeout(Exception):
+	pass
+
+
+def _build():
+	"""An rdflib graph of the whole triple table, read a chunk of rows at a time."""
+	import rdflib
+	from rdflib.plugins.parsers.ntriples import NTGraphSink, W3CNTriplesParser
+	from ..derived import triples
+	from .views import bind_namespaces
+	graph = rdflib.Graph()
+	bind_namespaces(graph)
+	# One parser throughout, so a blank node split across chunks stays one node
+	parser = W3CNTriplesParser(NTGraphSink(graph), bnode_context={})
+	for text in triples.ntriples():
+		parser.parsestring(text)
+	return graph
+
+
+def _in_background(function):
+	def run():
+		try:
+			function()
+		finally:
+			# Hand the connection back (to the pool, if there is one) rather
+			# than holding it while idle
+			connections.close_all()
+	threading.Thread(target=run, name='eolas-sparql-build', daemon=True).start()
+
+
+def _evaluate(graph, prepared):
+	"""Run a prepared query, returning its rdflib Result with any SELECT results fully read."""
+	from rdflib.query import Result
+	result = graph.query(prepared)
+	if result.type != 'SELECT':
+		return result
+	complete = Result('SELECT')
+	complete.vars = result.vars
+	complete.bindings = [row.asdict() for row in result]
+	return complete
+
+
+_query_threads = threading.BoundedSemaphore(QUERY_THREADS)
+
+
+class LiveGraph:
+	"""The per-process graph, rebuilt in the background whenever the data changes."""
+
+	def __init__(self):
+		# Held briefly, to read or change any of the fields below
+		self._lock = threading.Lock()
+		self._graph = None
+		# The data version the graph was built from
+		self.version = None
+		self._checked_at = None
+		self._building = False
+		self._built = threading.Event()
+
+	def snapshot(self, timeout=QUERY_TIMEOUT):
+		"""Return (graph, data version) for a query to read, having started a rebuild
+		in the background if the data has changed since the graph was built.
+
+		Waits up to timeout seconds if no graph has been built yet, then raises QueryTimeout.
+		"""
+		self._check()
+		if not self._built.wait(timeout):
+			raise QueryTimeout()
+		with self._lock:
+			return self._graph, self.version
+
+	def _check(self):
+		with self._lock:
+			now = time.monotonic()
+			if self._checked_at is not None and now - self._checked_at < CHECK_INTERVAL:
+				return
+			self._checked_at = now
+		if dumps.data_version() != self.version:
+			self.refresh_in_background()
+
+	def refresh_in_background(self):
+		"""Start refresh() in a thread of its own, unless it's already running."""
+		with self._lock:
+			if self._building:
+				return
+			self._building = True
+		_in_background(self.refresh)
+
+	def refresh(self):
+		"""Rebuild the graph if the data has changed since it was built, and swap it in."""
+		try:
+			started = time.perf_counter()
+			version = dumps.data_version()
+			if version == self.version:
+				return
+			graph = _build()
+			with self._lock:
+				self._graph = graph
+				self.version = version
+			self._built.set()
+			logger.info("Built SPARQL graph of %d triples in %.1fs", len(graph), time.perf_counter() - started)
+		except Exception:
+			logger.exception("Building the SPARQL graph failed")
+		finally:
+			with self._lock:
+				self._building = False
+
+
+def run(graph, text, timeout=QUERY_TIMEOUT):
+	"""Run a query, returning its rdflib Result with any SELECT results fully read.
+
+	Raises QueryTimeout if it hasn't finished within timeout seconds, leaving
+	it to finish in its thread.
+	"""
+	prepared = prepare(text)
+	deadline = time.monotonic() + timeout
+	if not _query_threads.acquire(timeout=max(timeout, 0)):
+		raise QueryTimeout()
+	outcome = {}
+
+	def evaluate():
+		try:
+			outcome['result'] = _evaluate(graph, prepared)
+		except Exception as error:
+			outcome['error'] = error
+		finally:
+			_query_threads.release()
+	thread = threading.Thread(target=evaluate, name='sparql-query', daemon=True)
+	thread.start()
+	thread.join(max(deadline - time.monotonic(), 0))
+	if thread.is_alive():
+		logger.warning("Abandoned SPARQL query after %ss", timeout)
+		raise QueryTimeout()
+	if 'error' in outcome:
+		raise outcome['error']
+	return outcome['result']
+
+
+def prepare(text):
+	"""Parse a query, raising QueryError if it's malformed, an update, or reaches outside eolas."""
+	from pyparsing import ParseException
+	from rdflib.plugins.sparql import prepareQuery
+	from rdflib.plugins.sparql.algebra import traverse
+	try:
+		prepared = prepareQuery(text)
+	except ParseException as error:
+		raise QueryError(f"Malformed query: {error}")
+	except Exception as error:
+		# rdflib raises all sorts for queries it can't translate
+		raise QueryError(f"Can't run query: {error}")
+	if prepared.algebra.get('datasetClause'):
+		raise QueryError("FROM and FROM NAMED aren't supported: the dataset is everything in eolas")
+
+	def refuse_service(node):
+		if getattr(node, 'name', None) == 'ServiceGraphPattern':
+			raise QueryError("SERVICE isn't supported")
+	traverse(prepared.algebra, visitPre=refuse_service)
+	return prepared
+
+
+def cached_query(text, format, serialize, timeout=QUERY_TIMEOUT):
+	"""Return serialize(result) for the query, cached until the data changes."""
+	deadline = time.monotonic() + timeout
+	digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+	graph, version = live_graph.snapshot(timeout)
+	key = f'sparql:{version}:{format}:{digest}'
+	body = cache.get(key)
+	if body is None:
+		body = serialize(run(graph, text, deadline - time.monotonic()))
+		cache.set(key, body, RESULT_TIMEOUT)
+	return body
+
+
+live_graph = LiveGraph()
@@ -1,18 +1,30 @@
 import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlencode
 from django.core.cache import cache
 from django.test import SimpleTestCase, TestCase, override_settings
 from django.contrib.auth.models import User
-from django.http import QueryDict
+from django.http import HttpResponse, QueryDict
+from django.utils.http import parse_http_date
+from unittest import skipUnless
 from unittest.mock import patch, MagicMock, call
 from django.core.exceptions import ValidationError
 from .checks import (
     get_place_consistency_checks, get_wikipedia_slug_check, _check_no_invalid_wikipedia_slugs,
     UNIVERSE_PLACE_ID, refresh_check_cache, get_cached_checks, CHECKS_CACHE_KEY,
 )
+from . import dumps as dumps_module
 from .fields import ArrayWidget
-from .models import DayOfWeek, Calendar, Month, HistoricalEvent, Festival, FestivalPeriod, Language, LanguageFamily, TransportMode, Vehicle, Person, CreativeWork, CreativeWorkType, PlaceType
+from .models import DayOfWeek, Calendar, Month, HistoricalEvent, Memory, Festival, FestivalPeriod, Language, LanguageFamily, TransportMode, Vehicle, Person, CreativeWork, CreativeWorkType, PlaceType
 from .utils_case import smart_lower, smart_title
 from .views import _safe_local_redirect
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 
 # ─── HTTP Endpoint Tests ───────────────────────────────────────────────────────
@@ -24,6 +36,11 @@ class InfoEndpointTest(TestCase):
 		response = self.client.get('/_info')
 		self.assertEqual(response.status_code, 200)
 
+	def test_cacheable_briefly(self):
+		response = self.client.get('/_info')
+		self.assertIn('public', response['Cache-Control'])
+		self.assertIn('max-age=10', response['Cache-Control'])
+
 	def test_returns_expected_fields(self):
 		response = self.client.get('/_info')
 		data = response.json()
@@ -31,6 +48,18 @@ class InfoEndpointTest(TestCase):
 		self.assertIn('checks', data)
 		self.assertIn('ci', data)
 
+	def test_reports_db_pool_metrics(self):
+		metrics = self.client.get('/_info').json()['metrics']
+		for name in ('db-pool-checkouts', 'db-pool-waits', 'db-pool-errors'):
+			self.assertIsInstance(metrics[name]['value'], int)
+			self.assertIn('techDetail', metrics[name])
+
+	def test_no_db_pool_metrics_without_pool(self):
+		with patch('lucos_eolas.metadata.views.connection') as mock_connection:
+			mock_connection.pool = None
+			metrics = self.client.get('/_info').json()['metrics']
+		self.assertNotIn('db-pool-checkouts', metrics)
+
 
 class InfoEndpointCacheTest(TestCase):
 	"""/_info reads from cache and returns pending placeholders on cold start."""
@@ -160,6 +189,11 @@ class CategoriesJsonEndpointTest(SimpleTestCase):
 		response = self.client.get('/metadata/categories.json')
 		self.assertIn('application/json', response['Content-Type'])
 
+	def test_publicly_cacheable(self):
+		response = self.client.get('/metadata/categories.json')
+		self.assertIn('public', response['Cache-Control'])
+		self.assertIn('max-age=3600', response['Cache-Control'])
+
 	def test_returns_list(self):
 		response = self.client.get('/metadata/categories.json')
 		data = response.json()
@@ -229,6 +263,13 @@ class OntologyEndpointTest(SimpleTestCase):
 		response = self.client.get('/ontology', HTTP_ACCEPT='application/ld+json')
 		self.assertIn('application/ld+json', response['Content-Type'])
 
+	def test_publicly_cacheable_per_accept_header(self):
+		"""nginx caches the ontology (see web/routing.conf), keeping a copy per format."""
+		response = self.client.get('/ontology')
+		self.assertIn('public', response['Cache-Control'])
+		self.assertIn('max-age=3600', response['Cache-Control'])
+		self.assertIn('Accept', response['Vary'])
+
 	def test_ontology_includes_preferred_identifier(self):
 		import rdflib
 		response = self.client.get('/ontology')
@@ -315,6 +356,25 @@ class TypeListEndpointTest(TestCase):
 		item = response.json()[0]
 		self.assertEqual(item['order'], 3)
 
+	def test_ndjson_streams_one_item_per_line(self):
+		for order, name in enumerate(['Monday', 'Tuesday', 'Wednesday'], start=1):
+			DayOfWeek.objects.create(name=name, order=order)
+		expected = self.client.get('/metadata/dayofweek/list/', **self.AUTH).json()
+		# A chunk size smaller than the table, so the stream spans several chunks
+		with patch('lucos_eolas.metadata.views.CHUNK_SIZE', 2):
+			response = self.client.get('/metadata/dayofweek/list/', HTTP_ACCEPT='application/x-ndjson', **self.AUTH)
+			self.assertEqual(response.status_code, 200)
+			self.assertTrue(response.streaming)
+			self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+			body = response.getvalue().decode()
+		self.assertTrue(body.endswith('\n'))
+		self.assertEqual([json.loads(line) for line in body.splitlines()], expected)
+
+	def test_json_preferred_over_ndjson(self):
+		response = self.client.get('/metadata/dayofweek/list/', HTTP_ACCEPT='application/json, application/x-ndjson;q=0.5', **self.AUTH)
+		self.assertFalse(response.streaming)
+		self.assertEqual(response.json(), [])
+
 	def test_item_includes_alternate_names_and_wikipedia_slug(self):
 		# alternate_names and wikipedia_slug are real fields — they must be included
 		DayOfWeek.objects.create(name='Thursday', order=4, wikipedia_slug='Thursday')
@@ -377,6 +437,99 @@ class AllRdfEndpointTest(TestCase):
 		self.assertIn('application/ld+json', response['Content-Type'])
 
 
+class TypeDataEndpointTest(TestCase):
+	"""/metadata/<type>/data/ returns the RDF of every item of one type."""
+
+	AUTH = {'HTTP_AUTHORIZATION': 'key key'}
+
+	def setUp(self):
+		from .models import Place
+		self.Place = Place
+		self.region = PlaceType.objects.create(name='region', plural='regions')
+		self.uk = Place.objects.create(name='United Kingdom', type=self.region)
+		self.wales = Place.objects.create(name='Wales', type=self.region)
+		self.wales.contained_in.add(self.uk)
+
+	def _graph(self, path, accept='text/turtle'):
+		import rdflib
+		response = self.client.get(path, HTTP_ACCEPT=accept, **self.AUTH)
+		content = b''.join(response.streaming_content) if response.streaming else response.content
+		self.assertEqual(response.status_code, 200, content)
+		return rdflib.Graph().parse(data=content, format='nt' if accept == 'application/n-triples' else 'turtle')
+
+	def _subjects(self, g):
+		return {str(subject) for subject in g.subjects() if '/metadata/' in str(subject)}
+
+	def test_returns_items_of_type(self):
+		from rdflib.compare import isomorphic
+		g = self._graph('/metadata/place/data/')
+		self.assertEqual(self._subjects(g), {self.uk.get_absolute_url(), self.wales.get_absolute_url()})
+		expected = self.uk.get_rdf(include_type_label=False) + self.wales.get_rdf(include_type_label=False)
+		self.assertTrue(isomorphic(g, expected))
+
+	def test_ntriples_streamed(self):
+		import rdflib
+		response = self.client.get('/metadata/place/data/', HTTP_ACCEPT='application/n-triples', **self.AUTH)
+		self.assertTrue(response.streaming)
+		g = rdflib.Graph().parse(data=b''.join(response.streaming_content), format='nt')
+		self.assertEqual(self._subjects(g), {self.uk.get_absolute_url(), self.wales.get_absolute_url()})
+
+	@override_settings(EOLAS_ADMISSION={'export': {'concurrency': 1, 'queue': 0, 'wait': 0, 'retry_after': 7}})
+	def test_ntriples_hold_export_slot_until_streamed(self):
+		from lucos_eolas import admission
+		admission._pools.clear()
+		self.addCleanup(admission._pools.clear)
+		path = '/metadata/place/data/'
+		response = self.client.get(path, HTTP_ACCEPT='application/n-triples', **self.AUTH)
+		self.assertEqual(self.client.get(path, HTTP_ACCEPT='application/n-triples', **self.AUTH).status_code, 429)
+		# Reading the whole body closes the response, as the WSGI server does
+		b''.join(response.streaming_content)
+		self.assertEqual(self.client.get(path, HTTP_ACCEPT='application/n-triples', **self.AUTH).status_code, 200)
+
+	def test_since(self):
+		self.Place.objects.filter(pk=self.uk.pk).update(modified=datetime(2020, 1, 1, tzinfo=timezone.utc))
+		for since in ('2021-01-01', '2021-01-01T00:00:00Z', '2021-01-01T00:00:00+00:00'):
+			with self.subTest(since=since):
+				g = self._graph(f'/metadata/place/data/?{urlencode({"since": since})}')
+				self.assertEqual(self._subjects(g), {self.wales.get_absolute_url()})
+		# As sent by clients which don't escape the +
+		g = self._graph('/metadata/place/data/?since=2019-12-31T00:00:00+00:00')
+		self.assertEqual(self._subjects(g), {self.uk.get_absolute_url(), self.wales.get_absolute_url()})
+
+	def test_linking_marks_items_modified(self):
+		past = datetime(2020, 1, 1, tzinfo=timezone.utc)
+		scotland = self.Place.objects.create(name='Scotland', type=self.region)
+		self.Place.objects.update(modified=past)
+		scotland.contained_in.add(self.uk)
+		self.assertGreater(self.Place.objects.get(pk=scotland.pk).modified, past)
+		self.Place.objects.update(modified=past)
+		# From the other end, it's Wales whose data changes
+		self.uk.contains.remove(self.wales)
+		self.assertGreater(self.Place.objects.get(pk=self.wales.pk).modified, past)
+
+	def test_renaming_marks_items_named_after_it_modified(self):
+		past = datetime(2020, 1, 1, tzinfo=timezone.utc)
+		self.Place.objects.create(name='Wales', type=PlaceType.objects.create(name='town', plural='towns'))
+		self.Place.objects.update(modified=past)
+		with self.captureOnCommitCallbacks(execute=True):
+			self.region.name = 'nation'
+			self.region.save()
+		g = self._graph(f'/metadata/place/data/?{urlencode({"since": "2021-01-01"})}', accept='application/n-triples')
+		# Wales is labelled "Wales (Nation)" now; the UK, which has no namesake, isn't relabelled
+		self.assertEqual(self._subjects(g), {self.wales.get_absolute_url()})
+
+	def test_bad_since(self):
+		for since in ('yesterday', '2021-13-01'):
+			with self.subTest(since=since):
+				self.assertEqual(self.client.get('/metadata/place/data/', {'since': since}, **self.AUTH).status_code, 400)
+
+	def test_unknown_type_returns_404(self):
+		self.assertEqual(self.client.get('/metadata/nonexistenttype/data/', **self.AUTH).status_code, 404)
+
+	def test_requires_auth(self):
+		self.assertEqual(self.client.get('/metadata/place/data/').status_code, 401)
+
+
 class AllRdfPrefLabelRegressionTest(TestCase):
 	"""Regression: ontology prefLabels for external-namespace parent classes appear in the bulk RDF export.
 
@@ -498,6 +651,21 @@ class BatchNamesEndpointTest(TestCase):
 		response = self._post([])
 		self.assertIn('application/json', response['Content-Type'])
 
+	def test_ndjson_streams_one_object_per_line(self):
+		person = Person.objects.create(name='David Bowie')
+		uri = person.get_absolute_url()
+		response = self.client.post(
+			'/metadata/names',
+			data=json.dumps([uri, 'http://localhost/metadata/nope/1/']),
+			content_type='application/json',
+			HTTP_ACCEPT='application/x-ndjson',
+			**self.AUTH,
+		)
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+		lines = response.getvalue().decode().splitlines()
+		self.assertEqual([json.loads(line) for line in lines], [{'uri': uri, 'name': 'David Bowie'}])
+
 	def test_resolves_known_uri(self):
 		person = Person.objects.create(name='David Bowie')
 		uri = person.get_absolute_url()
@@ -611,6 +779,1442 @@ class SafeLocalRedirectTest(SimpleTestCase):
 		self.assertEqual(_safe_local_redirect('//evil.example.com/phish'), '/')
 
 
+class MachineRouteMiddlewareTest(TestCase):
+	"""Browser-only middleware is skipped for @api_auth / @machine_route views."""
+
+	def test_api_routes_are_machine_routes(self):
+		from lucos_eolas.middleware import is_machine_route
+		for path in [
+			'/metadata/names',
+			'/metadata/all/data/',
+			'/metadata/dayofweek/list/',
+			'/metadata/dayofweek/1/data/',
+			'/api/metadata/dayofweek/',
+			'/ontology',
+			'/_info',
+		]:
+			self.assertTrue(is_machine_route(path), path)
+
+	def test_admin_routes_are_not_machine_routes(self):
+		from lucos_eolas.middleware import is_machine_route
+		for path in [
+			'/',
+			'/metadata/dayofweek/',
+			'/metadata/dayofweek/1/change/',
+			'/metadata/dayofweek/1/',
+			'/no/such/path',
+		]:
+			self.assertFalse(is_machine_route(path), path)
+
+	def test_bearer_api_key_is_not_verified_as_aithne_jwt(self):
+		with patch('lucos_eolas.lucosauth.middleware.verify_aithne_token') as mock_verify:
+			response = self.client.get('/metadata/dayofweek/list/', HTTP_AUTHORIZATION='bearer key')
+		self.assertEqual(response.status_code, 200)
+		mock_verify.assert_not_called()
+
+	def test_browser_route_still_verifies_aithne_jwt(self):
+		with patch('lucos_eolas.lucosauth.middleware.verify_aithne_token', return_value=None) as mock_verify:
+			self.client.get('/', HTTP_AUTHORIZATION='bearer not.a.jwt')
+		mock_verify.assert_called_once()
+
+	def test_api_route_skips_locale_negotiation(self):
+		response = self.client.get('/metadata/dayofweek/list/', HTTP_AUTHORIZATION='key key', HTTP_ACCEPT_LANGUAGE='en')
+		self.assertNotIn('Content-Language', response)
+
+	def test_api_route_needs_no_session_or_user_queries(self):
+		self.client.cookies['sessionid'] = 'abcdef0123456789abcdef0123456789'
+		with self.assertNumQueries(1):
+			self.client.get('/metadata/dayofweek/list/', HTTP_AUTHORIZATION='key key')
+
+
+@override_settings(EOLAS_ADMISSION={
+	'tiny': {'concurrency': 1, 'queue': 0, 'wait': 1, 'retry_after': 7},
+	'queued': {'concurrency': 1, 'queue': 1, 'wait': 0.05, 'retry_after': 7},
+	'shared': {'concurrency': 1, 'queue': 3, 'wait': 5, 'retry_after': 7},
+	'shared-short-queue': {'concurrency': 1, 'queue': 1, 'wait': 5, 'retry_after': 7},
+})
+class AdmissionControlTest(SimpleTestCase):
+	"""cost_class limits concurrency per cost class and coalesces identical requests."""
+
+	def setUp(self):
+		from django.test import RequestFactory
+		from lucos_eolas import admission
+		admission._pools.clear()
+		self.factory = RequestFactory()
+		self.started = threading.Event()
+		self.release = threading.Event()
+		self.calls = 0
+
+	def _blocking_view(self, request):
+		self.calls += 1
+		self.started.set()
+		self.release.wait(timeout=5)
+		return HttpResponse(b'dump', content_type='text/turtle')
+
+	def _in_thread(self, view, results):
+		def run():
+			results.append(view(self.factory.get('/dump')))
+		thread = threading.Thread(target=run)
+		thread.start()
+		return thread
+
+	def test_unconfigured_class_is_unlimited(self):
+		from lucos_eolas.admission import cost_class, get_pool
+		view = cost_class('cheap')(lambda request: HttpResponse(b'ok'))
+		self.assertEqual(view(self.factory.get('/')).status_code, 200)
+		self.assertIsNone(get_pool('cheap'))
+
+	def test_full_pool_and_queue_returns_429_with_retry_after(self):
+		from lucos_eolas.admission import cost_class
+		view = cost_class('tiny')(self._blocking_view)
+		results = []
+		thread = self._in_thread(view, results)
+		self.started.wait(timeout=5)
+		response = view(self.factory.get('/dump'))
+		self.release.set()
+		thread.join()
+		self.assertEqual(response.status_code, 429)
+		self.assertEqual(response['Retry-After'], '7')
+		self.assertEqual(results[0].status_code, 200)
+
+	def test_queued_request_times_out_with_503(self):
+		from lucos_eolas.admission import cost_class
+		view = cost_class('queued')(self._blocking_view)
+		results = []
+		thread = self._in_thread(view, results)
+		self.started.wait(timeout=5)
+		response = view(self.factory.get('/dump'))
+		self.release.set()
+		thread.join()
+		self.assertEqual(response.status_code, 503)
+		self.assertEqual(response['Retry-After'], '7')
+
+	def test_slot_is_released_after_view_returns(self):
+		from lucos_eolas.admission import cost_class
+		self.release.set()
+		view = cost_class('tiny')(self._blocking_view)
+		self.assertEqual(view(self.factory.get('/dump')).status_code, 200)
+		self.assertEqual(view(self.factory.get('/dump')).status_code, 200)
+
+	def test_identical_requests_are_coalesced(self):
+		from lucos_eolas.admission import cost_class, admission_stats
+		view = cost_class('shared', coalesce=lambda request: request.path)(self._blocking_view)
+		results = []
+		threads = [self._in_thread(view, results)]
+		self.started.wait(timeout=5)
+		threads += [self._in_thread(view, results) for _ in range(3)]
+		time.sleep(0.1)
+		self.release.set()
+		for thread in threads:
+			thread.join()
+		self.assertEqual(self.calls, 1)
+		self.assertEqual([r.status_code for r in results], [200] * 4)
+		self.assertTrue(all(r.content == b'dump' for r in results))
+		self.assertEqual(len({id(r) for r in results}), 4, "Each request should get its own response object")
+		self.assertEqual(admission_stats()['shared']['coalesced'], 3)
+
+	def test_requests_without_a_key_are_not_coalesced(self):
+		from lucos_eolas.admission import cost_class
+		view = cost_class('shared', coalesce=lambda request: None)(self._blocking_view)
+		results = []
+		threads = [self._in_thread(view, results)]
+		self.started.wait(timeout=5)
+		threads.append(self._in_thread(view, results))
+		self.release.set()
+		for thread in threads:
+			thread.join()
+		self.assertEqual(self.calls, 2)
+		self.assertEqual([r.status_code for r in results], [200, 200])
+
+	def test_coalesced_requests_count_against_queue(self):
+		from lucos_eolas.admission import cost_class, admission_stats
+		view = cost_class('shared-short-queue', coalesce=lambda request: request.path)(self._blocking_view)
+		results = []
+		threads = [self._in_thread(view, results)]
+		self.started.wait(timeout=5)
+		threads.append(self._in_thread(view, results))
+		time.sleep(0.1)
+		# The one place in the queue is taken by the request waiting on the first
+		response = view(self.factory.get('/dump'))
+		self.release.set()
+		for thread in threads:
+			thread.join()
+		self.assertEqual(response.status_code, 503)
+		self.assertEqual([r.status_code for r in results], [200, 200])
+		self.assertEqual(admission_stats()['shared-short-queue']['coalesced'], 1)
+
+	def test_streaming_response_holds_slot_until_closed(self):
+		from django.http import StreamingHttpResponse
+		from lucos_eolas.admission import cost_class
+		view = cost_class('tiny')(lambda request: StreamingHttpResponse(iter([b'du', b'mp'])))
+		response = view(self.factory.get('/dump'))
+		self.assertEqual(view(self.factory.get('/dump')).status_code, 429)
+		self.assertEqual(b''.join(response), b'dump')
+		response.close()
+		self.assertEqual(view(self.factory.get('/dump')).status_code, 200)
+
+	def test_slot_is_released_when_view_raises(self):
+		from lucos_eolas.admission import cost_class
+
+		def failing_view(request):
+			raise ValueError
+		view = cost_class('tiny')(failing_view)
+		with self.assertRaises(ValueError):
+			view(self.factory.get('/dump'))
+		self.release.set()
+		self.assertEqual(cost_class('tiny')(self._blocking_view)(self.factory.get('/dump')).status_code, 200)
+
+	async def test_async_streaming_response_holds_slot_until_closed(self):
+		from django.http import StreamingHttpResponse
+		from django.test import AsyncRequestFactory
+		from lucos_eolas.admission import cost_class
+
+		async def body():
+			yield b'dump'
+
+		async def streaming_view(request):
+			return StreamingHttpResponse(body())
+		view = cost_class('tiny')(streaming_view)
+		response = await view(AsyncRequestFactory().get('/dump'))
+		self.assertEqual((await view(AsyncRequestFactory().get('/dump'))).status_code, 429)
+		self.assertEqual(b''.join([chunk async for chunk in response]), b'dump')
+		response.close()
+		self.assertEqual((await view(AsyncRequestFactory().get('/dump'))).status_code, 200)
+
+
+class AsyncReadViewsTest(TestCase):
+	"""views_async serves the same content as the sync read endpoints."""
+
+	AUTH = {'headers': {'Authorization': 'key key'}}
+
+	def setUp(self):
+		from django.test import AsyncRequestFactory, RequestFactory
+		self.factory = RequestFactory()
+		self.async_factory = AsyncRequestFactory()
+		self.monday = DayOfWeek.objects.create(name='Monday', order=1)
+		DayOfWeek.objects.create(name='Tuesday', order=2)
+
+	async def _content(self, response):
+		if response.streaming:
+			content = b''.join([chunk async for chunk in response])
+			# As the ASGI handler does, which releases any admission slot held
+			response.close()
+			return content
+		return response.content
+
+	async def _compare(self, view_name, method='get', data=None, accept=None, **kwargs):
+		from asgiref.sync import sync_to_async
+		from . import views, views_async
+		path = '/x'
+		extra = {'headers': dict(self.AUTH['headers'])}
+		if accept:
+			extra['headers']['Accept'] = accept
+		if method == 'post':
+			extra.update(data=json.dumps(data), content_type='application/json')
+		sync_response = await sync_to_async(getattr(views, view_name))(getattr(self.factory, method)(path, **extra), **kwargs)
+		# Streamed sync responses query the database as they're read, and hold
+		# any admission slot until closed, as the WSGI server does
+		sync_body = await sync_to_async(sync_response.getvalue)()
+		sync_response.close()
+		async_response = await getattr(views_async, view_name)(getattr(self.async_factory, method)(path, **extra), **kwargs)
+		self.assertEqual(async_response.status_code, sync_response.status_code)
+		self.assertEqual(async_response['Content-Type'], sync_response['Content-Type'])
+		return sync_body, await self._content(async_response)
+
+	async def test_thing_data(self):
+		sync_body, async_body = await self._compare('thing_data', type='dayofweek', pk=str(self.monday.pk))
+		self.assertEqual(async_body, sync_body)
+
+	async def test_thing_data_unknown_pk_returns_404(self):
+		from .views_async import thing_data
+		response = await thing_data(self.async_factory.get('/x', **self.AUTH), type='dayofweek', pk='99999')
+		self.assertEqual(response.status_code, 404)
+
+	async def test_type_list(self):
+		sync_body, async_body = await self._compare('type_list', type='dayofweek')
+		self.assertEqual(json.loads(async_body), json.loads(sync_body))
+
+	async def test_type_list_empty(self):
+		sync_body, async_body = await self._compare('type_list', type='calendar')
+		self.assertEqual(json.loads(async_body), [])
+
+	async def test_batch_names(self):
+		uri = f'http://localhost/metadata/dayofweek/{self.monday.pk}/'
+		sync_body, async_body = await self._compare('batch_names', method='post', data=[uri, 'http://localhost/metadata/nope/1/'])
+		self.assertEqual(json.loads(async_body), {uri: 'Monday'})
+		self.assertEqual(json.loads(async_body), json.loads(sync_body))
+
+	async def test_type_list_ndjson(self):
+		sync_body, async_body = await self._compare('type_list', accept='application/x-ndjson', type='dayofweek')
+		self.assertEqual(len(async_body.splitlines()), 2)
+		self.assertEqual(async_body, sync_body)
+
+	async def test_batch_names_ndjson(self):
+		uri = f'http://localhost/metadata/dayofweek/{self.monday.pk}/'
+		sync_body, async_body = await self._compare('batch_names', method='post', data=[uri], accept='application/x-ndjson')
+		self.assertEqual(async_body, sync_body)
+		self.assertEqual(json.loads(async_body), {'uri': uri, 'name': 'Monday'})
+
+	async def test_export(self):
+		sync_body, async_body = await self._compare('export', type='dayofweek', format='csv')
+		self.assertEqual(len(async_body.splitlines()), 3)
+		self.assertEqual(async_body, sync_body)
+
+	async def test_batch_data(self):
+		import rdflib
+		from rdflib.compare import isomorphic
+		uri = f'http://localhost/metadata/dayofweek/{self.monday.pk}/'
+		sync_body, async_body = await self._compare('batch_data', method='post', data=[uri])
+		self.assertTrue(isomorphic(
+			rdflib.Graph().parse(data=sync_body.decode(), format='turtle'),
+			rdflib.Graph().parse(data=async_body.decode(), format='turtle'),
+		))
+
+	async def test_ontology(self):
+		from .views_async import ontology
+		sync_body, async_body = await self._compare('ontology')
+		self.assertEqual(async_body, sync_body)
+		response = await ontology(self.async_factory.get('/x'))
+		self.assertIn('public', response['Cache-Control'])
+		self.assertIn('Accept', response['Vary'])
+
+	async def test_type_data(self):
+		sync_body, async_body = await self._compare('type_data', type='dayofweek')
+		self.assertEqual(async_body, sync_body)
+		sync_body, async_body = await self._compare('type_data', accept='application/n-triples', type='dayofweek')
+		self.assertEqual(async_body, sync_body)
+
+	async def test_all_rdf_ntriples_is_streamed(self):
+		import rdflib
+		from .views_async import all_rdf
+		response = await all_rdf(self.async_factory.get('/x', headers={'Authorization': 'key key', 'Accept': 'application/n-triples'}))
+		self.assertTrue(response.streaming)
+		g = rdflib.Graph().parse(data=(await self._content(response)).decode(), format='nt')
+		response.close()
+		monday = rdflib.URIRef(f'http://localhost/metadata/dayofweek/{self.monday.pk}/')
+		self.assertIn((monday, rdflib.SKOS.prefLabel, rdflib.Literal('Monday')), g)
+		self.assertIn((None, rdflib.RDF.type, rdflib.OWL.Ontology), g)
+
+	async def test_all_rdf_turtle_matches_sync(self):
+		import rdflib
+		from rdflib.compare import isomorphic
+		sync_body, async_body = await self._compare('all_rdf')
+		self.assertTrue(isomorphic(
+			rdflib.Graph().parse(data=sync_body.decode(), format='turtle'),
+			rdflib.Graph().parse(data=async_body.decode(), format='turtle'),
+		))
+
+	async def test_requires_auth(self):
+		from .views_async import type_list
+		response = await type_list(self.async_factory.get('/x'), type='dayofweek')
+		self.assertEqual(response.status_code, 401)
+
+
+class WarmUpTest(SimpleTestCase):
+	"""warm_up builds per-process caches without touching the database."""
+
+	def test_warm_up_records_each_phase(self):
+		from .warmup import StartupTimer, warm_up
+		timer = StartupTimer()
+		warm_up(timer)
+		self.assertEqual([name for name, _ in timer.phases], ['translations', 'url routes', 'rdf field plans', 'ontology'])
+		self.assertTrue(timer.report().startswith('Startup took '))
+
+	def test_ontology_is_serialized_once_per_format(self):
+		from .views import serialized_ontology
+		self.assertIs(serialized_ontology('turtle'), serialized_ontology('turtle'))
+
+	def test_rdf_field_plan_matches_model_fields(self):
+		fields = [field.name for field in DayOfWeek._meta.get_fields() if hasattr(field, 'get_rdf')]
+		self.assertEqual([field.name for field in DayOfWeek.rdf_fields()], fields)
+		self.assertIs(DayOfWeek.rdf_fields(), DayOfWeek.rdf_fields())
+
+
+class LazyRdfTest(SimpleTestCase):
+	"""rdflib is only imported once something actually needs RDF."""
+
+	def test_app_loads_without_importing_rdflib(self):
+		import os
+		import subprocess
+		import sys
+		script = (
+			"import sys, django; django.setup(); "
+			"from django.urls import get_resolver; get_resolver().url_patterns; "
+			"print('rdflib' in sys.modules)"
+		)
+		env = {**os.environ, 'DJANGO_SETTINGS_MODULE': 'lucos_eolas.settings'}
+		result = subprocess.run([sys.executable, '-c', script], env=env, capture_output=True, text=True, check=True)
+		self.assertEqual(result.stdout.strip(), 'False')
+
+	def test_lazy_vocabularies_match_rdflib(self):
+		import rdflib
+		from . import rdf
+		terms = [('DC', 'description'), ('FOAF', 'Person'), ('ORG', 'Organization'), ('OWL', 'Class'), ('SDO', 'Place'), ('TIME', 'DayOfWeek'), ('XSD', 'string')]
+		for vocabulary, term in terms:
+			self.assertEqual(getattr(getattr(rdf, vocabulary), term).resolve(), getattr(getattr(rdflib, vocabulary), term), vocabulary)
+
+	def test_declared_terms_resolve_to_urirefs(self):
+		import rdflib
+		self.assertIsInstance(Month.rdf_type, rdflib.URIRef)
+		self.assertEqual(Month.rdf_type, rdflib.TIME.MonthOfYear)
+		field = Month._meta.get_field('calendar')
+		self.assertIsInstance(field.rdf_predicate, rdflib.URIRef)
+		self.assertIsInstance(field.rdf_inverse_predicate, rdflib.URIRef)
+
+
+class MigrateIfNeededCommandTest(TestCase):
+	"""migrate_if_needed only runs migrate when migrations are pending."""
+
+	def _run(self, plan):
+		from io import StringIO
+		from django.core.management import call_command
+		out = StringIO()
+		with patch('lucos_eolas.metadata.management.commands.migrate_if_needed.MigrationExecutor') as executor, \
+				patch('lucos_eolas.metadata.management.commands.migrate_if_needed.call_command') as migrate:
+			executor.return_value.migration_plan.return_value = plan
+			call_command('migrate_if_needed', stdout=out)
+		return migrate, out.getvalue()
+
+	def test_skips_migrate_when_nothing_pending(self):
+		migrate, output = self._run([])
+		migrate.assert_not_called()
+		self.assertIn('No migrations pending', output)
+
+	def test_runs_migrate_when_pending(self):
+		migrate, output = self._run([('migration', False)])
+		migrate.assert_called_once()
+		self.assertIn('1 migration(s) pending', output)
+
+
+class QueryBudgetTest(TestCase):
+	"""Read endpoints stay within their declared query budgets, however much data there is."""
+
+	def _generate(self, start, stop):
+		"""Create items start…stop-1 of every metadata model, with every relation
+		filled in, and with names that clash wherever names needn't be unique."""
+		from django.apps import apps
+		from django.db import models
+		for model_class in apps.get_app_config('metadata').get_models():
+			for i in range(start, stop):
+				values = {}
+				for field in model_class._meta.concrete_fields:
+					if isinstance(field, models.AutoField) or field.name in ('alternate_names', 'wikipedia_slug'):
+						continue
+					if field.many_to_one:
+						targets = list(field.related_model.objects.order_by('pk'))
+						values[field.name] = targets[i % len(targets)] if targets else None
+					elif field.primary_key:
+						values[field.name] = f'q{i:02d}'
+					elif field.name == 'name':
+						values['name'] = f'{model_class.__name__} {i}' if field.unique else f'{model_class.__name__} {i % 2}'
+					elif field.choices:
+						values[field.name] = field.choices[0][0]
+					elif isinstance(field, (models.IntegerField, models.DecimalField)):
+						values[field.name] = i + 1
+					elif isinstance(field, models.CharField) and not field.blank:
+						values[field.name] = f'things {i}'
+				obj = model_class.objects.create(**values)
+				for field in model_class._meta.many_to_many:
+					getattr(obj, field.name).set(field.related_model.objects.order_by('pk')[:3])
+
+	def _read_requests(self):
+		from django.apps import apps
+		auth = {'HTTP_AUTHORIZATION': 'key key'}
+		uris = []
+		yield 'get', '/_info', {}
+		yield 'get', '/ontology', {}
+		yield 'get', '/metadata/categories.json', {}
+		for model_class in apps.get_app_config('metadata').get_models():
+			obj = model_class.objects.order_by('pk').first()
+			uris.append(obj.get_absolute_url())
+			yield 'get', f'/metadata/{model_class._meta.model_name}/list/', auth
+			yield 'get', f'/metadata/{model_class._meta.model_name}/data/', {**auth, 'HTTP_ACCEPT': 'application/n-triples'}
+			yield 'get', f'/metadata/{model_class._meta.model_name}/{obj.pk}/data/', {**auth, 'HTTP_ACCEPT': 'text/turtle'}
+		yield 'get', '/metadata/all/data/', {**auth, 'HTTP_ACCEPT': 'application/n-triples'}
+		yield 'post', '/metadata/names', {**auth, 'data': json.dumps(uris), 'content_type': 'application/json'}
+		yield 'post', '/metadata/data', {**auth, 'data': json.dumps(uris), 'content_type': 'application/json', 'HTTP_ACCEPT': 'text/turtle'}
+
+	def assertWithinQueryBudget(self, method, path, **kwargs):
+		"""Make a request, check it used no more queries than its view's budget, and return how many it used."""
+		from django.db import connection
+		from django.test.utils import CaptureQueriesContext
+		from django.urls import resolve
+		from ..querybudget import budget_for
+		with CaptureQueriesContext(connection) as queries:
+			response = getattr(self.client, method)(path, **kwargs)
+			if response.streaming:
+				# Streamed bodies query the database as they're read
+				b''.join(response.streaming_content)
+		self.assertEqual(response.status_code, 200, path)
+		match = resolve(path)
+		budget = budget_for(match.func, response.wsgi_request, *match.args, **match.kwargs)
+		self.assertIsNotNone(budget, f"{path} has no query budget")
+		self.assertLessEqual(len(queries), budget, f"{path} made {len(queries)} queries, over its budget of {budget}")
+		return len(queries)
+
+	def test_read_endpoints_within_budget_at_any_size(self):
+		self._generate(0, 2)
+		small = {path: self.assertWithinQueryBudget(method, path, **kwargs) for method, path, kwargs in self._read_requests()}
+		self._generate(2, 6)
+		large = {path: self.assertWithinQueryBudget(method, path, **kwargs) for method, path, kwargs in self._read_requests()}
+		# Any query made per item would show up as growth with the dataset
+		self.assertEqual(small, large)
+
+	def test_neighbourhood_within_budget(self):
+		# Not in _read_requests: the more data there is, the more types a search
+		# reaches, so its query count does grow, up to a limit of its budget
+		from django.apps import apps
+		self._generate(0, 6)
+		for model_class in apps.get_app_config('metadata').get_models():
+			obj = model_class.objects.order_by('pk').first()
+			self.assertWithinQueryBudget('get', f'/metadata/{model_class._meta.model_name}/{obj.pk}/neighbourhood/', data={'depth': 3}, HTTP_AUTHORIZATION='key key')
+
+	def test_preloaded_names_match_looked_up_names(self):
+		from .models import Place
+		self._generate(0, 3)
+		Person.objects.create(name='Nobody Else')
+		Person.objects.create(name='Alias Holder', alternate_names=['Person 1'])
+		for model_class in (Place, Month, Vehicle, Person):
+			expected = [str(obj) for obj in model_class.objects.order_by('pk')]
+			objs = list(model_class.objects.order_by('pk'))
+			model_class.preload(objs)
+			with self.assertNumQueries(0):
+				self.assertEqual([str(obj) for obj in objs], expected)
+		self.assertIn('Nobody Else', expected)
+		self.assertIn('Person 1 (real)', expected)
+
+	def test_preloaded_names_upper_cased_as_the_database_does(self):
+		# Python upper-cases ß to SS, but the database leaves it be
+		Person.objects.create(name='Straße')
+		Person.objects.create(name='Straße', fictional=True)
+		objs = list(Person.objects.filter(name='Straße').order_by('pk'))
+		Person.preload(objs)
+		self.assertEqual([str(obj) for obj in objs], ['Straße (real)', 'Straße (fictional)'])
+
+	def test_overspending_is_logged_in_debug(self):
+		from django.http import HttpResponse
+		from django.test import RequestFactory
+		from ..querybudget import query_budget
+
+		@query_budget(1)
+		def view(request):
+			list(Calendar.objects.all())
+			list(Calendar.objects.all())
+			return HttpResponse()
+		with self.settings(DEBUG=True), self.assertLogs('lucos_eolas.querybudget', level='WARNING') as logs:
+			view(RequestFactory().get('/calendars'))
+		self.assertIn('made 2 queries, over its budget of 1', logs.output[0])
+
+	def test_repeated_queries_are_reported_with_their_origin(self):
+		from django.http import HttpResponse
+		from django.test import RequestFactory
+		from ..querybudget import QueryShapeMiddleware, REPEAT_THRESHOLD, query_shape
+
+		def view(request):
+			for pk in range(REPEAT_THRESHOLD):
+				Calendar.objects.filter(pk=pk).first()
+			return HttpResponse()
+		with self.assertLogs('lucos_eolas.querybudget', level='WARNING') as logs:
+			QueryShapeMiddleware(view)(RequestFactory().get('/calendars'))
+		self.assertIn(f'ran the same query {REPEAT_THRESHOLD} times', logs.output[0])
+		self.assertIn('tests.py', logs.output[0])
+		self.assertEqual(query_shape('IN (%s, %s, %s)'), query_shape('IN (%s, %s)'))
+
+
+class AdminChangelistQueryTest(TestCase):
+	"""Changelists render in a fixed number of queries, with facet counts cached until the model changes."""
+
+	def setUp(self):
+		cache.clear()
+		user = User.objects.create_superuser('testadmin', 'admin@test.com', 'password')
+		self.client.force_login(user, backend='django.contrib.auth.backends.ModelBackend')
+		self.city = PlaceType.objects.create(name='city', plural='cities')
+		self.town = PlaceType.objects.create(name='town', plural='towns')
+
+	def _add_places(self, start, stop):
+		from .models import Place
+		for i in range(start, stop):
+			Place.objects.create(name=f'Place {i % 3}', type=self.city if i % 2 else self.town)
+
+	def _changelist_queries(self):
+		from django.db import connection
+		from django.test.utils import CaptureQueriesContext
+		with CaptureQueriesContext(connection) as queries:
+			response = self.client.get('/metadata/place/')
+		self.assertEqual(response.status_code, 200)
+		return response, len(queries)
+
+	def test_query_count_does_not_grow_with_rows(self):
+		self._add_places(0, 3)
+		cache.clear()
+		_, few = self._changelist_queries()
+		self._add_places(3, 12)
+		cache.clear()
+		response, many = self._changelist_queries()
+		self.assertEqual(few, many)
+		self.assertContains(response, 'Place 0 (City)')
+
+	def test_labels_match_str(self):
+		from .models import Place
+		self._add_places(0, 4)
+		Place.objects.create(name='Lonely', type=self.town)
+		Place.objects.create(name='Elsewhere', alternate_names=['Lonely'], type=self.city)
+		response, _ = self._changelist_queries()
+		for place in Place.objects.all():
+			self.assertContains(response, f'>{place}</a>')
+
+	def test_facet_counts_are_cached_until_a_save(self):
+		from .models import Place
+		self._add_places(0, 4)
+		_, first = self._changelist_queries()
+		response, second = self._changelist_queries()
+		self.assertLess(second, first)
+		self.assertContains(response, 'City (2)')
+		Place.objects.create(name='New', type=self.city)
+		response, _ = self._changelist_queries()
+		self.assertContains(response, 'City (3)')
+
+	def test_facet_counts_follow_related_filters_choices(self):
+		self._add_places(0, 4)
+		self._changelist_queries()
+		PlaceType.objects.create(name='village', plural='villages')
+		response, _ = self._changelist_queries()
+		self.assertContains(response, 'Village (0)')
+
+	def test_facet_cache_keys_are_safe_for_any_search(self):
+		import warnings
+		from django.core.cache.backends.base import CacheKeyWarning
+		self._add_places(0, 4)
+		with warnings.catch_warnings(record=True) as caught:
+			warnings.simplefilter('always')
+			response = self.client.get('/metadata/place/', {'q': 'Place 0 \u00e9'})
+		self.assertEqual(response.status_code, 200)
+		self.assertFalse([warning for warning in caught if issubclass(warning.category, CacheKeyWarning)])
+
+
+class VersionedCacheTest(SimpleTestCase):
+	"""versioned_cache recomputes once any model it depends on changes."""
+
+	def test_recomputes_after_bump(self):
+		from .caching import bump_version, versioned_cache
+		calls = []
+		def compute():
+			calls.append(1)
+			return len(calls)
+		self.assertEqual(versioned_cache('test-versioned', [Calendar, Month], compute), 1)
+		self.assertEqual(versioned_cache('test-versioned', [Calendar, Month], compute), 1)
+		bump_version(Month)
+		self.assertEqual(versioned_cache('test-versioned', [Calendar, Month], compute), 2)
+
+
+class BatchDataEndpointTest(TestCase):
+	"""POST /metadata/data — RDF for a batch of entity URIs in one response."""
+
+	AUTH = {'HTTP_AUTHORIZATION': 'key key'}
+
+	def setUp(self):
+		from .models import Place
+		self.city = PlaceType.objects.create(name='city', plural='cities')
+		self.paris = Place.objects.create(name='Paris', type=self.city)
+		self.lyon = Place.objects.create(name='Lyon', type=self.city)
+		self.nice = Place.objects.create(name='Nice', type=self.city)
+		self.calendar = Calendar.objects.create(name='Gregorian')
+
+	def _post(self, uris, accept='text/turtle', auth=True):
+		headers = dict(self.AUTH) if auth else {}
+		return self.client.post('/metadata/data', data=json.dumps(uris), content_type='application/json', HTTP_ACCEPT=accept, **headers)
+
+	def _graph(self, response, format='turtle'):
+		import rdflib
+		content = b''.join(response.streaming_content) if response.streaming else response.content
+		return rdflib.Graph().parse(data=content, format=format)
+
+	def test_no_auth_returns_401(self):
+		self.assertEqual(self._post([], auth=False).status_code, 401)
+
+	def test_get_returns_405(self):
+		self.assertEqual(self.client.get('/metadata/data', **self.AUTH).status_code, 405)
+
+	def test_returns_requested_items_only(self):
+		import rdflib
+		response = self._post([self.paris.get_absolute_url(), self.calendar.get_absolute_url()])
+		self.assertEqual(response.status_code, 200)
+		subjects = set(self._graph(response).subjects())
+		self.assertIn(rdflib.URIRef(self.paris.get_absolute_url()), subjects)
+		self.assertIn(rdflib.URIRef(self.calendar.get_absolute_url()), subjects)
+		self.assertNotIn(rdflib.URIRef(self.lyon.get_absolute_url()), subjects)
+
+	def test_matches_individual_thing_data(self):
+		uris = [self.paris.get_absolute_url(), self.lyon.get_absolute_url()]
+		expected = set()
+		for obj in (self.paris, self.lyon):
+			expected |= set(self._graph(self.client.get(f'/metadata/place/{obj.pk}/data/', HTTP_ACCEPT='text/turtle', **self.AUTH)))
+		self.assertEqual(set(self._graph(self._post(uris))), expected)
+
+	def test_unknown_and_missing_uris_are_omitted(self):
+		origin = self.paris.get_absolute_url().split('/metadata/')[0]
+		response = self._post([f'{origin}/metadata/place/999999/', f'{origin}/metadata/nonsense/1/', f'{origin}/metadata/place/abc/'])
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(len(self._graph(response)), 0)
+
+	def test_ntriples_are_streamed(self):
+		response = self._post([self.paris.get_absolute_url(), self.calendar.get_absolute_url()], accept='application/n-triples')
+		self.assertTrue(response.streaming)
+		self.assertGreater(len(self._graph(response, format='nt')), 0)
+
+
+class ExportTest(TestCase):
+	"""/metadata/<type>/export.csv and the export_table command: a flat table per type, via COPY."""
+
+	AUTH = {'HTTP_AUTHORIZATION': 'key key'}
+
+	def setUp(self):
+		from .models import Place
+		self.city = PlaceType.objects.create(name='city', plural='cities')
+		self.country = Place.objects.create(name='Erewhon', type=PlaceType.objects.create(name='country', plural='countries'))
+		self.place = Place.objects.create(name='Quote "Town", upon Sea', alternate_names=['Quoteville', 'Qtown'], type=self.city, fictional=True)
+		self.place.contained_in.add(self.country)
+
+	def _rows(self, response, delimiter=','):
+		import csv, io
+		self.assertEqual(response.status_code, 200)
+		return list(csv.DictReader(io.StringIO(response.getvalue().decode()), delimiter=delimiter))
+
+	def test_requires_auth(self):
+		response = self.client.get('/metadata/place/export.csv')
+		self.assertEqual(response.status_code, 401)
+
+	def test_unknown_type_returns_404(self):
+		response = self.client.get('/metadata/nonexistenttype/export.csv', **self.AUTH)
+		self.assertEqual(response.status_code, 404)
+
+	@override_settings(EOLAS_ADMISSION={'export': {'concurrency': 1, 'queue': 0, 'wait': 0, 'retry_after': 7}})
+	def test_holds_export_slot_until_streamed(self):
+		from lucos_eolas import admission
+		admission._pools.clear()
+		self.addCleanup(admission._pools.clear)
+		response = self.client.get('/metadata/place/export.csv', **self.AUTH)
+		self.assertEqual(self.client.get('/metadata/place/export.csv', **self.AUTH).status_code, 429)
+		# Reading the whole body closes the response, as the WSGI server does
+		self.assertEqual(len(self._rows(response)), 2)
+		self.assertEqual(self.client.get('/metadata/place/export.csv', **self.AUTH).status_code, 200)
+
+	def test_csv_has_a_row_per_item_with_related_items_as_uris(self):
+		response = self.client.get('/metadata/place/export.csv', **self.AUTH)
+		self.assertTrue(response.streaming)
+		self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+		rows = self._rows(response)
+		self.assertEqual(len(rows), 2)
+		row = rows[1]
+		self.assertEqual(row['uri'], self.place.get_absolute_url())
+		self.assertEqual(row['name'], 'Quote "Town", upon Sea')
+		self.assertEqual(row['alternate_names'], 'Quoteville|Qtown')
+		self.assertEqual(row['type'], self.city.get_absolute_url())
+		self.assertEqual(row['fictional'], 't')
+		self.assertEqual(row['contained_in'], self.country.get_absolute_url())
+		self.assertEqual(rows[0]['contained_in'], '')
+
+	def test_columns_follow_model_fields(self):
+		from .models import Place
+		rows = self._rows(self.client.get('/metadata/place/export.csv', **self.AUTH))
+		expected = ['uri'] + [field.name for field in Place._meta.concrete_fields] + [field.name for field in Place._meta.many_to_many]
+		self.assertEqual(list(rows[0].keys()), expected)
+
+	def test_tsv(self):
+		response = self.client.get('/metadata/place/export.tsv', **self.AUTH)
+		self.assertEqual(response['Content-Type'], 'text/tab-separated-values; charset=utf-8')
+		self.assertEqual(self._rows(response, delimiter='\t')[1]['name'], 'Quote "Town", upon Sea')
+
+	def test_uris_match_get_absolute_url_for_language_families(self):
+		LanguageFamily.objects.create(code='qli', name='Language isolate')
+		family = LanguageFamily.objects.create(code='gem', name='Germanic')
+		Language.objects.create(code='en', name='English', family=family)
+		rows = self._rows(self.client.get('/metadata/languagefamily/export.csv', **self.AUTH))
+		self.assertEqual({row['uri'] for row in rows}, {obj.get_absolute_url() for obj in LanguageFamily.objects.all()})
+		rows = self._rows(self.client.get('/metadata/language/export.csv', **self.AUTH))
+		self.assertEqual(rows[0]['family'], family.get_absolute_url())
+
+	def test_abandoned_export_leaves_connection_usable(self):
+		from .export import copy_rows
+		from .models import Place
+		blocks = copy_rows(Place)
+		next(blocks)
+		blocks.close()
+		self.assertEqual(Place.objects.count(), 2)
+
+	def test_command_matches_endpoint(self):
+		from io import StringIO
+		from django.core.management import call_command
+		out = StringIO()
+		call_command('export_table', 'place', stdout=out)
+		self.assertEqual(out.getvalue().encode(), self.client.get('/metadata/place/export.csv', **self.AUTH).getvalue())
+
+	def test_command_rejects_unknown_type(self):
+		from django.core.management import call_command
+		from django.core.management.base import CommandError
+		with self.assertRaises(CommandError):
+			call_command('export_table', 'nonexistenttype')
+
+
+@patch('lucos_eolas.metadata.signals.updateLoganne')
+@patch('lucos_eolas.metadata.management.commands.import_dump.updateLoganne')
+class ImportDumpTest(TestCase):
+	"""import_dump bulk loads eolas's own CSV and RDF dumps, with one Loganne event for the lot."""
+
+	def setUp(self):
+		import tempfile
+		from .models import Place
+		self.dir = tempfile.TemporaryDirectory()
+		self.addCleanup(self.dir.cleanup)
+		self.city = PlaceType.objects.create(name='city', plural='cities')
+		self.country = Place.objects.create(name='Erewhon', type=PlaceType.objects.create(name='country', plural='countries'))
+		self.place = Place.objects.create(name='Springfield', alternate_names=['Shelbyville', 'Capital City'], type=self.city, metonym='the Springfield government')
+		self.place.contained_in.add(self.country)
+		# Shares a name with a city, so its str() has its type appended
+		Place.objects.create(name='Springfield', type=PlaceType.objects.get(name='country'))
+		self.family = LanguageFamily.objects.create(code='gem', name='Germanic')
+		Language.objects.create(code='en', name='English', family=self.family)
+
+	def _snapshot(self):
+		from .models import Place
+		data = {}
+		for model_class in (PlaceType, Place, LanguageFamily, Language):
+			# Loading a dump counts as modifying what it loads, so modification times aren't compared
+			items = ({key: value for key, value in obj.to_json().items() if key != 'modified'} for obj in model_class.objects.all())
+			data[model_class] = sorted(items, key=lambda item: str(item['id']))
+		data['contained_in'] = sorted(Place.contained_in.through.objects.values_list('from_place_id', 'to_place_id'))
+		return data
+
+	def _damage(self):
+		"""Change things for an import to put right."""
+		from .models import Place
+		self.place.contained_in.clear()
+		Place.objects.filter(pk=self.place.pk).update(name='Shelbyville', alternate_names=[])
+		Language.objects.all().delete()
+
+	def _import(self, *paths):
+		from io import StringIO
+		from django.core.management import call_command
+		out = StringIO()
+		call_command('import_dump', *paths, stdout=out)
+		return out.getvalue()
+
+	def _export_csv(self, model_class):
+		from .export import copy_text
+		path = f'{self.dir.name}/{model_class._meta.model_name}.csv'
+		with open(path, 'w', encoding='utf-8') as output:
+			output.writelines(copy_text(model_class))
+		return path
+
+	def test_csv_round_trip(self, dump_loganne, signal_loganne):
+		from .models import Place
+		before = self._snapshot()
+		paths = [self._export_csv(model_class) for model_class in (PlaceType, Place, LanguageFamily, Language)]
+		self._damage()
+		output = self._import(*paths)
+		self.assertEqual(self._snapshot(), before)
+		self.assertIn('Imported 7 items', output)
+		signal_loganne.assert_not_called()
+		dump_loganne.assert_called_once()
+		self.assertEqual(dump_loganne.call_args.kwargs['type'], 'dumpImported')
+
+	def test_rdf_round_trip(self, dump_loganne, signal_loganne):
+		from .models import Place
+		from .views import all_graph
+		path = f'{self.dir.name}/all.ttl'
+		all_graph().serialize(destination=path, format='turtle')
+		self._damage()
+		self._import(path)
+		place = Place.objects.get(pk=self.place.pk)
+		self.assertEqual(place.name, 'Springfield')
+		self.assertEqual(place.alternate_names, ['Capital City', 'Shelbyville'])
+		self.assertEqual(place.type, self.city)
+		self.assertEqual(list(place.contained_in.all()), [self.country])
+		# Not in the RDF, so left as it was
+		self.assertEqual(place.metonym, 'the Springfield government')
+		self.assertEqual(Language.objects.get(pk='en').family, self.family)
+		signal_loganne.assert_not_called()
+		dump_loganne.assert_called_once()
+
+	def test_ids_from_dump_move_sequence_on(self, dump_loganne, signal_loganne):
+		path = f'{self.dir.name}/dayofweek.csv'
+		with open(path, 'w', encoding='utf-8') as output:
+			output.write('uri,id,name,alternate_names,wikipedia_slug,order\nhttp://elsewhere/metadata/dayofweek/500/,500,Monday,,,1\n')
+		self._import(path)
+		self.assertEqual(DayOfWeek.objects.get(pk=500).name, 'Monday')
+		self.assertGreater(DayOfWeek.objects.create(name='Tuesday', order=2).pk, 500)
+
+	def test_uri_of_wrong_type_is_an_error(self, dump_loganne, signal_loganne):
+		from django.core.management.base import CommandError
+		path = f'{self.dir.name}/language.csv'
+		with open(path, 'w', encoding='utf-8') as output:
+			output.write('uri,code,name,family\nhttp://localhost/metadata/language/fr/,fr,French,http://localhost/metadata/place/1/\n')
+		with self.assertRaises(CommandError):
+			self._import(path)
+		dump_loganne.assert_not_called()
+
+
+class YearRangeTest(TestCase):
+	"""Year range filters on type_list, and the decade histogram, for types placed in time by year."""
+
+	AUTH = {'HTTP_AUTHORIZATION': 'key key'}
+
+	def setUp(self):
+		cache.clear()
+		HistoricalEvent.objects.create(name='Battle of Hastings', start_year=1066)
+		HistoricalEvent.objects.create(name='First World War', start_year=1914, end_year=1918)
+		HistoricalEvent.objects.create(name='Second World War', start_year=1939, end_year=1945)
+		HistoricalEvent.objects.create(name='Fall of the Berlin Wall', end_year=1989)
+		HistoricalEvent.objects.create(name='Undated')
+		Memory.objects.create(name='Rave', year=1991)
+		Memory.objects.create(name='Millennium', year=2000)
+		Memory.objects.create(name='Sometime')
+
+	def _names(self, type, **params):
+		response = self.client.get(f'/metadata/{type}/list/', params, **self.AUTH)
+		self.assertEqual(response.status_code, 200)
+		return sorted(item['name'] for item in response.json())
+
+	def test_overlaps(self):
+		self.assertEqual(self._names('historicalevent', overlaps='1916,1940'), ['First World War', 'Second World War'])
+		self.assertEqual(self._names('historicalevent', overlaps='1918,1918'), ['First World War'])
+		self.assertEqual(self._names('historicalevent', overlaps='1980,1990'), ['Fall of the Berlin Wall'])
+
+	def test_open_ended(self):
+		self.assertEqual(self._names('historicalevent', overlaps=',1100'), ['Battle of Hastings'])
+		self.assertEqual(self._names('historicalevent', year_from='1940'), ['Fall of the Berlin Wall', 'Second World War'])
+
+	def test_single_year(self):
+		self.assertEqual(self._names('memory', year_from='1990', year_to='1999'), ['Rave'])
+		self.assertEqual(self._names('memory', year_to='2000'), ['Millennium', 'Rave'])
+
+	def test_unfiltered_list_unchanged(self):
+		self.assertEqual(len(self._names('historicalevent')), 5)
+
+	def test_bad_ranges(self):
+		for params in [{'overlaps': '1914'}, {'overlaps': 'a,b'}, {'year_from': '2000', 'year_to': '1990'}]:
+			response = self.client.get('/metadata/memory/list/', params, **self.AUTH)
+			self.assertEqual(response.status_code, 400, params)
+		response = self.client.get('/metadata/dayofweek/list/', {'overlaps': '1,2'}, **self.AUTH)
+		self.assertEqual(response.status_code, 400)
+
+	def test_years_entered_backwards(self):
+		HistoricalEvent.objects.create(name='Hundred Years War', start_year=1453, end_year=1337)
+		self.assertEqual(self._names('historicalevent', overlaps='1400,1400'), ['Hundred Years War'])
+		self.assertIn({'decade': 1330, 'count': 1}, self.client.get('/metadata/historicalevent/decades/', **self.AUTH).json())
+
+	def test_overlap_uses_gist_index(self):
+		from django.db import connection
+		from .years import filter_years
+		with connection.cursor() as cursor:
+			cursor.execute('SET LOCAL enable_seqscan = off')
+		plan = filter_years(HistoricalEvent.objects.all(), 1914, 1918).explain()
+		self.assertIn('historicalevent_years_gist', plan)
+
+	def test_decades(self):
+		response = self.client.get('/metadata/historicalevent/decades/', **self.AUTH)
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response.json(), [
+			{'decade': 1060, 'count': 1},
+			{'decade': 1910, 'count': 1},
+			{'decade': 1930, 'count': 1},
+			{'decade': 1980, 'count': 1},
+		])
+
+	def test_decades_cached_until_change(self):
+		self.client.get('/metadata/memory/decades/', **self.AUTH)
+		with self.assertNumQueries(0):
+			self.client.get('/metadata/memory/decades/', **self.AUTH)
+		Memory.objects.create(name='Dial-up', year=1995)
+		response = self.client.get('/metadata/memory/decades/', **self.AUTH)
+		self.assertEqual(response.json(), [{'decade': 1990, 'count': 2}, {'decade': 2000, 'count': 1}])
+
+	def test_decades_only_for_year_types(self):
+		self.assertEqual(self.client.get('/metadata/dayofweek/decades/', **self.AUTH).status_code, 404)
+
+
+class FestivalCalendarFeedTest(TestCase):
+	"""/metadata/festival/calendar.ics serves festivals as yearly iCalendar events, cached until they change."""
+
+	AUTH = {'HTTP_AUTHORIZATION': 'key key'}
+	URL = '/metadata/festival/calendar.ics'
+
+	def setUp(self):
+		cache.clear()
+		gregorian = Calendar.objects.create(name='Gregorian', temporal_id='gregory')
+		self.december = Month.objects.create(name='December', calendar=gregorian, order_in_calendar=12)
+		hebrew = Calendar.objects.create(name='Hebrew', temporal_id='hebrew')
+		nisan = Month.objects.create(name='Nisan', calendar=hebrew, order_in_calendar=1, temporal_month_code='M07')
+		self.christmas = Festival.objects.create(name='Christmas', day_of_month=25, month=self.december)
+		FestivalPeriod.objects.create(name='Twelve Days of Christmas', festival=self.christmas, start_day=25, start_month=self.december, duration_days=12)
+		Festival.objects.create(name='Advent; Waiting', month=self.december)
+		Festival.objects.create(name='Passover', day_of_month=15, month=nisan)
+
+	def _events(self, body):
+		return [event.split('END:VEVENT')[0] for event in body.split('BEGIN:VEVENT')[1:]]
+
+	def test_requires_auth(self):
+		self.assertEqual(self.client.get(self.URL).status_code, 401)
+
+	def test_renders_yearly_events(self):
+		response = self.client.get(self.URL, **self.AUTH)
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+		body = response.content.decode()
+		self.assertTrue(body.startswith('BEGIN:VCALENDAR\r\n'))
+		events = self._events(body)
+		self.assertEqual(len(events), 3)
+		christmas = next(event for event in events if 'SUMMARY:Christmas\r\n' in event)
+		self.assertIn('DTSTART;VALUE=DATE:20001225', christmas)
+		self.assertIn('DTEND;VALUE=DATE:20001226', christmas)
+		self.assertIn('RRULE:FREQ=YEARLY', christmas)
+		self.assertIn(f'UID:{self.christmas.get_absolute_url()}', christmas)
+		twelve_days = next(event for event in events if 'Twelve Days' in event)
+		self.assertIn('DTEND;VALUE=DATE:20010106', twelve_days)
+		advent = next(event for event in events if 'Advent' in event)
+		self.assertIn('SUMMARY:Advent\\; Waiting', advent)
+		self.assertIn('DTSTART;VALUE=DATE:20001201', advent)
+		self.assertIn('DTEND;VALUE=DATE:20010101', advent)
+		# Not in the Gregorian calendar, so can't be expressed
+		self.assertNotIn('Passover', body)
+
+	def test_long_lines_folded(self):
+		Festival.objects.create(name='Festival ' + 'é' * 80, day_of_month=1, month=self.december)
+		body = self.client.get(self.URL, **self.AUTH).content
+		for line in body.split(b'\r\n'):
+			self.assertLessEqual(len(line), 75)
+		self.assertIn('é' * 80, body.decode().replace('\r\n ', ''))
+
+	def test_conditional_get(self):
+		response = self.client.get(self.URL, **self.AUTH)
+		etag = response['ETag']
+		self.assertIn('Last-Modified', response)
+		with self.assertNumQueries(0):
+			cached = self.client.get(self.URL, HTTP_IF_NONE_MATCH=etag, **self.AUTH)
+		self.assertEqual(cached.status_code, 304)
+		since = self.client.get(self.URL, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'], **self.AUTH)
+		self.assertEqual(since.status_code, 304)
+
+	def test_same_feed_from_any_render(self):
+		for model in (Festival, FestivalPeriod, Month, Calendar):
+			model.objects.update(modified=datetime(2020, 1, 1, tzinfo=timezone.utc))
+		Festival.objects.filter(pk=self.christmas.pk).update(modified=datetime(2021, 6, 1, 12, 30, tzinfo=timezone.utc))
+		response = self.client.get(self.URL, **self.AUTH)
+		self.assertEqual(response['Last-Modified'], 'Tue, 01 Jun 2021 12:30:00 GMT')
+		self.assertIn('DTSTAMP:20210601T123000Z', response.content.decode())
+		# As another worker, or this one once the cached copy has expired, would render it
+		cache.clear()
+		again = self.client.get(self.URL, **self.AUTH)
+		self.assertEqual(again['ETag'], response['ETag'])
+		self.assertEqual(again.content, response.content)
+
+	def test_deletions_move_last_modified_on(self):
+		for model in (Festival, FestivalPeriod, Month, Calendar):
+			model.objects.update(modified=datetime(2020, 1, 1, tzinfo=timezone.utc))
+		Festival.objects.filter(pk=self.christmas.pk).update(modified=datetime(2021, 6, 1, 12, 30, tzinfo=timezone.utc))
+		last_modified = self.client.get(self.URL, **self.AUTH)['Last-Modified']
+		# The most recently modified festival goes, leaving only older items behind
+		self.christmas.delete()
+		response = self.client.get(self.URL, HTTP_IF_MODIFIED_SINCE=last_modified, **self.AUTH)
+		self.assertEqual(response.status_code, 200)
+		self.assertGreater(parse_http_date(response['Last-Modified']), parse_http_date(last_modified))
+
+	def test_changes_invalidate_feed(self):
+		etag = self.client.get(self.URL, **self.AUTH)['ETag']
+		self.december.name = 'Dec'
+		self.december.save()
+		self.christmas.day_of_month = 24
+		self.christmas.save()
+		response = self.client.get(self.URL, HTTP_IF_NONE_MATCH=etag, **self.AUTH)
+		self.assertEqual(response.status_code, 200)
+		self.assertNotEqual(response['ETag'], etag)
+		self.assertIn('DTSTART;VALUE=DATE:20001224', response.content.decode())
+
+
+class PlaceRollupTest(TestCase):
+	"""/metadata/place/<pk>/<rollup>/ rolls up what's linked to every place contained in a place."""
+
+	AUTH = {'HTTP_AUTHORIZATION': 'key key'}
+
+	def setUp(self):
+		from .models import EthnicGroup, Place
+		cache.clear()
+		region = PlaceType.objects.create(name='region', plural='regions')
+		self.europe = Place.objects.create(name='Europe', type=region)
+		self.uk = Place.objects.create(name='United Kingdom', type=region)
+		self.wales = Place.objects.create(name='Wales', type=region)
+		self.asia = Place.objects.create(name='Asia', type=region)
+		self.uk.contained_in.add(self.europe)
+		self.wales.contained_in.add(self.uk)
+		family = LanguageFamily.objects.create(code='ine', name='Indo-European languages')
+		self.welsh = Language.objects.create(code='cy', name='Welsh', family=family)
+		self.welsh.indigenous_to.add(self.wales)
+		english = Language.objects.create(code='en', name='English', family=family)
+		english.widely_spoken_in.add(self.uk, self.wales)
+		Language.objects.create(code='hi', name='Hindi', family=family).widely_spoken_in.add(self.asia)
+		EthnicGroup.objects.create(name='Welsh people').indigenous_to.add(self.wales)
+
+	def _names(self, place, rollup):
+		response = self.client.get(f'/metadata/place/{place.pk}/{rollup}/', **self.AUTH)
+		self.assertEqual(response.status_code, 200)
+		return [item['name'] for item in response.json()]
+
+	def test_languages_under_place(self):
+		with self.assertNumQueries(2):
+			self.assertEqual(self._names(self.europe, 'languages'), ['English', 'Welsh'])
+		self.assertEqual(self._names(self.asia, 'languages'), ['Hindi'])
+
+	def test_ethnic_groups_under_place(self):
+		self.assertEqual(self._names(self.europe, 'ethnicgroups'), ['Welsh people'])
+
+	def test_places_under_place(self):
+		self.assertEqual(self._names(self.europe, 'places'), ['United Kingdom', 'Wales'])
+		self.assertEqual(self._names(self.wales, 'places'), [])
+
+	def test_invalidated_by_hierarchy_change(self):
+		self.assertEqual(self._names(self.asia, 'languages'), ['Hindi'])
+		self.wales.contained_in.add(self.asia)
+		self.assertEqual(self._names(self.asia, 'languages'), ['English', 'Hindi', 'Welsh'])
+
+	def test_invalidated_by_link_change(self):
+		self.assertEqual(self._names(self.europe, 'languages'), ['English', 'Welsh'])
+		self.welsh.indigenous_to.clear()
+		self.assertEqual(self._names(self.europe, 'languages'), ['English'])
+
+	def test_survives_loop(self):
+		self.europe.contained_in.add(self.wales)
+		self.assertEqual(self._names(self.europe, 'places'), ['United Kingdom', 'Wales'])
+
+	def test_unknown_place(self):
+		self.assertEqual(self.client.get('/metadata/place/999999/languages/', **self.AUTH).status_code, 404)
+
+
+class NeighbourhoodTest(TestCase):
+	"""/metadata/<type>/<pk>/neighbourhood/ gathers everything within a few hops of an item into one graph."""
+
+	AUTH = {'HTTP_AUTHORIZATION': 'key key', 'HTTP_ACCEPT': 'application/n-triples'}
+
+	def setUp(self):
+		from .models import Place
+		region = PlaceType.objects.create(name='region', plural='regions')
+		self.europe = Place.objects.create(name='Europe', type=region)
+		self.uk = Place.objects.create(name='United Kingdom', type=region)
+		self.wales = Place.objects.create(name='Wales', type=region)
+		self.uk.contained_in.add(self.europe)
+		self.wales.contained_in.add(self.uk)
+		family = LanguageFamily.objects.create(code='cel', name='Celtic languages')
+		self.welsh = Language.objects.create(code='cy', name='Welsh', family=family)
+		self.welsh.indigenous_to.add(self.wales)
+
+	def _graph(self, item, **params):
+		import rdflib
+		response = self.client.get(f'/metadata/{item._meta.model_name}/{item.pk}/neighbourhood/', params, **self.AUTH)
+		self.assertEqual(response.status_code, 200)
+		return rdflib.Graph().parse(data=response.content, format='nt')
+
+	def _labelled(self, g):
+		import rdflib
+		return {str(label) for label in g.objects(None, rdflib.RDFS.label)}
+
+	def test_one_hop(self):
+		g = self._graph(self.uk)
+		# Out to its container and type, and in from what it contains
+		self.assertEqual(self._labelled(g), {'United Kingdom', 'Europe', 'Wales', 'region'})
+
+	def test_two_hops(self):
+		g = self._graph(self.uk, depth=2)
+		self.assertIn('Welsh', self._labelled(g))
+		import rdflib
+		from .rdf import EOLAS_NS
+		self.assertIn((rdflib.URIRef(self.wales.get_absolute_url()), EOLAS_NS.indigenousLanguage.resolve(), rdflib.URIRef(self.welsh.get_absolute_url())), g)
+
+	def test_depth_zero_is_just_the_item(self):
+		self.assertEqual(self._labelled(self._graph(self.uk, depth=0)), {'United Kingdom'})
+
+	def test_predicates_limit_hops(self):
+		g = self._graph(self.wales, depth=3, predicates='eolas:containedIn')
+		self.assertEqual(self._labelled(g), {'Wales', 'United Kingdom', 'Europe'})
+
+	def test_queries_batched_per_level(self):
+		from .models import Place
+		for i in range(20):
+			Place.objects.create(name=f'Town {i}', type=self.uk.type).contained_in.add(self.wales)
+		with CaptureQueriesContext(connection) as few:
+			self._graph(self.uk, depth=2)
+		for i in range(20, 40):
+			Place.objects.create(name=f'Town {i}', type=self.uk.type).contained_in.add(self.wales)
+		with CaptureQueriesContext(connection) as more:
+			g = self._graph(self.uk, depth=2)
+		self.assertIn('Town 39', self._labelled(g))
+		self.assertEqual(len(more), len(few))
+
+	def test_bad_requests(self):
+		for params in [{'depth': '4'}, {'depth': 'x'}, {'predicates': 'nope:thing'}]:
+			response = self.client.get(f'/metadata/place/{self.uk.pk}/neighbourhood/', params, **self.AUTH)
+			self.assertEqual(response.status_code, 400, params)
+		self.assertEqual(self.client.get('/metadata/place/999999/neighbourhood/', **self.AUTH).status_code, 404)
+		self.assertEqual(self.client.get('/metadata/nothing/1/neighbourhood/', **self.AUTH).status_code, 404)
+
+
+class SparqlTest(TestCase):
+	"""/sparql queries an in-memory graph of everything, which is rebuilt as the data changes."""
+
+	AUTH = {'HTTP_AUTHORIZATION': 'key key'}
+	LABELS = 'PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#> SELECT ?label WHERE { ?item rdfs:label ?label FILTER(CONTAINS(STR(?item), "/metadata/place/")) } ORDER BY ?label'
+
+	def setUp(self):
+		from ..derived import triples
+		from . import sparql
+		# Each test starts from a fresh graph, built from its own data, which
+		# other threads' connections can't see: so builds run where they're started
+		self.enterContext(patch.object(sparql, 'live_graph', sparql.LiveGraph()))
+		self.enterContext(patch.object(sparql, 'CHECK_INTERVAL', 0))
+		self.enterContext(patch.object(sparql, '_in_background', side_effect=lambda function: function()))
+		cache.clear()
+		self.region = PlaceType.objects.create(name='region', plural='regions')
+		triples.rebuild()
+
+	def _labels(self):
+		response = self.client.get('/sparql', {'query': self.LABELS}, **self.AUTH)
+		self.assertEqual(response.status_code, 200, response.content)
+		return [row['label']['value'] for row in response.json()['results']['bindings']]
+
+	def _create_place(self, name):
+		from .models import Place
+		with patch('lucos_eolas.metadata.signals.updateLoganne'), self.captureOnCommitCallbacks(execute=True):
+			return Place.objects.create(name=name, type=self.region)
+
+	def test_select(self):
+		self._create_place('Wales')
+		response = self.client.get('/sparql', {'query': 'ASK { ?s ?p ?o }'}, **self.AUTH)
+		self.assertEqual(response['Content-Type'], 'application/sparql-results+json; charset=utf-8')
+		self.assertIs(response.json()['boolean'], True)
+		self.assertEqual(self._labels(), ['Wales'])
+
+	def test_post_query_body(self):
+		self._create_place('Wales')
+		response = self.client.post('/sparql', 'SELECT (COUNT(*) AS ?n) WHERE { ?s ?p ?o }', content_type='application/sparql-query', HTTP_ACCEPT='text/csv', **self.AUTH)
+		self.assertEqual(response.status_code, 200)
+		self.assertTrue(response.content.startswith(b'n'))
+
+	def test_construct_is_rdf(self):
+		self._create_place('Wales')
+		response = self.client.get('/sparql', {'query': 'CONSTRUCT { ?s ?p ?o } WHERE { ?s ?p ?o } LIMIT 5'}, HTTP_ACCEPT='application/n-triples', **self.AUTH)
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response['Content-Type'], 'application/n-triples; charset=utf-8')
+
+	def test_rebuilt_after_changes(self):
+		wales = self._create_place('Wales')
+		self.assertEqual(self._labels(), ['Wales'])
+		self._create_place('Cornwall')
+		wales.name = 'Cymru'
+		with patch('lucos_eolas.metadata.signals.updateLoganne'), self.captureOnCommitCallbacks(execute=True):
+			wales.save()
+		self.assertEqual(self._labels(), ['Cornwall', 'Cymru'])
+		with patch('lucos_eolas.metadata.signals.updateLoganne'), self.captureOnCommitCallbacks(execute=True):
+			wales.delete()
+		self.assertEqual(self._labels(), ['Cornwall'])
+
+	def test_results_cached_until_graph_changes(self):
+		from . import sparql
+		self._create_place('Wales')
+		self._labels()
+		with patch.object(sparql, 'run', side_effect=AssertionError("Not cached")):
+			self.assertEqual(self._labels(), ['Wales'])
+		self._create_place('Cornwall')
+		self.assertEqual(self._labels(), ['Cornwall', 'Wales'])
+
+	def test_refuses_what_isnt_a_read_of_eolas(self):
+		for query in [
+			'INSERT DATA { <http://example.com/a> <http://example.com/b> <http://example.com/c> }',
+			'SELECT * FROM <http://example.com/data.ttl> WHERE { ?s ?p ?o }',
+			'SELECT * WHERE { SERVICE <http://example.com/sparql> { ?s ?p ?o } }',
+			'SELECT * WHERE {',
+		]:
+			with self.subTest(query=query):
+				response = self.client.get('/sparql', {'query': query}, **self.AUTH)
+				self.assertEqual(response.status_code, 400)
+
+	def test_missing_query(self):
+		self.assertEqual(self.client.get('/sparql', **self.AUTH).status_code, 400)
+
+	def _held_queries(self):
+		"""Have queries wait, once they've started reading the graph, until the returned `finish` is set."""
+		from . import sparql
+		reading, finish, finished = threading.Event(), threading.Event(), threading.Event()
+		evaluate = sparql._evaluate
+
+		def held(dataset, prepared):
+			reading.set()
+			finish.wait(timeout=5)
+			try:
+				return evaluate(dataset, prepared)
+			finally:
+				finished.set()
+		self.enterContext(patch.object(sparql, '_evaluate', side_effect=held))
+		return reading, finish, finished
+
+	def test_timeout(self):
+		from . import sparql
+		self._create_place('Wales')
+		reading, finish, finished = self._held_queries()
+		started = time.monotonic()
+		with patch.object(sparql.cached_query, '__defaults__', (0.1,)):
+			response = self.client.get('/sparql', {'query': 'SELECT * WHERE { ?s ?p ?o }'}, **self.AUTH)
+		self.assertEqual(response.status_code, 503)
+		self.assertLess(time.monotonic() - started, 2)
+		finish.set()
+		finished.wait(timeout=5)
+
+	def test_changes_dont_wait_for_queries(self):
+		from . import sparql
+		self._create_place('Wales')
+		self.assertEqual(self._labels(), ['Wales'])
+		reading, finish, finished = self._held_queries()
+		results = []
+		graph, _ = sparql.live_graph.snapshot()
+		thread = threading.Thread(target=lambda: results.append(sparql.run(graph, self.LABELS)))
+		thread.start()
+		reading.wait(timeout=5)
+		started = time.monotonic()
+		self._create_place('Cornwall')
+		sparql.live_graph.snapshot()
+		self.assertLess(time.monotonic() - started, 2)
+		finish.set()
+		thread.join()
+		# The query read the graph as it was when it started
+		self.assertEqual([str(row['label']) for row in results[0].bindings], ['Wales'])
+		self.assertEqual(self._labels(), ['Cornwall', 'Wales'])
+
+	def test_old_graph_served_until_rebuilt(self):
+		from . import sparql
+		self._create_place('Wales')
+		self.assertEqual(self._labels(), ['Wales'])
+		builds = []
+		with patch.object(sparql, '_in_background', side_effect=builds.append):
+			self._create_place('Cornwall')
+			self.assertEqual(self._labels(), ['Wales'])
+			# Only one rebuild at a time
+			self.assertEqual(self._labels(), ['Wales'])
+		self.assertEqual(len(builds), 1)
+		builds[0]()
+		self.assertEqual(self._labels(), ['Cornwall', 'Wales'])
+
+	def test_changes_by_other_processes_seen(self):
+		from ..derived import triples
+		from .models import Place
+		self._create_place('Wales')
+		self.assertEqual(self._labels(), ['Wales'])
+		# As another worker would, with no signal reaching this one
+		place = Place.objects.create(name='Cornwall', type=self.region)
+		triples.refresh({place.get_absolute_url()})
+		self.assertEqual(self._labels(), ['Cornwall', 'Wales'])
+
+	def test_requires_auth(self):
+		self.assertEqual(self.client.get('/sparql', {'query': 'ASK { ?s ?p ?o }'}).status_code, 401)
+
+
+class DumpTest(TestCase):
+	"""With EOLAS_DUMP_DIR set, /metadata/all/data/ hands stored, precompressed dumps over to nginx."""
+
+	AUTH = {'HTTP_AUTHORIZATION': 'key key'}
+
+	def setUp(self):
+		from ..derived import triples
+		self.dump_dir = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, self.dump_dir, True)
+		self.enterContext(override_settings(EOLAS_DUMP_DIR=self.dump_dir))
+		self.region = PlaceType.objects.create(name='region', plural='regions')
+		triples.rebuild()
+
+	def _redirect(self, accept='text/turtle', **headers):
+		response = self.client.get('/metadata/all/data/', HTTP_ACCEPT=accept, **headers, **self.AUTH)
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response.content, b'')
+		self.assertIn('Accept-Encoding', response['Vary'])
+		return response['X-Accel-Redirect']
+
+	def _path(self, redirect):
+		from .dumps import ACCEL_PREFIX
+		self.assertTrue(redirect.startswith(ACCEL_PREFIX))
+		return os.path.join(self.dump_dir, redirect[len(ACCEL_PREFIX):])
+
+	def test_writes_dump_with_gzip_copy(self):
+		import gzip
+		import rdflib
+		redirect = self._redirect()
+		self.assertTrue(redirect.endswith('/all.ttl'))
+		with open(self._path(redirect), 'rb') as file:
+			body = file.read()
+		with open(self._path(redirect) + '.gz', 'rb') as file:
+			self.assertEqual(gzip.decompress(file.read()), body)
+		labels = rdflib.Graph().parse(data=body, format='turtle').objects(rdflib.URIRef(self.region.get_absolute_url()), rdflib.RDFS.label)
+		self.assertIn('region', [str(label) for label in labels])
+
+	def test_format_negotiated(self):
+		self.assertTrue(self._redirect('application/n-triples').endswith('/all.nt'))
+		self.assertTrue(self._redirect('application/ld+json').endswith('/all.jsonld'))
+
+	def test_reused_until_data_changes(self):
+		first = self._redirect()
+		with CaptureQueriesContext(connection) as queries:
+			self.assertEqual(self._redirect(), first)
+		self.assertFalse(any('"metadata_' in query['sql'] for query in queries.captured_queries))
+		with patch('lucos_eolas.metadata.signals.updateLoganne'), self.captureOnCommitCallbacks(execute=True):
+			PlaceType.objects.create(name='country', plural='countries')
+		second = self._redirect()
+		self.assertNotEqual(second, first)
+		self.assertTrue(os.path.exists(self._path(second)))
+
+	def test_old_versions_pruned(self):
+		old = os.path.join(self.dump_dir, 'old')
+		os.makedirs(old)
+		os.utime(old, (0, 0))
+		recent = os.path.join(self.dump_dir, 'recent')
+		os.makedirs(recent)
+		self._redirect()
+		self.assertFalse(os.path.exists(old))
+		self.assertTrue(os.path.exists(recent))
+
+	@skipUnless(dumps_module.brotli, "brotli isn't installed")
+	def test_brotli_copy_for_clients_accepting_it(self):
+		redirect = self._redirect(HTTP_ACCEPT_ENCODING='gzip, br')
+		self.assertTrue(redirect.endswith('.br'))
+		with open(self._path(redirect), 'rb') as file, open(self._path(redirect[:-3]), 'rb') as uncompressed:
+			self.assertEqual(dumps_module.brotli.decompress(file.read()), uncompressed.read())
+
+	def test_no_brotli_copy_for_other_clients(self):
+		self.assertFalse(self._redirect(HTTP_ACCEPT_ENCODING='gzip, br;q=0').endswith('.br'))
+
+	def test_served_directly_without_dump_dir(self):
+		with override_settings(EOLAS_DUMP_DIR=None):
+			response = self.client.get('/metadata/all/data/', HTTP_ACCEPT='text/turtle', **self.AUTH)
+		self.assertNotIn('X-Accel-Redirect', response)
+		self.assertIn(b'region', response.content)
+
+	def test_served_directly_until_table_built(self):
+		with patch.dict('os.environ', {'VERSION': 'next'}):
+			response = self.client.get('/metadata/all/data/', HTTP_ACCEPT='text/turtle', **self.AUTH)
+		self.assertNotIn('X-Accel-Redirect', response)
+		self.assertEqual(os.listdir(self.dump_dir), [])
+
+	def test_requires_auth(self):
+		self.assertEqual(self.client.get('/metadata/all/data/').status_code, 401)
+
+	async def test_only_full_dump_handed_over(self):
+		from asgiref.sync import sync_to_async
+		from django.test import AsyncRequestFactory
+		from . import views_async
+		factory = AsyncRequestFactory()
+		headers = {'Authorization': 'key key', 'Accept': 'text/turtle'}
+		response = await views_async.all_rdf(factory.get('/x', headers=headers))
+		self.assertIn('X-Accel-Redirect', response)
+		uri = await sync_to_async(self.region.get_absolute_url)()
+		response = await views_async.batch_data(factory.post('/x', data=json.dumps([uri]), content_type='application/json', headers=headers))
+		self.assertNotIn('X-Accel-Redirect', response)
+		self.assertIn(b'region', response.content)
+
+
 # ─── Merge Action Tests ───────────────────────────────────────────────────────
 
 @override_settings(AUTHENTICATION_BACKENDS=['django.contrib.auth.backends.ModelBackend'])
@@ -961,6 +2565,71 @@ class LanguageFamilyUrlTest(TestCase):
 		self.assertEqual(url, 'http://id.loc.gov/vocabulary/iso639-5/gem')
 
 
+class LanguageFamilyTreeTest(TestCase):
+	"""/metadata/languagefamily/<code>/tree/ returns a whole subtree, fetched in a fixed number of queries."""
+
+	AUTH = {'HTTP_AUTHORIZATION': 'key key'}
+
+	def setUp(self):
+		cache.clear()
+		self.ine = LanguageFamily.objects.create(code='ine', name='Indo-European languages')
+		gem = LanguageFamily.objects.create(code='gem', name='Germanic languages', parent=self.ine)
+		gmw = LanguageFamily.objects.create(code='gmw', name='West Germanic languages', parent=gem)
+		LanguageFamily.objects.create(code='roa', name='Romance languages', parent=self.ine)
+		LanguageFamily.objects.create(code='sit', name='Sino-Tibetan languages')
+		Language.objects.create(code='en', name='English', family=gmw)
+		Language.objects.create(code='de', name='German', family=gmw)
+		Language.objects.create(code='sv', name='Swedish', family=gem)
+		Language.objects.create(code='zh', name='Chinese', family_id='sit')
+
+	def test_nested_json(self):
+		with self.assertNumQueries(2):
+			response = self.client.get('/metadata/languagefamily/ine/tree/', **self.AUTH)
+		self.assertEqual(response.status_code, 200)
+		tree = response.json()
+		self.assertEqual(tree['uri'], 'http://id.loc.gov/vocabulary/iso639-5/ine')
+		self.assertEqual([family['id'] for family in tree['subfamilies']], ['gem', 'roa'])
+		germanic = tree['subfamilies'][0]
+		self.assertEqual([language['name'] for language in germanic['languages']], ['Swedish'])
+		self.assertEqual([language['name'] for language in germanic['subfamilies'][0]['languages']], ['English', 'German'])
+		self.assertNotIn('Chinese', response.content.decode())
+
+	def test_rdf(self):
+		import rdflib
+		response = self.client.get('/metadata/languagefamily/gem/tree/', HTTP_ACCEPT='text/turtle', **self.AUTH)
+		self.assertEqual(response.status_code, 200)
+		g = rdflib.Graph().parse(data=response.content, format='turtle')
+		gmw = rdflib.URIRef('http://id.loc.gov/vocabulary/iso639-5/gmw')
+		self.assertIn((gmw, rdflib.RDFS.subClassOf, rdflib.URIRef('http://id.loc.gov/vocabulary/iso639-5/gem')), g)
+		self.assertIn((None, rdflib.RDF.type, gmw), g)
+		self.assertNotIn((rdflib.URIRef('http://id.loc.gov/vocabulary/iso639-5/ine'), None, None), g)
+
+	def test_cached_until_change(self):
+		self.client.get('/metadata/languagefamily/ine/tree/', **self.AUTH)
+		with self.assertNumQueries(0):
+			self.client.get('/metadata/languagefamily/ine/tree/', **self.AUTH)
+		Language.objects.create(code='nl', name='Dutch', family_id='gmw')
+		tree = self.client.get('/metadata/languagefamily/ine/tree/', **self.AUTH).json()
+		self.assertEqual(len(tree['subfamilies'][0]['subfamilies'][0]['languages']), 3)
+
+	def test_survives_loop(self):
+		LanguageFamily.objects.filter(code='ine').update(parent='gmw')
+		tree = self.client.get('/metadata/languagefamily/ine/tree/', **self.AUTH).json()
+		self.assertEqual(tree['subfamilies'][0]['subfamilies'][0]['subfamilies'], [])
+
+	def test_unknown_family(self):
+		self.assertEqual(self.client.get('/metadata/languagefamily/xxx/tree/', **self.AUTH).status_code, 404)
+		self.assertEqual(self.client.get('/metadata/languagefamily/xxx/tree/', HTTP_ACCEPT='text/turtle', **self.AUTH).status_code, 404)
+
+	def test_requires_auth(self):
+		self.assertEqual(self.client.get('/metadata/languagefamily/ine/tree/').status_code, 401)
+
+	def test_rdf_of_family_doesnt_load_parent(self):
+		family = LanguageFamily.objects.get(code='gem')
+		with self.assertNumQueries(0):
+			family.get_rdf(include_type_label=False)
+
+
 class LanguageFamilyWebhookUrlTest(TestCase):
 	"""LanguageFamily.get_webhook_url always returns an eolas-hosted URL.
 
@@ -1023,6 +2692,90 @@ class LoadLanguageFamiliesSpecialCodesTest(TestCase):
 		self.assertEqual(Language.objects.filter(code='zxx').count(), 1)
 
 
+@patch('lucos_eolas.metadata.management.commands.load_language_families.updateLoganne')
+class LoadLanguageFamiliesCrawlTest(TestCase):
+	"""load_language_families crawls ISO 639-5 concurrently, caching responses, or reads a snapshot offline."""
+
+	PREFIX = 'http://id.loc.gov/vocabulary/iso639-5/'
+
+	def setUp(self):
+		import tempfile
+		self.dir = tempfile.TemporaryDirectory()
+		self.addCleanup(self.dir.cleanup)
+		self.names = {'ine': 'Indo-European languages', 'gem': 'Germanic languages', 'gmq': 'North Germanic languages', 'sit': 'Sino-Tibetan languages'}
+		self.children = {'ine': ['gem'], 'gem': ['gmq']}
+
+	def _entry(self, code):
+		skos = 'http://www.w3.org/2004/02/skos/core#'
+		return {
+			'@id': self.PREFIX + code,
+			f'{skos}prefLabel': [{'@value': self.names[code]}],
+			f'{skos}narrower': [{'@id': self.PREFIX + child} for child in self.children.get(code, [])],
+		}
+
+	def _session(self, failing=()):
+		"""A stand-in for requests.Session, serving LoC's documents from self.names."""
+		from lucos_eolas.metadata.management.commands.load_language_families import ROOT_URI
+		session = MagicMock()
+		def get(uri, **kwargs):
+			if uri in failing:
+				raise ConnectionError(uri)
+			response = MagicMock()
+			if uri == ROOT_URI:
+				response.json.return_value = [{'@id': self.PREFIX + 'ine'}, {'@id': self.PREFIX + 'sit'}, {'@id': 'http://id.loc.gov/vocabulary/iso639-5'}]
+			else:
+				code = uri.split('/')[-1]
+				response.json.return_value = [{'@id': 'http://example.com/other'}, self._entry(code)]
+			return response
+		session.get.side_effect = get
+		return session
+
+	def _run(self, session=None, **options):
+		from io import StringIO
+		from django.core.management import call_command
+		with patch('lucos_eolas.metadata.management.commands.load_language_families.make_session', return_value=session):
+			call_command('load_language_families', stdout=StringIO(), **options)
+
+	def _parents(self):
+		return dict(LanguageFamily.objects.exclude(code__in=['qli', 'qsp']).values_list('code', 'parent_id'))
+
+	def test_crawls_every_family_with_its_parent(self, loganne):
+		self._run(self._session())
+		self.assertEqual(self._parents(), {'ine': None, 'gem': 'ine', 'gmq': 'gem', 'sit': None})
+		self.assertEqual(LanguageFamily.objects.get(code='gmq').name, 'North Germanic languages')
+		loganne.assert_called_once()
+
+	def test_rerun_updates_existing_families(self, loganne):
+		self._run(self._session())
+		self.names['gem'] = 'Germanic'
+		self.children = {'ine': ['gem', 'gmq']}
+		self._run(self._session())
+		self.assertEqual(LanguageFamily.objects.get(code='gem').name, 'Germanic')
+		self.assertEqual(self._parents()['gmq'], 'ine')
+
+	def test_rerun_marks_families_modified(self, loganne):
+		self._run(self._session())
+		LanguageFamily.objects.update(modified=datetime(2020, 1, 1, tzinfo=timezone.utc))
+		self._run(self._session())
+		self.assertFalse(LanguageFamily.objects.exclude(code__in=['qli', 'qsp']).filter(modified__year=2020).exists())
+
+	def test_interrupted_run_resumes_from_cache(self, loganne):
+		with self.assertRaises(ConnectionError):
+			self._run(self._session(failing={self.PREFIX + 'gmq'}), cache_dir=self.dir.name)
+		session = self._session()
+		self._run(session, cache_dir=self.dir.name)
+		# Only the family that failed is fetched again
+		self.assertEqual([call.args[0] for call in session.get.call_args_list], [self.PREFIX + 'gmq'])
+		self.assertEqual(self._parents(), {'ine': None, 'gem': 'ine', 'gmq': 'gem', 'sit': None})
+
+	def test_snapshot_loads_without_network(self, loganne):
+		snapshot = f'{self.dir.name}/iso639-5.jsonld'
+		self._run(self._session(), write_snapshot=snapshot)
+		LanguageFamily.objects.exclude(code__in=['qli', 'qsp']).delete()
+		self._run(None, snapshot=snapshot)
+		self.assertEqual(self._parents(), {'ine': None, 'gem': 'ine', 'gmq': 'gem', 'sit': None})
+
+
 # ─── TransportMode Tests ───────────────────────────────────────────────────────
 
 class TransportModeStrTest(TestCase):
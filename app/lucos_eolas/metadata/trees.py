@@ -0,0 +1,83 @@
+"""
+Whole subtrees of the language family hierarchy, fetched in a fixed number of queries.
+
+A family's subfamilies, and theirs, and so on down, are found with a single
+recursive query, and the languages in all of them with a second one, however
+deep the tree goes.  What's made from them is cached until any family or
+language changes (see caching.py).
+"""
+
+from collections import defaultdict
+
+from .caching import versioned_cache
+from .models import Language, LanguageFamily
+
+# UNION rather than UNION ALL, so that a loop in the hierarchy can't recurse forever
+SUBTREE_SQL = f"""
+	WITH RECURSIVE subtree AS (
+		SELECT * FROM {LanguageFamily._meta.db_table} WHERE code = %s
+		UNION
+		SELECT family.* FROM {LanguageFamily._meta.db_table} AS family
+		JOIN subtree ON family.parent_id = subtree.code
+	)
+	SELECT * FROM subtree
+"""
+
+
+def fetch_subtree(code):
+	"""Return (every family from code down, every language in them), or None if
+	there's no family with that code."""
+	families = list(LanguageFamily.objects.raw(SUBTREE_SQL, [code]))
+	if not families:
+		return None
+	languages = list(Language.objects.filter(family__in=[family.code for family in families]).order_by('name'))
+	return families, languages
+
+
+def _nest(family, subfamilies, languages, seen):
+	seen.add(family.code)
+	return {
+		'id': family.code,
+		'uri': family.get_absolute_url(),
+		'name': family.name,
+		'languages': [{'id': language.code, 'uri': language.get_absolute_url(), 'name': language.name} for language in languages[family.code]],
+		'subfamilies': [_nest(child, subfamilies, languages, seen) for child in subfamilies[family.code] if child.code not in seen],
+	}
+
+
+def family_tree_json(code):
+	"""Return the family with the given code as nested JSON-ready dicts, or None."""
+	def compute():
+		fetched = fetch_subtree(code)
+		if fetched is None:
+			return None
+		families, languages = fetched
+		subfamilies = defaultdict(list)
+		for family in sorted(families, key=lambda family: family.name):
+			if family.code != code:
+				subfamilies[family.parent_id].append(family)
+		languages_by_family = defaultdict(list)
+		for language in languages:
+			languages_by_family[language.family_id].append(language)
+		root = next(family for family in families if family.code == code)
+		return _nest(root, subfamilies, languages_by_family, set())
+	return versioned_cache(f'language-family-tree:{code}', [LanguageFamily, Language], compute)
+
+
+def family_tree_rdf(code, format):
+	"""Return the RDF of the family with the given code and everything under it,
+	serialized in the given rdflib format, or None."""
+	def compute():
+		import rdflib
+		from .views import bind_namespaces
+		fetched = fetch_subtree(code)
+		if fetched is None:
+			return None
+		families, languages = fetched
+		Language.preload(languages)
+		g = rdflib.Graph()
+		bind_namespaces(g)
+		for item in families + languages:
+			g += item.get_rdf(include_type_label=False)
+		return g.serialize(format=format)
+	return versioned_cache(f'language-family-tree-rdf:{format}:{code}', [LanguageFamily, Language], compute)
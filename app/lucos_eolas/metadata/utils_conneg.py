@@ -61,3 +61,39 @@ def choose_rdf_over_html(request):
 				html_weight = q
 	# Only redirect to RDF if rdf_weight is non-zero and is preferred or equal to html
 	return (rdf_weight > 0 and rdf_weight >= html_weight)
+
+def choose_rdf_over_json(request):
+	"""
+	Returns True if the client would prefer some form of RDF more than plain JSON.
+	Otherwise returns False
+	"""
+	parsed = parse_accept_header(request)
+	rdf_weight = 0
+	json_weight = 0
+	for mime, q in parsed:
+		if mime in RDF_FORMATS.keys():
+			if q > rdf_weight:
+				rdf_weight = q
+		if mime == "application/json":
+			if q > json_weight:
+				json_weight = q
+	return (rdf_weight > 0 and rdf_weight >= json_weight)
+
+NDJSON_MIME = "application/x-ndjson"
+
+def choose_ndjson_over_json(request):
+	"""
+	Returns True if the client would prefer newline-delimited JSON (one JSON
+	value per line) to a single JSON document.  Otherwise returns False
+	"""
+	parsed = parse_accept_header(request)
+	ndjson_weight = 0
+	json_weight = 0
+	for mime, q in parsed:
+		if mime == NDJSON_MIME:
+			if q > ndjson_weight:
+				ndjson_weight = q
+		if mime == "application/json":
+			if q > json_weight:
+				json_weight = q
+	return (ndjson_weight > 0 and ndjson_weight >= json_weight)
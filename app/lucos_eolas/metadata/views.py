@@ -1,24 +1,43 @@
+import datetime
 import json
 import os
-import rdflib
+import threading
+from functools import lru_cache
 from urllib.parse import urlparse
-from django.db import models, IntegrityError
+from django.db import connection, models, IntegrityError
 from django.core.exceptions import ValidationError
-from django.http import HttpResponseRedirect, HttpResponse, JsonResponse
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponseRedirect, HttpResponse, JsonResponse, StreamingHttpResponse
 from .models import *
+from .rdf import EOLAS_NS, DBPEDIA_NS, LOC_NS, WDT_NS
 from .checks import get_cached_checks
-from ..lucosauth.decorators import api_auth
+from .export import EXPORT_FORMATS, copy_rows
+from .ical import festival_calendar
+from .years import decade_histogram, filter_years, parse_year_range
+from .trees import family_tree_json, family_tree_rdf
+from .rollups import rollup
+from .neighbourhood import MAX_DEPTH, neighbourhood, parse_predicates
+from . import dumps, sparql as sparql_graph
+from ..derived import triples
+from ..lucosauth.decorators import api_auth, machine_route
+from ..admission import cost_class, admission_stats
+from ..querybudget import query_budget, per_model
 from django.utils import translation
 from django.conf import settings
-from .utils_conneg import choose_rdf_over_html, pick_best_rdf_format
+from .utils_conneg import choose_rdf_over_html, choose_rdf_over_json, choose_ndjson_over_json, parse_accept_header, pick_best_rdf_format, NDJSON_MIME
 from django.apps import apps
 from django.core.exceptions import ObjectDoesNotExist
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.http import http_date
+from django.views.decorators.cache import cache_control
+from django.views.decorators.vary import vary_on_headers
 
 BASE_URL = os.environ.get("APP_ORIGIN")
-EOLAS_NS = rdflib.Namespace(f"{BASE_URL}/ontology/")
-DBPEDIA_NS = rdflib.Namespace("https://dbpedia.org/ontology/")
-LOC_NS = rdflib.Namespace("http://www.loc.gov/mads/rdf/v1#")
-WDT_NS = rdflib.Namespace("http://www.wikidata.org/prop/direct/")
+
+# Rows fetched at a time by streaming responses
+CHUNK_SIZE = 500
 
 _PENDING_CHECK = {
 	'ok': False,
@@ -33,7 +52,17 @@ _COLD_CACHE_CHECKS = {
 	'no-invalid-wikipedia-slugs': _PENDING_CHECK,
 }
 
+# Seconds nginx (see web/routing.conf) and clients may cache the public endpoints
+# for.  The ontology and categories only change with the code, and each deploy
+# starts nginx's cache afresh.
+PUBLIC_CACHE_SECONDS = 60 * 60
+# Checks are recomputed in the background anyway, and metrics are per worker
+INFO_CACHE_SECONDS = 10
+
 
+@machine_route
+@cache_control(public=True, max_age=INFO_CACHE_SECONDS)
+@query_budget(0)
 def info(request):
 	# Check results are precomputed by a background thread and cached.
 	# On cold start (before the first recompute completes) we return pending placeholders.
@@ -41,7 +70,7 @@ def info(request):
 	output = {
 		'system': "lucos_eolas",
 		'checks': checks,
-		'metrics': {},
+		'metrics': {**_admission_metrics(), **_db_pool_metrics()},
 		'ci': {
 			'circle': "gh/lucas42/lucos_eolas",
 		},
@@ -52,30 +81,78 @@ def info(request):
 	}
 	return JsonResponse(output)
 
+def _admission_metrics():
+	metrics = {}
+	for cost, stats in admission_stats().items():
+		metrics[f'{cost}-requests-rejected'] = {
+			'value': stats['rejected'] + stats['timed_out'],
+			'techDetail': f"Requests to '{cost}' endpoints turned away with 429/503 by this worker since it started",
+		}
+		metrics[f'{cost}-requests-coalesced'] = {
+			'value': stats['coalesced'],
+			'techDetail': f"Requests to '{cost}' endpoints answered from an identical in-flight request by this worker since it started",
+		}
+	return metrics
+
+_DB_POOL_METRICS = {
+	'db-pool-checkouts': (('requests_num',), "Connections handed out by this worker's database pool since it started"),
+	'db-pool-waits': (('requests_queued',), "Connection requests which had to wait for a free connection in this worker's database pool"),
+	'db-pool-errors': (('requests_errors', 'connections_errors', 'connections_lost', 'returns_bad'), "Failed connection requests, failed or lost connections and connections returned in a bad state, in this worker's database pool"),
+}
+
+def _db_pool_metrics():
+	pool = getattr(connection, 'pool', None)
+	if pool is None:
+		return {}
+	# Counters are only present in the stats once they're non-zero
+	stats = pool.get_stats()
+	return {
+		name: {
+			'value': sum(stats.get(key, 0) for key in keys),
+			'techDetail': detail,
+		}
+		for name, (keys, detail) in _DB_POOL_METRICS.items()
+	}
+
 # No auth needed as ontology shouldn't contain anything sensitive
+@machine_route
+@cache_control(public=True, max_age=PUBLIC_CACHE_SECONDS)
+@vary_on_headers('Accept')
+@query_budget(0)
 def ontology(request):
 	format, content_type = pick_best_rdf_format(request)
-	return HttpResponse(ontology_graph().serialize(format=format), content_type=f'{content_type}; charset={settings.DEFAULT_CHARSET}')
+	return HttpResponse(serialized_ontology(format), content_type=f'{content_type}; charset={settings.DEFAULT_CHARSET}')
 
+def bind_namespaces(g):
+	g.bind('dbpedia', DBPEDIA_NS.resolve())
+	g.bind('eolas', EOLAS_NS.resolve())
+	g.bind('loc', LOC_NS.resolve())
+	g.bind('wdt', WDT_NS.resolve())
+
+@lru_cache(maxsize=None)
 def ontology_graph():
+	"""Return the ontology as an RDF graph.
+
+	It only depends on code, so is built once per process (see warmup.py) and
+	shared: callers must not modify it.
+	"""
+	import rdflib
+	eolas = EOLAS_NS.resolve()
 	g = rdflib.Graph()
-	g.bind('eolas', EOLAS_NS)
-	g.bind('dbpedia', DBPEDIA_NS)
-	g.bind('loc', LOC_NS)
-	g.bind('wdt', WDT_NS)
+	bind_namespaces(g)
 	ontology_uri = rdflib.URIRef(f"{BASE_URL}/ontology/")
 	g.add((ontology_uri, rdflib.RDF.type, rdflib.OWL.Ontology))
-	g.add((EOLAS_NS.Category, rdflib.RDF.type, rdflib.OWL.Class))
-	g.add((EOLAS_NS.Category, rdflib.SKOS.prefLabel, rdflib.Literal("Category", lang='en')))
-	g.add((EOLAS_NS.Category, EOLAS_NS.hasCategory, EOLAS_NS[Category.META]))
-	g.add((EOLAS_NS.hasCategory, rdflib.RDF.type, rdflib.OWL.ObjectProperty))
-	g.add((EOLAS_NS.hasCategory, rdflib.SKOS.prefLabel, rdflib.Literal("has category", lang='en')))
-	g.add((EOLAS_NS.hasCategory, rdflib.RDFS.domain, rdflib.OWL.Class))
-	g.add((EOLAS_NS.hasCategory, rdflib.RDFS.range, EOLAS_NS.Category))
-	g.add((EOLAS_NS.preferredIdentifier, rdflib.RDF.type, rdflib.OWL.ObjectProperty))
-	g.add((EOLAS_NS.preferredIdentifier, rdflib.RDF.type, rdflib.OWL.AsymmetricProperty))
-	g.add((EOLAS_NS.preferredIdentifier, rdflib.SKOS.prefLabel, rdflib.Literal("preferred identifier", lang='en')))
-	g.add((EOLAS_NS.preferredIdentifier, rdflib.RDFS.comment, rdflib.Literal(
+	g.add((eolas.Category, rdflib.RDF.type, rdflib.OWL.Class))
+	g.add((eolas.Category, rdflib.SKOS.prefLabel, rdflib.Literal("Category", lang='en')))
+	g.add((eolas.Category, eolas.hasCategory, eolas[Category.META]))
+	g.add((eolas.hasCategory, rdflib.RDF.type, rdflib.OWL.ObjectProperty))
+	g.add((eolas.hasCategory, rdflib.SKOS.prefLabel, rdflib.Literal("has category", lang='en')))
+	g.add((eolas.hasCategory, rdflib.RDFS.domain, rdflib.OWL.Class))
+	g.add((eolas.hasCategory, rdflib.RDFS.range, eolas.Category))
+	g.add((eolas.preferredIdentifier, rdflib.RDF.type, rdflib.OWL.ObjectProperty))
+	g.add((eolas.preferredIdentifier, rdflib.RDF.type, rdflib.OWL.AsymmetricProperty))
+	g.add((eolas.preferredIdentifier, rdflib.SKOS.prefLabel, rdflib.Literal("preferred identifier", lang='en')))
+	g.add((eolas.preferredIdentifier, rdflib.RDFS.comment, rdflib.Literal(
 		"Subject URI declares the object URI as its preferred canonical identifier. "
 		"Used by the arachne search-index ingestor to pick the primary id for merged "
 		"owl:sameAs closures: arachne walks preferredIdentifier edges to find the "
@@ -83,23 +160,23 @@ def ontology_graph():
 		"then B preferredIdentifier A is false. Domain and range deliberately unconstrained — "
 		"the predicate can apply to any URI in the estate.", lang='en')))
 	for pred_uri, label in [
-		(EOLAS_NS.displayBackgroundColour, "display background colour"),
-		(EOLAS_NS.displayBorderColour, "display border colour"),
-		(EOLAS_NS.displayTextColour, "display text colour"),
+		(eolas.displayBackgroundColour, "display background colour"),
+		(eolas.displayBorderColour, "display border colour"),
+		(eolas.displayTextColour, "display text colour"),
 	]:
 		g.add((pred_uri, rdflib.RDF.type, rdflib.OWL.DatatypeProperty))
 		g.add((pred_uri, rdflib.SKOS.prefLabel, rdflib.Literal(label, lang='en')))
-		g.add((pred_uri, rdflib.RDFS.domain, EOLAS_NS.Category))
+		g.add((pred_uri, rdflib.RDFS.domain, eolas.Category))
 		g.add((pred_uri, rdflib.RDFS.range, rdflib.XSD.string))
 	for category in Category:
-		category_uri = EOLAS_NS[category.value]
-		g.add((category_uri, rdflib.RDF.type, EOLAS_NS.Category))
+		category_uri = eolas[category.value]
+		g.add((category_uri, rdflib.RDF.type, eolas.Category))
 		for lang, _ in settings.LANGUAGES:
 			with translation.override(lang):
 				g.add((category_uri, rdflib.SKOS.prefLabel, rdflib.Literal(category.label, lang=lang)))
-		g.add((category_uri, EOLAS_NS.displayBackgroundColour, rdflib.Literal(category.background)))
-		g.add((category_uri, EOLAS_NS.displayBorderColour, rdflib.Literal(category.border)))
-		g.add((category_uri, EOLAS_NS.displayTextColour, rdflib.Literal(category.text)))
+		g.add((category_uri, eolas.displayBackgroundColour, rdflib.Literal(category.background)))
+		g.add((category_uri, eolas.displayBorderColour, rdflib.Literal(category.border)))
+		g.add((category_uri, eolas.displayTextColour, rdflib.Literal(category.text)))
 	for model_class in apps.get_app_config('metadata').get_models():
 		if (getattr(model_class, 'rdf_type', None)):
 			class_uri = model_class.rdf_type
@@ -116,7 +193,7 @@ def ontology_graph():
 				# (CharField on PlaceType/CreativeWorkType) are descriptors, not Category enum
 				# values — guarding with isinstance prevents building a garbage URI from the
 				# descriptor's string representation.
-				g.add((class_uri, EOLAS_NS.hasCategory, EOLAS_NS[class_category]))
+				g.add((class_uri, eolas.hasCategory, eolas[class_category]))
 			for field in model_class._meta.get_fields():
 				if getattr(field, 'rdf_predicate', None):
 					with translation.override('en'):
@@ -141,6 +218,14 @@ def ontology_graph():
 				g += model_class.get_ontology_rdf()
 	return g
 
+_serialize_lock = threading.Lock()
+
+@lru_cache(maxsize=None)
+def serialized_ontology(format):
+	# Serialising can bind new prefixes on the shared graph, so one at a time
+	with _serialize_lock:
+		return ontology_graph().serialize(format=format)
+
 def _safe_local_redirect(url):
 	"""Only allow redirects to relative paths on this server (no scheme or netloc)."""
 	parsed = urlparse(url)
@@ -157,28 +242,95 @@ def thing_entrypoint(request, type, pk):
 		# 303 See Other to the admin change endpoint for non-RDF requests
 		return HttpResponseSeeOther(_safe_local_redirect(f'/metadata/{type}/{pk}/change/'))
 
+# The item, plus one query for each of its relations (see EolasModel.preload)
 @api_auth(required_scope='eolas:read')
+@query_budget(8)
 def thing_data(request, type, pk):
 	format, content_type = pick_best_rdf_format(request)
 	try:
 		model_class = apps.get_model('metadata', type)
+	except LookupError:
+		return HttpResponse(status=404)
+	g = item_graph(model_class, pk)
+	if g is None:
+		return HttpResponse(status=404)
+	bind_namespaces(g)
+	return HttpResponse(g.serialize(format=format), content_type=f'{content_type}; charset={settings.DEFAULT_CHARSET}')
+
+def item_graph(model_class, pk):
+	"""Return the RDF of an item, with its type's labels, or None if there's no such item.
+
+	Read from the triple table in one query, once the running release has built
+	it (see derived/triples.py); until then, from the item itself.
+	"""
+	if triples.is_current():
+		try:
+			uri = model_class(pk=model_class._meta.pk.to_python(pk)).get_absolute_url()
+		except ValidationError:
+			return None
+		rows = triples.item_rows(uri)
+		return triples.to_graph(rows) if rows else None
+	try:
 		obj = model_class.objects.get(pk=pk)
-	except (ObjectDoesNotExist, LookupError):
+	except ObjectDoesNotExist:
+		return None
+	return obj.get_rdf(include_type_label=True)
+
+def _depth(request):
+	depth = int(request.GET.get('depth', 1))
+	if not 0 <= depth <= MAX_DEPTH:
+		raise ValueError(f"depth must be from 0 to {MAX_DEPTH}")
+	return depth
+
+def _neighbourhood_budget(request, *args, **kwargs):
+	"""Each level can reach every type, and costs each type it reaches its query,
+	its preload() queries and one query per relation into it."""
+	try:
+		depth = _depth(request)
+	except ValueError:
+		return 0
+	return per_model(3)(request) * (depth + 1)
+
+@api_auth(required_scope='eolas:read')
+@query_budget(_neighbourhood_budget)
+def thing_neighbourhood(request, type, pk):
+	"""GET /metadata/<type>/<pk>/neighbourhood/?depth=N&predicates=… — the RDF of an
+	item and of everything up to N hops (default 1, at most 3) from it, as one graph
+	(see neighbourhood.py).  predicates, if given, is a comma-separated list of the
+	predicates to follow, as full URIs or prefixed names such as eolas:containedIn.
+	"""
+	try:
+		depth = _depth(request)
+		predicates = parse_predicates(request.GET['predicates']) if 'predicates' in request.GET else None
+	except ValueError as error:
+		return HttpResponse(str(error), status=400, content_type='text/plain')
+	try:
+		model_class = apps.get_model('metadata', type)
+		pk = model_class._meta.pk.to_python(pk)
+	except (LookupError, ValidationError):
+		return HttpResponse(status=404)
+	g = neighbourhood(model_class, pk, depth, predicates)
+	if g is None:
 		return HttpResponse(status=404)
-	g = obj.get_rdf(include_type_label=True)
-	g.bind('dbpedia', DBPEDIA_NS)
-	g.bind('eolas', EOLAS_NS)
-	g.bind('loc', LOC_NS)
-	g.bind('wdt', WDT_NS)
+	format, content_type = pick_best_rdf_format(request)
+	bind_namespaces(g)
 	return HttpResponse(g.serialize(format=format), content_type=f'{content_type}; charset={settings.DEFAULT_CHARSET}')
 
 @api_auth(required_scope='eolas:read')
+@query_budget(8)
 def type_list(request, type):
 	"""Return all items of the given type as a JSON array.
 
 	Each item includes at minimum 'id', 'uri', and 'name', plus any
 	type-specific scalar and foreign-key fields (see EolasModel.to_json).
 	Returns 404 for unknown types.
+
+	Clients which prefer application/x-ndjson get one item per line instead,
+	streamed a chunk of rows at a time, so memory use doesn't grow with the table.
+
+	Types placed in time by year (see years.py) can be narrowed to the items
+	overlapping a range of years, with ?overlaps=FIRST,LAST or ?year_from=&year_to=
+	(either end may be left open).
 	"""
 	try:
 		model_class = apps.get_model('metadata', type)
@@ -186,10 +338,221 @@ def type_list(request, type):
 		return HttpResponse(status=404)
 	if not hasattr(model_class, 'to_json'):
 		return HttpResponse(status=404)
-	items = [obj.to_json() for obj in model_class.objects.select_related().all()]
+	queryset, error = list_queryset(request, model_class)
+	if error:
+		return error
+	if choose_ndjson_over_json(request):
+		lines = (
+			json.dumps(obj.to_json(), cls=DjangoJSONEncoder) + '\n'
+			for chunk in preloaded_chunks(queryset)
+			for obj in chunk
+		)
+		return StreamingHttpResponse(lines, content_type=NDJSON_MIME)
+	objs = list(queryset)
+	model_class.preload(objs)
+	items = [obj.to_json() for obj in objs]
+	return JsonResponse(items, safe=False)
+
+def list_queryset(request, model_class):
+	"""Return (the items type_list should return, None), or (None, an error response)."""
+	queryset = model_class.objects.select_related().all()
+	try:
+		year_range = parse_year_range(request.GET)
+	except ValueError:
+		return None, JsonResponse({'error': 'years must be whole numbers, in order'}, status=400)
+	if year_range is not None:
+		if not model_class.year_fields:
+			return None, JsonResponse({'error': f'{model_class._meta.verbose_name_plural} have no years'}, status=400)
+		queryset = filter_years(queryset, *year_range)
+	return queryset, None
+
+def parse_since(params):
+	"""Return the ?since= datetime in params, or None; raises ValueError unless it's
+	an ISO 8601 date or datetime.  Times without a timezone are taken to be UTC."""
+	text = params.get('since')
+	if not text:
+		return None
+	# An unescaped + in a query string arrives as a space
+	text = text.replace(' ', '+')
+	since = parse_datetime(text)
+	if since is None:
+		day = parse_date(text)
+		if day is None:
+			raise ValueError("since must be an ISO 8601 date or datetime")
+		since = datetime.datetime.combine(day, datetime.time())
+	if timezone.is_naive(since):
+		since = timezone.make_aware(since, datetime.timezone.utc)
+	return since
+
+def type_queryset(model_class, since=None):
+	"""Every item of model_class, or those modified since `since`, in pk order."""
+	queryset = model_class.objects.order_by('pk')
+	if since is not None:
+		queryset = queryset.filter(modified__gte=since)
+	return queryset
+
+def type_items(model_class, since=None):
+	"""Return type_queryset(model_class, since) as a list, preloaded (see
+	EolasModel.preload): one query for the items and a few for their relations,
+	however many there are."""
+	objs = list(type_queryset(model_class, since))
+	model_class.preload(objs)
+	return objs
+
+def items_graph(objs):
+	"""The RDF of preloaded items, without type labels."""
+	import rdflib
+	g = rdflib.Graph()
+	bind_namespaces(g)
+	for obj in objs:
+		g += obj.get_rdf(include_type_label=False)
+	return g
+
+def items_ntriples(objs):
+	"""The RDF of preloaded items, without type labels, as N-Triples."""
+	return ''.join(obj.get_rdf(include_type_label=False).serialize(format='nt') for obj in objs)
+
+# One query for the items, plus what EolasModel.preload() needs; for N-Triples,
+# per chunk as the response is read
+@api_auth(required_scope='eolas:read')
+@cost_class('export')
+@query_budget(8)
+def type_data(request, type):
+	"""GET /metadata/<type>/data/?since=… — the RDF of every item of a type, in the
+	negotiated format.  since, an ISO 8601 date or datetime, narrows it to the items
+	modified since then (see EolasModel.modified); items deleted since aren't listed.
+
+	N-Triples is fetched and serialised a chunk of items at a time as it's
+	streamed, so it never holds more than a chunk in memory.  Items are
+	described without type labels, as in /metadata/all/data/: /ontology has those.
+	Returns 404 for unknown types.
+	"""
+	try:
+		model_class = apps.get_model('metadata', type)
+	except LookupError:
+		return HttpResponse(status=404)
+	try:
+		since = parse_since(request.GET)
+	except ValueError as error:
+		return HttpResponse(str(error), status=400, content_type='text/plain')
+	format, content_type = pick_best_rdf_format(request)
+	content_type = f'{content_type}; charset={settings.DEFAULT_CHARSET}'
+	if format == 'nt':
+		chunks = preloaded_chunks(type_queryset(model_class, since))
+		return StreamingHttpResponse((items_ntriples(chunk) for chunk in chunks), content_type=content_type)
+	objs = type_items(model_class, since)
+	return HttpResponse(items_graph(objs).serialize(format=format), content_type=content_type)
+
+# Cached until an item of the type changes; one query to recompute
+@api_auth(required_scope='eolas:read')
+@query_budget(1)
+def decades(request, type):
+	"""GET /metadata/<type>/decades/ — how many items of a type placed in time by
+	year start in each decade, as a JSON array of {"decade": 1910, "count": n},
+	oldest first.  Returns 404 for types which aren't placed in time by year.
+	"""
+	try:
+		model_class = apps.get_model('metadata', type)
+	except LookupError:
+		return HttpResponse(status=404)
+	if not getattr(model_class, 'year_fields', None):
+		return HttpResponse(status=404)
+	return JsonResponse(decade_histogram(model_class), safe=False)
+
+# One recursive query for the families, one for their languages, and a few for
+# what the languages' RDF needs; none when cached
+@api_auth(required_scope='eolas:read')
+@query_budget(8)
+def language_family_tree(request, code):
+	"""GET /metadata/languagefamily/<code>/tree/ — a language family with all its
+	subfamilies, all the way down, and the languages in each (see trees.py).
+
+	Returns nested JSON: {id, uri, name, languages: [{id, uri, name}], subfamilies: [...]},
+	ordered by name; or, for clients which prefer RDF, the RDF of every family and language in it.
+	"""
+	if choose_rdf_over_json(request):
+		format, content_type = pick_best_rdf_format(request)
+		rdf = family_tree_rdf(code, format)
+		if rdf is None:
+			return HttpResponse(status=404)
+		return HttpResponse(rdf, content_type=f'{content_type}; charset={settings.DEFAULT_CHARSET}')
+	tree = family_tree_json(code)
+	if tree is None:
+		return HttpResponse(status=404)
+	return JsonResponse(tree)
+
+# One query to check the place exists and one for the rollup; none when cached
+@api_auth(required_scope='eolas:read')
+@query_budget(2)
+def place_rollup(request, pk, rollup_name):
+	"""GET /metadata/place/<pk>/<languages|ethnicgroups|places>/ — every language or
+	ethnic group linked to the place or any place contained in it, at any depth, or
+	every place contained in it, as a JSON array of {id, uri, name} (see rollups.py).
+	"""
+	items = rollup(rollup_name, int(pk))
+	if items is None:
+		return HttpResponse(status=404)
 	return JsonResponse(items, safe=False)
 
+def preloaded_chunks(queryset):
+	"""Yield lists of up to CHUNK_SIZE items from queryset, each preloaded (see EolasModel.preload)."""
+	chunk = []
+	for obj in queryset.iterator(chunk_size=CHUNK_SIZE):
+		chunk.append(obj)
+		if len(chunk) >= CHUNK_SIZE:
+			queryset.model.preload(chunk)
+			yield chunk
+			chunk = []
+	if chunk:
+		queryset.model.preload(chunk)
+		yield chunk
+
+# The COPY runs as the response is read, after the view has returned
+@api_auth(required_scope='eolas:read')
+@cost_class('export')
+@query_budget(0)
+def export(request, type, format):
+	"""Stream every item of the given type as a CSV or TSV table (see export.py).
+
+	Returns 404 for unknown types.
+	"""
+	try:
+		model_class = apps.get_model('metadata', type)
+	except LookupError:
+		return HttpResponse(status=404)
+	delimiter, _ = EXPORT_FORMATS[format]
+	return _export_response(copy_rows(model_class, delimiter), model_class, format)
+
+def _export_response(blocks, model_class, format):
+	_, content_type = EXPORT_FORMATS[format]
+	response = StreamingHttpResponse(blocks, content_type=f'{content_type}; charset=utf-8')
+	response['Content-Disposition'] = f'attachment; filename="{model_class._meta.model_name}.{format}"'
+	return response
+
+# Rendering the feed takes one query for festivals, one for periods and one for
+# the last deletion; serving it from the cache takes none
+@api_auth(required_scope='eolas:read')
+@query_budget(3)
+def festival_calendar_ics(request):
+	"""GET /metadata/festival/calendar.ics — every festival and festival period as a yearly iCalendar event.
+
+	See ical.py.  Sent with an ETag and Last-Modified, so clients polling with
+	If-None-Match or If-Modified-Since get a 304 until the festivals change.
+	"""
+	feed = festival_calendar()
+	etag = quote_etag(feed['etag'])
+	last_modified = int(feed['last_modified'].timestamp())
+	response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+	if response is None:
+		response = HttpResponse(feed['body'], content_type='text/calendar; charset=utf-8')
+	response['ETag'] = etag
+	response['Last-Modified'] = http_date(last_modified)
+	return response
+
 # No auth needed — category colour data is not sensitive and is consumed by build steps
+@machine_route
+@cache_control(public=True, max_age=PUBLIC_CACHE_SECONDS)
+@query_budget(0)
 def categories_json(request):
 	"""Return all categories with their display colours as a JSON array.
 
@@ -207,30 +570,114 @@ def categories_json(request):
 		})
 	return JsonResponse(data, safe=False)
 
-@api_auth(required_scope='eolas:read')
-def all_rdf(request):
-	# Serialize all items of every type into a single RDF graph
+def _negotiated_format(request, *args, **kwargs):
 	format, content_type = pick_best_rdf_format(request)
+	if format == 'nt' and not settings.EOLAS_DUMP_DIR:
+		# Streamed, so there's no response to share
+		return None
+	# Responses handing over to a dump differ by encoding too (see dumps.py)
+	return (format, content_type), dumps.accepts_brotli(request)
+
+def all_graph():
+	"""Return the ontology plus every item of every type as a single RDF graph.
+
+	Read straight from the triple table once the running release has built it
+	(see derived/triples.py); until then, from the items themselves.
+	"""
+	import rdflib
+	if triples.is_current():
+		g = triples.to_graph(triples.all_rows().iterator(chunk_size=triples.CHUNK_SIZE))
+		bind_namespaces(g)
+		return g
 	g = rdflib.Graph()
-	g.bind('dbpedia', DBPEDIA_NS)
-	g.bind('eolas', EOLAS_NS)
-	g.bind('loc', LOC_NS)
-	g.bind('wdt', WDT_NS)
+	bind_namespaces(g)
 	g += ontology_graph()
-	app_models = apps.get_app_config('metadata').get_models()
-	for model_class in app_models:
-		for obj in model_class.objects.all():
+	for model_class in apps.get_app_config('metadata').get_models():
+		objs = list(model_class.objects.all())
+		model_class.preload(objs)
+		for obj in objs:
 			g += obj.get_rdf(include_type_label=False) # Don't include type label for each item, as that'll be covered by ontology_graph()
+	return g
+
+@api_auth(required_scope='eolas:read')
+@cost_class('export', coalesce=_negotiated_format)
+@query_budget(per_model(3))
+def all_rdf(request):
+	format, content_type = pick_best_rdf_format(request)
+	if dumps.enabled():
+		return dumps.accel_redirect(request, format, f'{content_type}; charset={settings.DEFAULT_CHARSET}')
+	if format == 'nt' and triples.is_current():
+		# Rows are already N-Triples, so are streamed as they're read
+		return StreamingHttpResponse(triples.ntriples(), content_type=f'{content_type}; charset={settings.DEFAULT_CHARSET}')
+	g = all_graph()
 	return HttpResponse(g.serialize(format=format), content_type=f'{content_type}; charset={settings.DEFAULT_CHARSET}')
 
 
+# MIME types for SELECT and ASK results, and their rdflib result serializers
+SPARQL_RESULT_FORMATS = {
+	'application/sparql-results+json': 'json',
+	'application/sparql-results+xml': 'xml',
+	'text/csv': 'csv',
+}
+
+def _sparql_result_format(request):
+	for mime, _ in parse_accept_header(request):
+		if mime in SPARQL_RESULT_FORMATS:
+			return SPARQL_RESULT_FORMATS[mime], mime
+	return 'json', 'application/sparql-results+json'
+
+def _sparql_query_text(request):
+	if request.method == 'POST':
+		if request.content_type == 'application/sparql-query':
+			return request.body.decode(request.encoding or settings.DEFAULT_CHARSET)
+		return request.POST.get('query')
+	return request.GET.get('query')
+
+# Queries run in memory; the one database query checks whether the data has changed
 @api_auth(required_scope='eolas:read')
+@cost_class('sparql')
+@query_budget(1)
+def sparql(request):
+	"""GET or POST /sparql — a read-only SPARQL endpoint over everything in eolas (see sparql.py).
+
+	The query comes as the `query` parameter, or as the body of a POST with
+	Content-Type application/sparql-query.  SELECT and ASK results are SPARQL
+	JSON unless XML or CSV are preferred; CONSTRUCT and DESCRIBE results are RDF,
+	negotiated as for the data endpoints.  Updates, SERVICE and FROM are refused
+	with 400; queries which run for too long get 503.
+	"""
+	if request.method not in ('GET', 'POST'):
+		return HttpResponse(status=405, headers={'Allow': 'GET, POST'})
+	text = _sparql_query_text(request)
+	if not text:
+		return HttpResponse("No query given", status=400, content_type='text/plain; charset=utf-8')
+	try:
+		query_type = sparql_graph.prepare(text).algebra.name
+		if query_type in ('ConstructQuery', 'DescribeQuery'):
+			format, content_type = pick_best_rdf_format(request)
+			serialize = lambda result: result.graph.serialize(format=format)
+		else:
+			format, content_type = _sparql_result_format(request)
+			serialize = lambda result: result.serialize(format=format)
+		body = sparql_graph.cached_query(text, format, serialize)
+	except sparql_graph.QueryError as error:
+		return HttpResponse(str(error), status=400, content_type='text/plain; charset=utf-8')
+	except sparql_graph.QueryTimeout:
+		return HttpResponse(f"Query took more than {sparql_graph.QUERY_TIMEOUT} seconds", status=503, content_type='text/plain; charset=utf-8')
+	return HttpResponse(body, content_type=f'{content_type}; charset={settings.DEFAULT_CHARSET}')
+
+
+# At most one query for each type of item asked about
+@api_auth(required_scope='eolas:read')
+@query_budget(per_model(1))
 def batch_names(request):
 	"""POST /metadata/names — resolve a batch of entity URIs to their canonical names.
 
 	Request body: a JSON array of eolas entity URIs.
 	Response: a flat map of URI → canonical name (skos:prefLabel / the 'name' field).
 	URIs that are not found, malformed, or point to unknown types are silently omitted.
+	Clients which prefer application/x-ndjson get one {"uri": ..., "name": ...} object
+	per line instead, streamed as the rows are read.
 	Auth: same Bearer/key mechanism as other data endpoints.
 
 	This is a *scoped* lookup — it does a direct indexed query over the requested PKs
@@ -238,20 +685,99 @@ def batch_names(request):
 	for batches of thousands of URIs, unlike /metadata/all/data/ which materialises every
 	object in the database.
 	"""
+	batches, error = parse_uri_batch(request)
+	if error:
+		return error
+	if choose_ndjson_over_json(request):
+		lines = (json.dumps({'uri': uri, 'name': name}) + '\n' for uri, name in _batch_names(batches))
+		return StreamingHttpResponse(lines, content_type=NDJSON_MIME)
+	return JsonResponse(dict(_batch_names(batches)))
+
+def _batch_names(batches):
+	"""Yield (uri, name) for each item found from the batches returned by parse_uri_batch()."""
+	for model_class, pk_to_uri in batches:
+		try:
+			for obj_pk, name in model_class.objects.filter(pk__in=list(pk_to_uri.keys())).values_list('pk', 'name').iterator(chunk_size=CHUNK_SIZE):
+				pk_str = str(obj_pk)
+				if pk_str in pk_to_uri:
+					yield pk_to_uri[pk_str], name
+		except (ValueError, TypeError):
+			continue
+
+# A fixed number of queries for each type of item asked for (see batch_graph)
+@api_auth(required_scope='eolas:read')
+@query_budget(per_model(3))
+def batch_data(request):
+	"""POST /metadata/data — RDF for a batch of entities, in one response.
+
+	Request body: a JSON array of eolas entity URIs, as for /metadata/names.
+	Response: a single graph describing every entity found, in the RDF format
+	negotiated from the Accept header.  Labels for each entity's type are
+	included once, rather than once per entity.  N-Triples is streamed one
+	type of entity at a time.
+	URIs that are not found, malformed, or point to unknown types are silently omitted.
+	"""
+	batches, error = parse_uri_batch(request)
+	if error:
+		return error
+	format, content_type = pick_best_rdf_format(request)
+	content_type = f'{content_type}; charset={settings.DEFAULT_CHARSET}'
+	if format == 'nt':
+		graphs = (batch_graph(model_class, pk_to_uri) for model_class, pk_to_uri in batches)
+		return StreamingHttpResponse((g.serialize(format='nt') for g in graphs), content_type=content_type)
+	return HttpResponse(batches_graph(batches).serialize(format=format), content_type=content_type)
+
+def batches_graph(batches):
+	"""Return the RDF for every batch returned by parse_uri_batch() as a single graph"""
+	import rdflib
+	g = rdflib.Graph()
+	bind_namespaces(g)
+	for model_class, pk_to_uri in batches:
+		g += batch_graph(model_class, pk_to_uri)
+	return g
+
+def batch_graph(model_class, pk_to_uri):
+	"""Return the RDF for the items of model_class with the given pks.
+
+	The items, and everything their RDF needs, are fetched in a fixed number of
+	queries.  Type labels are added for the first item of each type only.
+	"""
+	import rdflib
+	g = rdflib.Graph()
+	try:
+		objs = list(model_class.objects.filter(pk__in=list(pk_to_uri.keys())))
+	except (ValueError, TypeError):
+		return g
+	model_class.preload(objs)
+	labelled_types = set()
+	for obj in objs:
+		# Items with a `type` relation are typed by that item; the rest by their model
+		type_key = getattr(obj, 'type_id', None)
+		g += obj.get_rdf(include_type_label=type_key not in labelled_types)
+		labelled_types.add(type_key)
+	return g
+
+def parse_uri_batch(request):
+	"""Validate a batch request whose body is a JSON array of eolas entity URIs.
+
+	Returns (batches, None), where batches is a list of (model class, {pk: uri}),
+	or (None, error response) if the request itself is unacceptable.  Individual
+	URIs which don't belong to this instance or to a known type are dropped.
+	"""
 	if request.method != 'POST':
-		return HttpResponse(status=405)
+		return None, HttpResponse(status=405)
 
 	content_type_header = request.content_type or ''
 	if 'application/json' not in content_type_header:
-		return HttpResponse(status=415)
+		return None, HttpResponse(status=415)
 
 	try:
 		body = json.loads(request.body)
 	except (json.JSONDecodeError, UnicodeDecodeError, ValueError):
-		return JsonResponse({'error': 'invalid_json'}, status=400)
+		return None, JsonResponse({'error': 'invalid_json'}, status=400)
 
 	if not isinstance(body, list):
-		return JsonResponse({'error': 'expected a JSON array'}, status=400)
+		return None, JsonResponse({'error': 'expected a JSON array'}, status=400)
 
 	# Parse BASE_URL once for host validation
 	base_parsed = urlparse(BASE_URL) if BASE_URL else None
@@ -273,7 +799,7 @@ def batch_names(request):
 			by_type[type_name] = {}
 		by_type[type_name][pk] = uri
 
-	result = {}
+	batches = []
 	for type_name, pk_to_uri in by_type.items():
 		try:
 			model_class = apps.get_model('metadata', type_name)
@@ -281,15 +807,8 @@ def batch_names(request):
 			continue
 		if not hasattr(model_class, 'get_absolute_url'):
 			continue
-		try:
-			for obj_pk, name in model_class.objects.filter(pk__in=list(pk_to_uri.keys())).values_list('pk', 'name'):
-				pk_str = str(obj_pk)
-				if pk_str in pk_to_uri:
-					result[pk_to_uri[pk_str]] = name
-		except (ValueError, TypeError):
-			continue
-
-	return JsonResponse(result)
+		batches.append((model_class, pk_to_uri))
+	return batches, None
 
 
 @api_auth(required_scope='eolas:write')
@@ -0,0 +1,273 @@
+"""
+Async versions of the read endpoints, used when SERVER_MODE is 'asgi'.
+
+Responses are the same as their counterparts in views.py.  The difference is
+that waiting on the database or on a slow client happens on the event loop
+rather than in a worker thread, so a handful of processes can serve many
+concurrent consumers of large responses.
+
+Model methods such as get_rdf() and to_json() may follow relations, which is
+a sync-only ORM operation, so they run via sync_to_async in chunks.  Work that
+doesn't touch the database (serialising a graph) runs
+with thread_sensitive=False so it doesn't queue behind database work.
+"""
+
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.vary import vary_on_headers
+
+from ..admission import cost_class
+from ..derived import triples
+from ..querybudget import query_budget, per_model
+from ..lucosauth.decorators import api_auth, machine_route
+from .utils_conneg import pick_best_rdf_format, choose_ndjson_over_json, NDJSON_MIME
+from .views import bind_namespaces, serialized_ontology, all_graph, item_graph, batch_graph, batches_graph, parse_uri_batch, list_queryset, _negotiated_format, _export_response, CHUNK_SIZE, PUBLIC_CACHE_SECONDS, parse_since, type_queryset, type_items, items_graph, items_ntriples
+from .export import EXPORT_FORMATS, copy_rows
+from . import dumps
+
+
+def _serialize(g, format):
+	return g.serialize(format=format)
+
+
+async def _chunks(queryset, chunk_size=CHUNK_SIZE):
+	"""Yield lists of up to chunk_size objects (or rows, for values_list()), fetched with async ORM iteration."""
+	chunk = []
+	async for obj in queryset.aiterator(chunk_size=chunk_size):
+		chunk.append(obj)
+		if len(chunk) >= chunk_size:
+			yield chunk
+			chunk = []
+	if chunk:
+		yield chunk
+
+
+# No auth needed as ontology shouldn't contain anything sensitive
+@machine_route
+@cache_control(public=True, max_age=PUBLIC_CACHE_SECONDS)
+@vary_on_headers('Accept')
+@query_budget(0)
+async def ontology(request):
+	format, content_type = pick_best_rdf_format(request)
+	body = await sync_to_async(serialized_ontology, thread_sensitive=False)(format)
+	return HttpResponse(body, content_type=f'{content_type}; charset={settings.DEFAULT_CHARSET}')
+
+
+@api_auth(required_scope='eolas:read')
+@query_budget(8)
+async def thing_data(request, type, pk):
+	format, content_type = pick_best_rdf_format(request)
+	try:
+		model_class = apps.get_model('metadata', type)
+	except LookupError:
+		return HttpResponse(status=404)
+	g = await sync_to_async(item_graph)(model_class, pk)
+	if g is None:
+		return HttpResponse(status=404)
+	bind_namespaces(g)
+	body = await sync_to_async(_serialize, thread_sensitive=False)(g, format)
+	return HttpResponse(body, content_type=f'{content_type}; charset={settings.DEFAULT_CHARSET}')
+
+
+def _ntriples(chunk):
+	type(chunk[0]).preload(chunk)
+	return items_ntriples(chunk)
+
+
+def _to_json(chunk):
+	type(chunk[0]).preload(chunk)
+	return [obj.to_json() for obj in chunk]
+
+
+@api_auth(required_scope='eolas:read')
+@query_budget(8)
+async def type_list(request, type):
+	"""Return all items of the given type as a JSON array (or, for clients which
+	prefer application/x-ndjson, one per line), streamed a chunk at a time."""
+	try:
+		model_class = apps.get_model('metadata', type)
+	except LookupError:
+		return HttpResponse(status=404)
+	if not hasattr(model_class, 'to_json'):
+		return HttpResponse(status=404)
+	queryset, error = list_queryset(request, model_class)
+	if error:
+		return error
+
+	if choose_ndjson_over_json(request):
+		async def lines():
+			async for chunk in _chunks(queryset):
+				for item in await sync_to_async(_to_json)(chunk):
+					yield json.dumps(item, cls=DjangoJSONEncoder) + '\n'
+		return StreamingHttpResponse(lines(), content_type=NDJSON_MIME)
+
+	async def stream():
+		separator = '['
+		async for chunk in _chunks(queryset):
+			for item in await sync_to_async(_to_json)(chunk):
+				yield separator + json.dumps(item, cls=DjangoJSONEncoder)
+				separator = ','
+		yield '[]' if separator == '[' else ']'
+	return StreamingHttpResponse(stream(), content_type='application/json')
+
+
+@api_auth(required_scope='eolas:read')
+@cost_class('export')
+@query_budget(8)
+async def type_data(request, type):
+	"""See views.type_data.  For N-Triples, the items are fetched with async ORM
+	iteration, then preloaded and described a chunk at a time."""
+	try:
+		model_class = apps.get_model('metadata', type)
+	except LookupError:
+		return HttpResponse(status=404)
+	try:
+		since = parse_since(request.GET)
+	except ValueError as error:
+		return HttpResponse(str(error), status=400, content_type='text/plain')
+	format, content_type = pick_best_rdf_format(request)
+	content_type = f'{content_type}; charset={settings.DEFAULT_CHARSET}'
+	if format != 'nt':
+		objs = await sync_to_async(type_items)(model_class, since)
+		g = await sync_to_async(items_graph)(objs)
+		body = await sync_to_async(_serialize, thread_sensitive=False)(g, format)
+		return HttpResponse(body, content_type=content_type)
+
+	async def stream():
+		async for chunk in _chunks(type_queryset(model_class, since)):
+			yield await sync_to_async(_ntriples)(chunk)
+	return StreamingHttpResponse(stream(), content_type=content_type)
+
+
+@api_auth(required_scope='eolas:read')
+@query_budget(per_model(1))
+async def batch_names(request):
+	"""POST /metadata/names — see views.batch_names.  Only fetches (pk, name) pairs,
+	so this never leaves the async ORM."""
+	batches, error = parse_uri_batch(request)
+	if error:
+		return error
+	if choose_ndjson_over_json(request):
+		async def lines():
+			async for uri, name in _batch_names(batches):
+				yield json.dumps({'uri': uri, 'name': name}) + '\n'
+		return StreamingHttpResponse(lines(), content_type=NDJSON_MIME)
+	result = {}
+	async for uri, name in _batch_names(batches):
+		result[uri] = name
+	return JsonResponse(result)
+
+
+async def _batch_names(batches):
+	"""Yield (uri, name) for each item found from the batches returned by parse_uri_batch().
+
+	Each type's names are fetched in one go, as they're bounded by the size of the request."""
+	for model_class, pk_to_uri in batches:
+		try:
+			async for obj_pk, name in model_class.objects.filter(pk__in=list(pk_to_uri.keys())).values_list('pk', 'name'):
+				pk_str = str(obj_pk)
+				if pk_str in pk_to_uri:
+					yield pk_to_uri[pk_str], name
+		except (ValueError, TypeError):
+			continue
+
+
+@api_auth(required_scope='eolas:read')
+@query_budget(per_model(3))
+async def batch_data(request):
+	"""POST /metadata/data — see views.batch_data."""
+	batches, error = parse_uri_batch(request)
+	if error:
+		return error
+	format, content_type = pick_best_rdf_format(request)
+	content_type = f'{content_type}; charset={settings.DEFAULT_CHARSET}'
+	if format != 'nt':
+		g = await sync_to_async(batches_graph)(batches)
+		body = await sync_to_async(_serialize, thread_sensitive=False)(g, format)
+		return HttpResponse(body, content_type=content_type)
+
+	async def stream():
+		for model_class, pk_to_uri in batches:
+			g = await sync_to_async(batch_graph)(model_class, pk_to_uri)
+			yield await sync_to_async(_serialize, thread_sensitive=False)(g, 'nt')
+	return StreamingHttpResponse(stream(), content_type=content_type)
+
+
+def _ntriples(chunk):
+	type(chunk[0]).preload(chunk)
+	return ''.join(obj.get_rdf(include_type_label=False).serialize(format='nt') for obj in chunk)
+
+
+@api_auth(required_scope='eolas:read')
+@cost_class('export', coalesce=_negotiated_format)
+@query_budget(per_model(3))
+async def all_rdf(request):
+	"""Serialize the ontology and all items of every type.
+
+	N-Triples has no document-level structure, so it is streamed a chunk of
+	items at a time (or of rows of the triple table, once it's been built: see
+	derived/triples.py), without ever holding the whole dataset in memory.
+	Other formats need the complete graph before serialising, so are built in
+	one go.  Where dumps are kept (see dumps.py), nginx sends a stored copy instead.
+	"""
+	format, content_type = pick_best_rdf_format(request)
+	content_type = f'{content_type}; charset={settings.DEFAULT_CHARSET}'
+	if await sync_to_async(dumps.enabled)():
+		return await sync_to_async(dumps.accel_redirect)(request, format, content_type)
+	if format != 'nt':
+		g = await sync_to_async(all_graph)()
+		body = await sync_to_async(_serialize, thread_sensitive=False)(g, format)
+		return HttpResponse(body, content_type=content_type)
+
+	if await sync_to_async(triples.is_current)():
+		async def stream():
+			# Named rows, as a plain values_list() runs its query as soon as it's
+			# iterated, which aiterator() does on the event loop
+			queryset = triples.all_rows().values_list('subject', 'predicate', 'object', named=True)
+			async for rows in _chunks(queryset, triples.CHUNK_SIZE):
+				yield triples.ntriples_text(rows)
+		return StreamingHttpResponse(stream(), content_type=content_type)
+
+	async def stream():
+		yield await sync_to_async(serialized_ontology, thread_sensitive=False)('nt')
+		for model_class in apps.get_app_config('metadata').get_models():
+			async for chunk in _chunks(model_class.objects.all()):
+				yield await sync_to_async(_ntriples)(chunk)
+	return StreamingHttpResponse(stream(), content_type=content_type)
+
+
+# How many of the blocks Postgres sends a COPY in to pass on at a time
+COPY_BLOCKS = 16
+
+
+def _next_blocks(blocks):
+	return b''.join(islice(blocks, COPY_BLOCKS))
+
+
+@api_auth(required_scope='eolas:read')
+@cost_class('export')
+@query_budget(0)
+async def export(request, type, format):
+	"""See views.export.  The COPY is read on the request's sync thread, where its
+	database connection lives, a few blocks at a time."""
+	try:
+		model_class = apps.get_model('metadata', type)
+	except LookupError:
+		return HttpResponse(status=404)
+	delimiter, _ = EXPORT_FORMATS[format]
+
+	async def stream():
+		blocks = copy_rows(model_class, delimiter)
+		try:
+			while data := await sync_to_async(_next_blocks)(blocks):
+				yield data
+		finally:
+			await sync_to_async(blocks.close)()
+	return _export_response(stream(), model_class, format)
@@ -0,0 +1,71 @@
+"""
+One-off work done before a process starts serving requests.
+
+When gunicorn preloads the app (see gunicorn.conf.py) this runs once, in the
+master, and the forked workers share the results copy-on-write.  Otherwise
+each worker runs it as it boots, rather than paying for it on its first
+requests.
+
+Only things derived from code and settings are built here.  Nothing is read
+from the database: anything built from data in the master would go stale in
+every worker as soon as an entity was edited.
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.conf import settings
+from django.utils import translation
+
+logger = logging.getLogger(__name__)
+
+# Fixed paths whose machine-route lookups are worth memoising up front
+MACHINE_PATHS = ['/_info', '/ontology', '/metadata/categories.json', '/metadata/names', '/metadata/data', '/metadata/all/data/', '/sparql']
+
+
+class StartupTimer:
+	"""Records how long each phase of startup takes, for a one-line report."""
+
+	def __init__(self):
+		self.phases = []
+
+	def record(self, name, seconds):
+		self.phases.append((name, seconds))
+
+	@contextmanager
+	def phase(self, name):
+		start = time.perf_counter()
+		try:
+			yield
+		finally:
+			self.record(name, time.perf_counter() - start)
+
+	def report(self):
+		total = sum(seconds for _, seconds in self.phases)
+		breakdown = ', '.join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in self.phases)
+		return f"Startup took {total * 1000:.0f}ms: {breakdown}"
+
+
+def warm_up(timer):
+	from ..middleware import is_machine_route
+	from .models import EolasModel
+	from .utils_conneg import RDF_FORMATS
+	from .views import serialized_ontology
+
+	with timer.phase('translations'):
+		for lang, _ in settings.LANGUAGES:
+			translation.activate(lang)
+		translation.deactivate()
+	with timer.phase('url routes'):
+		for path in MACHINE_PATHS:
+			is_machine_route(path)
+	with timer.phase('rdf field plans'):
+		for model_class in apps.get_app_config('metadata').get_models():
+			if issubclass(model_class, EolasModel):
+				model_class.rdf_fields()
+	# Also imports each of rdflib's serializer plugins, which it does lazily
+	with timer.phase('ontology'):
+		for format in set(RDF_FORMATS.values()):
+			serialized_ontology(format)
@@ -0,0 +1,89 @@
+"""
+Year range queries over the types which are placed in time by year.
+
+A type opts in with `year_fields`: the names of the fields holding the first
+and last year it covers (the same field twice, for a single year).  Those
+with a span of years get a GiST index on year_span() (see
+HistoricalEvent.Meta.indexes), and are queried with the range overlap
+operator, which that index serves; single years get a plain btree index.
+Either way, filter_years() is a single indexed query.
+
+An item with only one of its years known covers just that year; an item with
+neither isn't placed in time, so never matches.
+"""
+
+from django.contrib.postgres.fields import IntegerRangeField
+from django.db.backends.postgresql.psycopg_any import NumericRange
+from django.db.models import Count, Func, IntegerField, Q, Value
+from django.db.models.functions import Greatest, Least
+
+from .caching import versioned_cache
+
+
+def year_span(start_field, end_field):
+	"""An int4range expression for the years from start_field to end_field, inclusive.
+
+	LEAST and GREATEST skip nulls, so one known year gives a range of just that
+	year; and they put the years in order, as int4range raises an error for an
+	item whose end was entered before its start.
+
+	Must match the expression in the GiST index exactly for the index to be used.
+	"""
+	return Func(
+		Least(start_field, end_field),
+		Greatest(start_field, end_field),
+		Value('[]'),
+		function='int4range',
+		output_field=IntegerRangeField(),
+	)
+
+
+def parse_year_range(params):
+	"""Return (first year, last year) from a request's `overlaps=FIRST,LAST`, or
+	`year_from`/`year_to` parameters, with None for an open end.  Returns None
+	if none of those were given, and raises ValueError if they're malformed."""
+	if 'overlaps' in params:
+		first, last = params['overlaps'].split(',')
+	elif 'year_from' in params or 'year_to' in params:
+		first, last = params.get('year_from', ''), params.get('year_to', '')
+	else:
+		return None
+	first = int(first) if first.strip() else None
+	last = int(last) if last.strip() else None
+	if first is not None and last is not None and last < first:
+		raise ValueError("Range ends before it starts")
+	return first, last
+
+
+def filter_years(queryset, first, last):
+	"""Narrow queryset to the items whose years overlap first–last (either may be None)."""
+	start_field, end_field = queryset.model.year_fields
+	if start_field == end_field:
+		lookups = {}
+		if first is not None:
+			lookups[f'{start_field}__gte'] = first
+		if last is not None:
+			lookups[f'{start_field}__lte'] = last
+		return queryset.filter(**{f'{start_field}__isnull': False, **lookups})
+	return queryset.annotate(years=year_span(start_field, end_field)).filter(
+		~Q(**{f'{start_field}__isnull': True, f'{end_field}__isnull': True}),
+		years__overlap=NumericRange(first, last, '[]'),
+	)
+
+
+def decade_histogram(model_class):
+	"""Return [{'decade': 1910, 'count': n}, ...], oldest first, counting each item in
+	the decade it starts in.  Cached until an item of the type changes."""
+	start_field, end_field = model_class.year_fields
+
+	def compute():
+		first_year = Least(start_field, end_field)
+		rows = (
+			model_class.objects.exclude(**{f'{start_field}__isnull': True, f'{end_field}__isnull': True})
+			# Rounding down, so that 5 BC is in the decade -10 to -1
+			.annotate(decade=Func(first_year, template='(floor(%(expressions)s / 10.0) * 10)::integer', output_field=IntegerField()))
+			.values('decade').annotate(count=Count('pk')).order_by('decade')
+		)
+		return [{'decade': row['decade'], 'count': row['count']} for row in rows]
+
+	return versioned_cache(f'decade-histogram:{model_class._meta.label_lower}', [model_class], compute)
@@ -0,0 +1,101 @@
+"""
+Route-aware middleware pipeline.
+
+Machine-to-machine endpoints (anything decorated with @api_auth or @machine_route)
+authenticate per request with an API key, so they have no use for the
+browser-facing middleware: sessions, Django/aithne users, flash messages and UI
+language selection.  Besides the per-request Python overhead, AithneAuthMiddleware
+would otherwise try to verify every `Authorization: Bearer <api key>` header as an
+aithne JWT (and log a warning when it inevitably fails).
+
+Each middleware here subclasses the browser middleware it replaces and hands the
+request straight to the next layer when the path resolves to a machine route.
+Subclassing (rather than wrapping) keeps Django's admin system checks happy, as they
+look for the stock classes in MIDDLEWARE by issubclass().
+"""
+
+from functools import lru_cache
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.messages.middleware import MessageMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.middleware.locale import LocaleMiddleware
+from django.urls import Resolver404, resolve
+from django.utils import translation
+
+from .lucosauth.middleware import AithneAuthMiddleware
+
+
+@lru_cache(maxsize=1024)
+def is_machine_route(path_info):
+	"""Return True if path_info resolves to a view marked as a machine route.
+
+	Results are memoised per path, so the URL resolver only runs once for each
+	distinct path a worker sees (bounded, as paths embed primary keys).
+	"""
+	try:
+		match = resolve(path_info)
+	except Resolver404:
+		return False
+	return getattr(match.func, 'machine_route', False)
+
+
+class BrowserOnlyMixin:
+	"""Skip this middleware entirely for machine routes."""
+
+	def __call__(self, request):
+		if is_machine_route(request.path_info):
+			return self.skip(request)
+		return super().__call__(request)
+
+	def skip(self, request):
+		return self.get_response(request)
+
+
+class BrowserSessionMiddleware(BrowserOnlyMixin, SessionMiddleware):
+	pass
+
+
+class BrowserAuthenticationMiddleware(BrowserOnlyMixin, AuthenticationMiddleware):
+	pass
+
+
+class BrowserAithneAuthMiddleware(BrowserOnlyMixin, AithneAuthMiddleware):
+	"""Async-capable, so that under ASGI machine routes never leave the event loop.
+
+	The stock middleware is sync-only, which makes Django hop to a thread and
+	back for every request.  Here only the populate step (which may verify a JWT
+	and look up a user) runs in a thread, and only for browser routes.
+	"""
+	sync_capable = True
+	async_capable = True
+
+	def __init__(self, get_response):
+		super().__init__(get_response)
+		if iscoroutinefunction(get_response):
+			markcoroutinefunction(self)
+
+	def __call__(self, request):
+		if iscoroutinefunction(self):
+			return self.__acall__(request)
+		return super().__call__(request)
+
+	async def __acall__(self, request):
+		if not is_machine_route(request.path_info):
+			await sync_to_async(self.populate)(request)
+		return await self.get_response(request)
+
+
+class BrowserMessageMiddleware(BrowserOnlyMixin, MessageMiddleware):
+	pass
+
+
+class BrowserLocaleMiddleware(BrowserOnlyMixin, LocaleMiddleware):
+
+	def skip(self, request):
+		# Pin the default language, so machine responses never depend on
+		# whichever language this thread last served to a browser.
+		translation.activate(settings.LANGUAGE_CODE)
+		return self.get_response(request)
@@ -0,0 +1,139 @@
+"""
+Query budgets: an upper bound on the database queries a view may make.
+
+A view declares its budget with @query_budget, either as a fixed number of
+queries or as a function of the size of what it returns:
+
+  @query_budget(8)
+  def thing_data(request, type, pk): ...
+
+  @query_budget(per_model(3))
+  def all_rdf(request): ...
+
+What a budget rules out is queries per item, which is what an N+1 loop (for
+instance a str() or a relation looked up for each row) looks like.
+
+In development (DEBUG), each request to a view with a budget is counted, and
+a warning logged if it overspends.  The tests assert every read endpoint stays
+within its budget against a generated dataset (see QueryBudgetTest in
+metadata/tests.py).  QueryShapeMiddleware, also only enabled in development,
+logs any statement which a single request runs many times over, along with
+the code which ran it.
+"""
+
+import logging
+import re
+import traceback
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+# How many times one statement may run in a request before QueryShapeMiddleware reports it
+REPEAT_THRESHOLD = 10
+
+
+def per_model(queries, plus=0):
+	"""A budget of `queries` for every metadata model, plus a fixed `plus`."""
+	def budget(request, *args, **kwargs):
+		return queries * len(list(apps.get_app_config('metadata').get_models())) + plus
+	return budget
+
+
+def budget_for(view, request, *args, **kwargs):
+	"""Return the number of queries view may make serving request, or None if it has no budget."""
+	budget = getattr(view, 'query_budget', None)
+	if callable(budget):
+		return budget(request, *args, **kwargs)
+	return budget
+
+
+class _QueryCounter:
+
+	def __init__(self):
+		self.count = 0
+
+	def __call__(self, execute, sql, params, many, context):
+		self.count += 1
+		return execute(sql, params, many, context)
+
+
+def query_budget(budget):
+	"""Decorator declaring the most queries a view may make.
+
+	`budget` is either a number, or a function taking the view's arguments and
+	returning one.  Apply it inside @api_auth / @cost_class, so only the
+	view's own queries count.
+
+	Async views only carry the declaration: their queries happen on other
+	threads, so aren't counted here.
+	"""
+	def decorator(view):
+		if iscoroutinefunction(view):
+			view.query_budget = budget
+			return view
+
+		@wraps(view)
+		def _decorator(request, *args, **kwargs):
+			if not settings.DEBUG:
+				return view(request, *args, **kwargs)
+			counter = _QueryCounter()
+			with connection.execute_wrapper(counter):
+				response = view(request, *args, **kwargs)
+			limit = budget_for(_decorator, request, *args, **kwargs)
+			if counter.count > limit:
+				logger.warning("%s made %d queries, over its budget of %d", request.path, counter.count, limit)
+			return response
+		_decorator.query_budget = budget
+		return _decorator
+	return decorator
+
+
+# Placeholder lists vary in length with their contents, so are collapsed to one
+_PLACEHOLDER_LIST = re.compile(r'%s(?:\s*,\s*%s)+')
+
+
+def query_shape(sql):
+	"""Return sql with any variable-length lists of placeholders collapsed."""
+	return _PLACEHOLDER_LIST.sub('%s, ...', sql)
+
+
+class _ShapeRecorder:
+
+	def __init__(self):
+		self.counts = {}
+		self.stacks = {}
+
+	def __call__(self, execute, sql, params, many, context):
+		shape = query_shape(sql)
+		self.counts[shape] = self.counts.get(shape, 0) + 1
+		if self.counts[shape] == 2:
+			# Where a repeat comes from is where a loop is worth looking for
+			self.stacks[shape] = ''.join(traceback.format_list(_app_frames(traceback.extract_stack()[:-1])))
+		return execute(sql, params, many, context)
+
+
+def _app_frames(stack):
+	return [frame for frame in stack if '/lucos_eolas/' in frame.filename and not frame.filename.endswith('querybudget.py')]
+
+
+class QueryShapeMiddleware:
+	"""Development-only: log statements which run REPEAT_THRESHOLD or more
+	times in one request, which almost always means a query inside a loop."""
+
+	def __init__(self, get_response):
+		self.get_response = get_response
+
+	def __call__(self, request):
+		recorder = _ShapeRecorder()
+		with connection.execute_wrapper(recorder):
+			response = self.get_response(request)
+		for shape, count in recorder.counts.items():
+			if count >= REPEAT_THRESHOLD:
+				logger.warning("%s ran the same query %d times: %s\nFirst repeated from:\n%s", request.path, count, shape, recorder.stacks[shape])
+		return response
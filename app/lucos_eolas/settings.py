@@ -37,20 +37,24 @@ INSTALLED_APPS = [
     'django.contrib.postgres',
     'lucos_eolas.lucosauth',
     'lucos_eolas.metadata',
+    'lucos_eolas.derived',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    # The Browser* middleware are the stock Django/aithne ones, but skipped for
+    # machine-to-machine routes (@api_auth / @machine_route views).
+    # See lucos_eolas/middleware.py.
+    'lucos_eolas.middleware.BrowserSessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'lucos_eolas.middleware.BrowserAuthenticationMiddleware',
     # Populate request.user from aithne_session cookie / Bearer JWT (ADR-0002 §2).
     # Registered after AuthenticationMiddleware so it overrides the default user.
-    'lucos_eolas.lucosauth.middleware.AithneAuthMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
+    'lucos_eolas.middleware.BrowserAithneAuthMiddleware',
+    'lucos_eolas.middleware.BrowserMessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'django.middleware.locale.LocaleMiddleware',
+    'lucos_eolas.middleware.BrowserLocaleMiddleware',
 ]
 
 ROOT_URLCONF = 'lucos_eolas.urls'
@@ -76,6 +80,11 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'lucos_eolas.wsgi.application'
 
+# 'wsgi' runs threaded gunicorn workers; 'asgi' runs uvicorn workers and routes the
+# read endpoints to their async versions in metadata/views_async.py, so slow
+# consumers of large responses don't each pin a worker thread.  See startup.sh.
+SERVER_MODE = os.environ.get('SERVER_MODE', 'wsgi')
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
@@ -91,6 +100,52 @@ DATABASES = {
     }
 }
 
+# Gunicorn process model (see startup.sh), used to size per-process resources
+GUNICORN_WORKERS = int(os.environ.get('GUNICORN_WORKERS', 2))
+GUNICORN_THREADS = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# Threads in each worker which use the database outside of requests: the check
+# refresh and the SPARQL graph build (see metadata/apps.py)
+BACKGROUND_DB_THREADS = 2
+# Under ASGI, requests aren't limited to one thread each, so the number running
+# database work at once in each worker is capped by its pool instead
+ASGI_DB_CONNECTIONS = int(os.environ.get('ASGI_DB_CONNECTIONS', 8))
+
+# How database connections are reused between requests, set by DB_CONNECTIONS:
+#   pool        — (default) a psycopg connection pool in each worker process, big
+#                 enough for every request thread (or ASGI_DB_CONNECTIONS) plus
+#                 every background thread
+#   persistent  — one connection per thread, kept for CONN_MAX_AGE seconds
+#   none        — a fresh connection for every request
+# Reused connections are health-checked before being handed to a new request, so
+# a database restart costs one failed check rather than one failed request.
+# Pool statistics are reported in /_info metrics.
+DB_CONNECTIONS = os.environ.get('DB_CONNECTIONS', 'pool')
+if DB_CONNECTIONS == 'pool':
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': 1,
+            'max_size': (ASGI_DB_CONNECTIONS if SERVER_MODE == 'asgi' else GUNICORN_THREADS) + BACKGROUND_DB_THREADS,
+            'timeout': 10,
+        },
+    }
+elif DB_CONNECTIONS == 'persistent':
+    DATABASES['default']['CONN_MAX_AGE'] = 60
+DATABASES['default']['CONN_HEALTH_CHECKS'] = DB_CONNECTIONS != 'none'
+
+# Admission control for expensive views, per gunicorn worker process.
+# See lucos_eolas/admission.py.  With 4 threads per worker, one running and two
+# queued exports still leave a thread free for cheap traffic, and one running
+# and one queued SPARQL query leave two.
+EOLAS_ADMISSION = {
+    'export': {'concurrency': 1, 'queue': 2, 'wait': 10, 'retry_after': 30},
+    'sparql': {'concurrency': 1, 'queue': 1, 'wait': 10, 'retry_after': 10},
+}
+
+# Where precompressed dumps of /metadata/all/data/ are written, for nginx to
+# serve (see lucos_eolas/metadata/dumps.py).  Unset, the app serves them itself.
+EOLAS_DUMP_DIR = os.environ.get('DUMP_DIR')
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -145,3 +200,6 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 if os.environ["ENVIRONMENT"] == "development":
     DEBUG = True
+    # Log queries which run over and over in one request, and where from.
+    # See lucos_eolas/querybudget.py
+    MIDDLEWARE.append('lucos_eolas.querybudget.QueryShapeMiddleware')
@@ -1,20 +1,38 @@
+from django.conf import settings
 from django.urls import path, re_path, include
 from .metadata import views as metadata_views
+from .metadata import views_async
 from .metadata.admin import eolasadmin as admin
+from .derived import views as derived_views
+
+# Under ASGI, the read endpoints are served by their async versions
+read_views = views_async if settings.SERVER_MODE == 'asgi' else metadata_views
 
 urlpatterns = [
 	re_path(r'^_info$', metadata_views.info),
 	re_path(r'^i18n/', include('django.conf.urls.i18n')),
 
 	path('metadata/categories.json', metadata_views.categories_json),
-	path('metadata/names', metadata_views.batch_names),
-	path('metadata/all/data/', metadata_views.all_rdf),
-	path('metadata/<slug:type>/list/', metadata_views.type_list),
+	path('metadata/names', read_views.batch_names),
+	path('metadata/data', read_views.batch_data),
+	path('metadata/all/data/', read_views.all_rdf),
+	path('metadata/festival/on', derived_views.festivals_on),
+	path('metadata/festival/calendar.ics', metadata_views.festival_calendar_ics),
+	path('metadata/<slug:type>/list/', read_views.type_list),
+	# Before thing_entrypoint, which would otherwise take `data` for a pk
+	path('metadata/<slug:type>/data/', read_views.type_data),
+	path('metadata/<slug:type>/decades/', metadata_views.decades),
+	path('metadata/languagefamily/<slug:code>/tree/', metadata_views.language_family_tree),
+	re_path(r'^metadata/place/(?P<pk>\d+)/(?P<rollup_name>languages|ethnicgroups|places)/$', metadata_views.place_rollup),
+	re_path(r'^metadata/(?P<type>[a-z]+)/export\.(?P<format>csv|tsv)$', read_views.export),
 	path('api/metadata/<slug:type>/', metadata_views.thing_create),
 	# Linked Data HTTPRange-14 compliant endpoints
 	re_path(r'^metadata/(?P<type>[a-z]+)/(?P<pk>(?!add/)[\w-]+)/$', metadata_views.thing_entrypoint), # Excludes the exact `add/` path (used by django admin) while allowing hyphens for e.g. ISO 639 constructed-language codes (art-x-ewok).  `(?!add$)` wouldn't work here because the full URL contains a trailing slash after the pk, so `$` never matches — `(?!add/)` precisely excludes only the exact pk "add".
-	path('metadata/<slug:type>/<slug:pk>/data/', metadata_views.thing_data),
-	path('ontology', metadata_views.ontology),
+	path('metadata/<slug:type>/<slug:pk>/data/', read_views.thing_data),
+	path('metadata/<slug:type>/<slug:pk>/neighbourhood/', metadata_views.thing_neighbourhood),
+	path('ontology', read_views.ontology),
+	path('sparql', metadata_views.sparql),
+	path('fragments', derived_views.fragments),
 
 	path('', admin.urls),
 	# Static files are handled by nginx at /resources, so not listed here
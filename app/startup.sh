@@ -1,4 +1,10 @@
 #!/bin/sh
 set -e
-python manage.py migrate
-gunicorn --bind :80 --workers 2 --threads 4 --timeout 30 lucos_eolas.wsgi:application --access-logfile=/dev/stdout --access-logformat="%(t)s %(h)s \"%(r)s\" %(s)s %(b)s \"%(a)s\" %(D)sμs"
\ No newline at end of file
+python manage.py migrate_if_needed
+# The triple table depends on code as well as data, so each release rebuilds it once
+python manage.py rebuild_triple_table --if-outdated
+if [ "$SERVER_MODE" = "asgi" ]; then
+	# Async workers: each process multiplexes many slow clients on its event loop
+	exec gunicorn --bind :80 --workers ${GUNICORN_WORKERS:-2} --worker-class uvicorn_worker.UvicornWorker --timeout 30 asgi:application --access-logfile=/dev/stdout --access-logformat="%(t)s %(h)s \"%(r)s\" %(s)s %(b)s \"%(a)s\" %(D)sμs"
+fi
+gunicorn --bind :80 --workers ${GUNICORN_WORKERS:-2} --threads ${GUNICORN_THREADS:-4} --timeout 30 lucos_eolas.wsgi:application --access-logfile=/dev/stdout --access-logformat="%(t)s %(h)s \"%(r)s\" %(s)s %(b)s \"%(a)s\" %(D)sμs"
\ No newline at end of file